@@ -0,0 +1 @@
+# Stage-level performance benchmarks for StratoMind
@@ -0,0 +1,230 @@
+"""
+run_benchmarks.py — Times each pipeline stage on synthetic data.
+
+Writes machine-readable JSON (latency percentiles, peak traced memory and rows
+processed per stage and scale) and optionally compares it against a baseline
+saved earlier on the same machine.
+
+Usage:
+    python -m benchmarks.run_benchmarks --scales small medium -o bench.json
+    python -m benchmarks.run_benchmarks --save-baseline baseline.json
+    python -m benchmarks.run_benchmarks --baseline baseline.json
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+import modules.feature_engineer as feature_engineer
+import modules.predictor as predictor
+import modules.retriever as retriever
+import modules.spark_etl as spark_etl
+import modules.strategy_graph as strategy_graph
+import modules.text_features as text_features
+from modules.model_registry import ModelRegistry
+from benchmarks import synthetic
+
+SCALES = {
+    "small": {"corpus": 100, "csv_rows": 1_000, "content_rows": 500, "queries": 50, "repeat": 30},
+    "medium": {"corpus": 2_000, "csv_rows": 50_000, "content_rows": 5_000, "queries": 200, "repeat": 10},
+    "large": {"corpus": 20_000, "csv_rows": 500_000, "content_rows": 50_000, "queries": 500, "repeat": 3},
+}
+
+
+def measure(fn: Callable[[int], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict:
+    """
+    Times `fn(i)` for i in range(repeat) after one warm-up call, then runs it
+    once more under tracemalloc for peak memory.
+    """
+    if setup:
+        setup()
+    fn(0)  # warm-up: imports, lazy indexes, model load
+
+    latencies = []
+    for i in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(0)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    values = np.array(latencies) * 1000
+    return {
+        "runs": repeat,
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+        "peak_mem_bytes": int(peak)
+    }
+
+
+@contextlib.contextmanager
+def synthetic_index(corpora: Dict):
+    """Temporarily swaps the retriever's index for one built over `corpora`."""
+    previous = retriever._INDEX
+    retriever._INDEX = retriever.StrategyIndex(corpora)
+    try:
+        yield retriever._INDEX
+    finally:
+        retriever._INDEX = previous
+
+
+@contextlib.contextmanager
+def local_model(seed: int = 0):
+    """Temporarily points the predictor at a freshly trained local booster."""
+    previous = predictor.registry
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictor.registry = ModelRegistry(synthetic.train_booster(os.path.join(tmp_dir, "model.json"), seed=seed))
+        try:
+            yield predictor.registry
+        finally:
+            predictor.registry = previous
+
+
+def run_scale(scale: str, stages: Optional[List[str]] = None, seed: int = 0) -> Dict[str, Dict]:
+    """Runs every (or the selected) stage benchmark at one scale."""
+    sizes = SCALES[scale]
+    repeat = sizes["repeat"]
+    queries = synthetic.make_queries(sizes["queries"], seed)
+    csv_frame = synthetic.make_csv_frame(sizes["csv_rows"], seed)
+    content_frame = synthetic.make_content_frame(sizes["content_rows"], seed)
+    corpora = synthetic.make_corpus(sizes["corpus"], seed)
+    domains = synthetic.DOMAINS
+
+    def query(i):
+        return queries[i % len(queries)]
+
+    benches = {}
+
+    def bench(name, fn, setup=None, rows=None):
+        """`rows` is a fixed count or a callable giving the rows processed from `fn`'s output."""
+        if stages and name not in stages:
+            return
+        processed = {}
+        if callable(rows):
+            def counted(i):
+                processed["rows"] = rows(fn(i))
+            result = measure(counted, repeat, setup)
+        else:
+            result = measure(fn, repeat, setup)
+        result["rows"] = processed.get("rows", rows)
+        benches[name] = result
+        print(f"  {scale}/{name}: p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms "
+              f"peak={result['peak_mem_bytes'] / 1e6:.1f}MB", file=sys.stderr)
+
+    # No row cap (max_lines=0), whatever the config says; rows are counted from the output
+    bench("etl_csv", lambda i: spark_etl.run_etl(csv_frame, max_lines=0), rows=len)
+    # Cold text features: clear the content-hash memo before every run
+    bench("etl_content", lambda i: spark_etl.run_etl(content_frame, max_lines=0),
+          setup=text_features.clear_cache, rows=len)
+
+    if not stages or "features" in stages:
+        text_features.clear_cache()
+        etl_content = spark_etl.run_etl(content_frame, max_lines=0)
+        bench("features", lambda i: feature_engineer.transform(query(i), domains[i % 3], etl_content),
+              rows=len(etl_content))
+
+    with synthetic_index(corpora):
+        bench("retriever", lambda i: retriever.get_relevant_docs(domains[i % 3], query(i)),
+              rows=sizes["corpus"] * len(domains))
+        top_docs = {domain: retriever.get_relevant_docs(domain, queries[0])[:5] for domain in domains}
+
+    if not stages or "predict" in stages:
+        feature_rows = synthetic.make_feature_rows(max(repeat, 100), seed)
+        with local_model(seed):
+            bench("predict", lambda i: predictor.predict(feature_rows[i % len(feature_rows)]), rows=1)
+            bench("predict_score",
+                  lambda i: predictor.predict_batch([feature_rows[i % len(feature_rows)]], explain=False), rows=1)
+
+    bench("strategy_graph",
+          lambda i: strategy_graph.run_strategy_pipeline(
+              domains[i % 3], query(i), top_docs[domains[i % 3]], " Moderate Strategic Fit"),
+          rows=5)
+
+    return benches
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Returns regression messages for stages whose p50 grew by more than `threshold`x.
+    """
+    regressions = []
+    for key, base in baseline.get("results", {}).items():
+        now = current["results"].get(key)
+        if not now or not base.get("p50_ms"):
+            continue
+        ratio = now["p50_ms"] / base["p50_ms"]
+        marker = "REGRESSION" if ratio > threshold else "ok"
+        print(f"  {key:<28} {base['p50_ms']:>10.2f} → {now['p50_ms']:>10.2f} ms  ×{ratio:.2f}  {marker}",
+              file=sys.stderr)
+        if ratio > threshold:
+            regressions.append(f"{key}: p50 {base['p50_ms']:.2f}ms → {now['p50_ms']:.2f}ms (×{ratio:.2f})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark StratoMind pipeline stages on synthetic data.")
+    parser.add_argument("--scales", nargs="+", default=["small"], choices=sorted(SCALES))
+    parser.add_argument("--stages", nargs="+", help="Only run these stages (e.g. retriever predict)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="bench_results.json", help="JSON results path")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed p50 slowdown ratio")
+    parser.add_argument("--save-baseline", help="Also write the results to this baseline path")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scale in args.scales:
+        print(f"Running {scale} scale...", file=sys.stderr)
+        for name, result in run_scale(scale, args.stages, args.seed).items():
+            results[f"{scale}/{name}"] = result
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "scales": {scale: SCALES[scale] for scale in args.scales}
+        },
+        "results": results
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print("Performance regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
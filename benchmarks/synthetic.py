@@ -0,0 +1,112 @@
+"""
+synthetic.py — Deterministic synthetic data for the stage benchmarks.
+
+Every generator takes a size and a seed so runs at the same scale are
+comparable across commits and machines.
+"""
+
+import random
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+DOMAINS = ["EdTech", "FinTech", "SaaS"]
+
+_VOCAB = (
+    "growth retention churn pricing onboarding credit risk scoring learning engagement "
+    "platform customer enterprise partner analytics automation compliance payments "
+    "subscription funnel conversion freemium cohort segment adaptive gamification "
+    "lending fraud ledger marketplace integration upsell expansion renewal pipeline "
+    "curriculum assessment mentor tutoring marketing channel brand community support"
+).split()
+
+_BOILERPLATE = [
+    "Confidential — for board use only",
+    "StratoMind Holdings Ltd. All rights reserved.",
+    "This document contains forward-looking statements.",
+]
+
+
+def _phrase(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choice(_VOCAB) for _ in range(rng.randint(low, high)))
+
+
+def make_corpus(per_domain: int, seed: int = 0) -> Dict[str, List[Dict]]:
+    """Strategy corpora shaped like assets/strategy_docs, keyed by lowercase domain."""
+    rng = random.Random(seed)
+    return {
+        domain.lower(): [
+            {
+                "title": _phrase(rng, 2, 5).title(),
+                "description": _phrase(rng, 8, 20).capitalize() + ".",
+                "steps": [_phrase(rng, 3, 8).capitalize() for _ in range(rng.randint(2, 6))]
+            }
+            for _ in range(per_domain)
+        ]
+        for domain in DOMAINS
+    }
+
+
+def make_csv_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Tabular upload shaped like assets/sample_data.csv, with some gaps."""
+    rng = random.Random(seed)
+    frame = pd.DataFrame({
+        "Strategy": [_phrase(rng, 2, 5).title() for _ in range(rows)],
+        "Domain": [rng.choice(DOMAINS) for _ in range(rows)],
+        "Steps": [", ".join(_phrase(rng, 1, 3).title() for _ in range(3)) for _ in range(rows)],
+        "Budget": np.random.default_rng(seed).integers(1_000, 1_000_000, rows),
+    })
+    frame.loc[frame.sample(frac=0.02, random_state=seed).index, "Steps"] = None
+    return frame
+
+
+def make_content_frame(rows: int, seed: int = 0, boilerplate_ratio: float = 0.3) -> pd.DataFrame:
+    """Line-per-row text like a parsed PDF/DOCX, with repeated headers/footers."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(rows):
+        if rng.random() < boilerplate_ratio:
+            lines.append(rng.choice(_BOILERPLATE) if rng.random() < 0.8 else f"Page {i // 40 + 1}")
+        else:
+            lines.append(_phrase(rng, 4, 30).capitalize() + rng.choice([".", "!", "?"]))
+    return pd.DataFrame({"content": lines})
+
+
+def make_queries(count: int, seed: int = 0) -> List[str]:
+    """Short strategy prompts drawn from the corpus vocabulary."""
+    rng = random.Random(seed)
+    return [_phrase(rng, 1, 4) for _ in range(count)]
+
+
+def make_feature_rows(count: int, seed: int = 0) -> List[Dict]:
+    """Feature dicts in the shape produced by feature_engineer.transform."""
+    rng = random.Random(seed)
+    return [
+        {
+            "query_length": rng.randint(1, 8),
+            "keyword_hits": rng.randint(0, 10),
+            "avg_steps": round(rng.uniform(0, 6), 2)
+        }
+        for _ in range(count)
+    ]
+
+
+def train_booster(path: str, rows: int = 2_000, seed: int = 0) -> str:
+    """
+    Trains a small binary:logistic booster on FEATURE_KEYS and saves it to `path`.
+    """
+    import xgboost as xgb
+    from modules.predictor import FEATURE_KEYS
+
+    rng = np.random.default_rng(seed)
+    features = np.column_stack([
+        rng.integers(1, 9, rows),
+        rng.integers(0, 11, rows),
+        rng.uniform(0, 6, rows),
+    ]).astype(float)
+    labels = ((features[:, 0] + 2 * features[:, 1] + features[:, 2] + rng.normal(0, 2, rows)) > 10).astype(int)
+    dtrain = xgb.DMatrix(features, label=labels, feature_names=FEATURE_KEYS)
+    booster = xgb.train({"objective": "binary:logistic", "max_depth": 4, "eta": 0.3}, dtrain, num_boost_round=50)
+    booster.save_model(path)
+    return path
@@ -0,0 +1,183 @@
+"""
+batch.py — Headless batch runner for the full strategy pipeline.
+
+Runs retriever → feature_engineer → predictor/fallback → strategy_graph for
+every (domain, query) job in a JSONL or CSV file, spreading jobs across a
+process pool and writing one JSONL result per job as soon as it finishes.
+
+Usage:
+    python -m modules.batch jobs.jsonl -o results.jsonl --workers 8
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+import modules.feature_engineer as feature_engineer
+import modules.predictor as predictor
+import modules.retriever as retriever
+import modules.strategy_graph as strategy_graph
+from modules.fallback import fallback_predict
+
+STAGES = ["retrieve", "features", "predict", "strategy"]
+
+_force_fallback = False
+
+
+def load_jobs(path: str) -> List[Dict[str, str]]:
+    """
+    Reads jobs from a JSONL file ({"domain": ..., "query": ...} per line) or a
+    CSV file with `domain` and `query` columns.
+    """
+    jobs = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            jobs.append({"domain": str(row.get("domain", "")), "query": str(row.get("query", "") or "")})
+    return jobs
+
+
+def _init_worker(force_fallback: bool) -> None:
+    """Loads the model and strategy corpora once per worker process."""
+    global _force_fallback
+    _force_fallback = force_fallback
+    retriever.get_index()
+    if not force_fallback:
+        try:
+            predictor.registry.get()
+        except Exception as e:
+            print(f"⚠️ Failed to load model, jobs will use fallback: {e}", file=sys.stderr)
+
+
+def run_job(job_id: int, domain: str, query: str) -> Dict:
+    """
+    Runs the full pipeline for one job and records per-stage timings (seconds).
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    docs = retriever.get_relevant_docs(domain, query)
+    timings["retrieve"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    features = feature_engineer.transform(query, domain, docs)
+    timings["features"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    used_fallback = _force_fallback
+    if not used_fallback:
+        try:
+            batch = predictor.predict_batch([features])
+            prediction, explanation = batch["labels"][0], predictor.explain_row(batch, 0)
+        except Exception:
+            used_fallback = True
+    if used_fallback:
+        prediction, explanation = fallback_predict(features)
+    timings["predict"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    strategy = strategy_graph.run_strategy_pipeline(domain, query, docs, prediction)
+    timings["strategy"] = time.perf_counter() - start
+
+    return {
+        "job": job_id,
+        "domain": domain,
+        "query": query,
+        "prediction": str(prediction),
+        "explanation": explanation,
+        "fallback": used_fallback,
+        "strategy": strategy,
+        "documents": [doc.get("title", "") for doc in docs],
+        "timings": timings
+    }
+
+
+def _run_job(args: Tuple[int, Dict[str, str]]) -> Dict:
+    job_id, job = args
+    try:
+        return run_job(job_id, job["domain"], job["query"])
+    except Exception as e:
+        return {"job": job_id, **job, "error": str(e), "timings": {}}
+
+
+def run_batch(jobs: List[Dict[str, str]], workers: int = 1, force_fallback: bool = False) -> Iterator[Dict]:
+    """
+    Yields one result per job, in completion order.
+
+    Args:
+        jobs (List[Dict]): Jobs with `domain` and `query` keys.
+        workers (int): Worker processes; 1 runs in-process.
+        force_fallback (bool): Skip the model and use `fallback_predict`.
+    """
+    numbered = list(enumerate(jobs))
+    if workers <= 1:
+        _init_worker(force_fallback)
+        for item in numbered:
+            yield _run_job(item)
+        return
+
+    chunksize = max(1, min(64, len(numbered) // (workers * 4)))
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(force_fallback,)) as pool:
+        yield from pool.imap_unordered(_run_job, numbered, chunksize=chunksize)
+
+
+def format_report(results_count: int, errors: int, elapsed: float, stage_times: Dict[str, List[float]]) -> str:
+    """Renders throughput and per-stage latency percentiles (ms)."""
+    lines = [
+        f"Jobs: {results_count} ({errors} failed) in {elapsed:.2f}s "
+        f"→ {results_count / elapsed if elapsed else 0:.1f} jobs/s",
+        f"{'stage':<10} {'mean':>9} {'p50':>9} {'p95':>9} {'total':>9}"
+    ]
+    for stage in STAGES:
+        values = np.array(stage_times.get(stage, []), dtype=float) * 1000
+        if not len(values):
+            continue
+        lines.append(
+            f"{stage:<10} {values.mean():>9.2f} {np.percentile(values, 50):>9.2f} "
+            f"{np.percentile(values, 95):>9.2f} {values.sum() / 1000:>8.2f}s"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the StratoMind pipeline over a file of (domain, query) jobs.")
+    parser.add_argument("jobs", help="JSONL or CSV file with `domain` and `query` fields")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results path (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--fallback", action="store_true", help="Force fallback predictions")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.jobs)
+    stage_times: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    errors = 0
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        for result in run_batch(jobs, workers=args.workers, force_fallback=args.fallback):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            errors += "error" in result
+            for stage, seconds in result["timings"].items():
+                stage_times[stage].append(seconds)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    print(format_report(len(jobs), errors, elapsed, stage_times), file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+corpus.py — Compact, pre-normalized representation of the strategy library.
+
+Each strategy is a `__slots__` record whose lowercased title/description,
+token list and step count are computed once at load time, so retrieval and
+feature engineering never re-normalize text per query. Tokens are interned, so
+repeated words share one string across the whole library. A corpus can be saved
+to and loaded from a compact pickle of column lists.
+"""
+
+import glob
+import importlib
+import os
+import pickle
+import re
+import sys
+import tempfile
+from typing import Dict, Iterator, List, Optional
+
+STRATEGY_DOCS_DIR = os.path.join("assets", "strategy_docs")
+COMPACT_CORPUS_PATH = os.path.join(".cache", "strategy_corpus.pkl")
+# Bump when the serialized layout or tokenization changes
+CORPUS_FORMAT = 1
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercases and splits text into word tokens."""
+    return _TOKEN_RE.findall(str(text or "").lower())
+
+
+class StrategyRecord:
+    """
+    One strategy with its normalized fields precomputed.
+
+    Supports read-only dict access (`get`, `[]`, `keys`) for `title`,
+    `description` and `steps`, so it can be passed anywhere a strategy dict is
+    expected.
+    """
+
+    __slots__ = ("domain", "title", "description", "steps",
+                 "title_lower", "description_lower", "tokens", "step_count")
+
+    _KEYS = ("title", "description", "steps")
+
+    def __init__(self, domain: str, title: str, description: str, steps: List[str], tokens: Optional[tuple] = None):
+        self.domain = domain
+        self.title = title
+        self.description = description
+        self.steps = steps
+        self.title_lower = title.lower()
+        self.description_lower = description.lower()
+        self.tokens = tokens if tokens is not None else tuple(
+            sys.intern(t) for t in tokenize(title) + tokenize(description)
+        )
+        self.step_count = len(steps)
+
+    @classmethod
+    def from_dict(cls, domain: str, doc: Dict) -> "StrategyRecord":
+        steps = doc.get("steps", [])
+        return cls(
+            sys.intern(domain),
+            str(doc.get("title", "")),
+            str(doc.get("description", "")),
+            list(steps) if isinstance(steps, (list, tuple)) else []
+        )
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._KEYS else default
+
+    def __getitem__(self, key: str):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def keys(self):
+        return self._KEYS
+
+    def to_dict(self) -> Dict:
+        return {"title": self.title, "description": self.description, "steps": list(self.steps)}
+
+    def __repr__(self) -> str:
+        return f"StrategyRecord({self.domain!r}, {self.title!r}, {self.description!r}, {self.steps!r})"
+
+
+class StrategyCorpus:
+    """
+    All strategy records, grouped by lowercase domain.
+
+    Args:
+        records (List[StrategyRecord]): Strategies in library order.
+    """
+
+    def __init__(self, records: List[StrategyRecord]):
+        self.records = records
+        self.by_domain: Dict[str, List[StrategyRecord]] = {}
+        for record in records:
+            self.by_domain.setdefault(record.domain, []).append(record)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[StrategyRecord]:
+        return iter(self.records)
+
+    @classmethod
+    def from_corpora(cls, corpora: Dict[str, List[Dict]]) -> "StrategyCorpus":
+        """Builds a corpus from plain strategy dicts keyed by domain."""
+        return cls([
+            StrategyRecord.from_dict(domain.lower(), doc)
+            for domain, docs in corpora.items()
+            for doc in docs
+        ])
+
+    @classmethod
+    def from_modules(cls, docs_dir: str = STRATEGY_DOCS_DIR) -> "StrategyCorpus":
+        """Imports every `*_strategies.py` module under `docs_dir`."""
+        corpora = {}
+        for path in sorted(glob.glob(os.path.join(docs_dir, "*_strategies.py"))):
+            module_stem = os.path.splitext(os.path.basename(path))[0]
+            module = importlib.import_module(f"assets.strategy_docs.{module_stem}")
+            corpora[module_stem[: -len("_strategies")]] = module.STRATEGIES
+        return cls.from_corpora(corpora)
+
+    # --- Compact serialization ---
+    def save(self, path: str) -> None:
+        """Writes the corpus as a pickle of column lists (atomic replace)."""
+        columns = {
+            "format": CORPUS_FORMAT,
+            "domain": [r.domain for r in self.records],
+            "title": [r.title for r in self.records],
+            "description": [r.description for r in self.records],
+            "steps": [r.steps for r in self.records],
+            "tokens": [r.tokens for r in self.records],
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(columns, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path: str) -> "StrategyCorpus":
+        """Loads a corpus written by `save` without re-tokenizing."""
+        with open(path, "rb") as f:
+            columns = pickle.load(f)
+        if columns.get("format") != CORPUS_FORMAT:
+            raise ValueError(f"Unsupported corpus format in {path}: {columns.get('format')}")
+        return cls([
+            StrategyRecord(sys.intern(domain), title, description, steps, tuple(sys.intern(t) for t in tokens))
+            for domain, title, description, steps, tokens in zip(
+                columns["domain"], columns["title"], columns["description"], columns["steps"], columns["tokens"]
+            )
+        ])
+
+
+def load_corpus(docs_dir: str = STRATEGY_DOCS_DIR, compact_path: Optional[str] = COMPACT_CORPUS_PATH) -> StrategyCorpus:
+    """
+    Loads the strategy library, preferring the compact file when it is newer
+    than every source module, and refreshing it otherwise.
+    """
+    sources = glob.glob(os.path.join(docs_dir, "*_strategies.py"))
+    newest_source = max((os.path.getmtime(p) for p in sources), default=0)
+
+    if compact_path and os.path.exists(compact_path) and os.path.getmtime(compact_path) >= newest_source:
+        try:
+            return StrategyCorpus.load(compact_path)
+        except Exception as e:
+            print(f"⚠️ Compact corpus unreadable, rebuilding: {e}")
+
+    corpus = StrategyCorpus.from_modules(docs_dir)
+    if compact_path:
+        try:
+            corpus.save(compact_path)
+        except OSError as e:
+            print(f"⚠️ Could not write compact corpus: {e}")
+    return corpus
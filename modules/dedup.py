@@ -0,0 +1,227 @@
+"""
+dedup.py — Collapses repeated and near-duplicate text lines before NLP.
+
+Headers, footers, page numbers and boilerplate repeat on every page of a PDF
+or DOCX. Lines are first grouped exactly after normalization (case, whitespace
+and page numbers), then near-duplicates are found with MinHash signatures over
+word shingles and LSH banding. Lines with different figures are never merged
+unless `fold_digits` is set. Each group keeps its first line and an occurrence
+count (`OCCURRENCES_COLUMN`), so downstream stages process one row per distinct
+line.
+"""
+
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.config_loader import load_yaml_config
+
+DEFAULT_DEDUP_CONFIG = {
+    "enabled": False,
+    "threshold": 0.8,
+    "num_perm": 64,
+    "bands": 16,
+    "shingle_size": 3,
+    # Shorter lines are only collapsed when they match exactly (after normalization)
+    "min_tokens": 4,
+    # Fold every number, not just page numbers ("grew 12%" == "grew 40%")
+    "fold_digits": False,
+}
+
+# Private name so user data with an `occurrences` column is never mistaken for dedup output
+OCCURRENCES_COLUMN = "_occurrences"
+
+_MERSENNE = (1 << 31) - 1
+_DIGITS_RE = re.compile(r"\d+")
+# "page 3", "page 3 of 20", "page 3/20"
+_PAGE_REF_RE = re.compile(r"\bpage\s*\d+(?:\s*(?:of|/)\s*\d+)?")
+# Lines that are only a page marker: "3", "- 3 -", "3 / 20"
+_PAGE_ONLY_RE = re.compile(r"[-–—\s]*\d+(?:\s*(?:of|/)\s*\d+)?[-–—\s]*")
+
+
+def load_dedup_config() -> Dict:
+    """Loads `ingestion.dedup` from app_config.yaml merged over the defaults."""
+    try:
+        ingestion_config = (load_yaml_config("app_config.yaml") or {}).get("ingestion", {}) or {}
+    except FileNotFoundError:
+        ingestion_config = {}
+    return {**DEFAULT_DEDUP_CONFIG, **(ingestion_config.get("dedup") or {})}
+
+
+def normalize_line(line: str, fold_digits: bool = False) -> str:
+    """
+    Case- and whitespace-insensitive form with page numbers folded
+    ("Page 3 of 20" == "page 4 of 20"). Other numbers are kept unless
+    `fold_digits` is set.
+    """
+    line = str(line).lower()
+    if fold_digits or _PAGE_ONLY_RE.fullmatch(line):
+        line = _DIGITS_RE.sub("#", line)
+    else:
+        line = _PAGE_REF_RE.sub("page #", line)
+    return " ".join(line.split())
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles, with universal hashing mod 2^31 - 1.
+
+    Args:
+        num_perm (int): Signature length.
+        shingle_size (int): Words per shingle.
+        seed (int): Seed for the hash permutations.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rng.integers(1, _MERSENNE, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MERSENNE, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: List[str]) -> np.ndarray:
+        k = self.shingle_size
+        shingles = {" ".join(tokens[i:i + k]) for i in range(max(1, len(tokens) - k + 1))}
+        hashes = np.fromiter(
+            ((zlib.crc32(s.encode("utf-8")) & _MERSENNE) % _MERSENNE for s in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        # a, h < 2^31, so a * h + b fits in uint64
+        return ((self.a[:, None] * hashes[None, :] + self.b[:, None]) % _MERSENNE).min(axis=1)
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            # Keep the earliest line as the group's root
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+
+def collapse_lines(
+    lines: Iterable[str],
+    threshold: float = 0.8,
+    num_perm: int = 64,
+    bands: int = 16,
+    shingle_size: int = 3,
+    min_tokens: int = 4,
+    fold_digits: bool = False,
+    seed: int = 0
+) -> Tuple[List[str], List[int], Dict[str, int]]:
+    """
+    Groups exact and near-duplicate lines, keeping the first line of each group.
+
+    Args:
+        lines (Iterable[str]): Lines in document order.
+        threshold (float): Estimated Jaccard similarity at which lines are merged.
+        num_perm (int): MinHash signature length.
+        bands (int): LSH bands (`num_perm` must be divisible by it).
+        shingle_size (int): Words per shingle.
+        min_tokens (int): Lines with fewer words skip near-duplicate detection.
+        fold_digits (bool): Treat all numbers as equal, not just page numbers.
+        seed (int): Seed for the MinHash permutations.
+
+    Returns:
+        Tuple[List[str], List[int], Dict[str, int]]: (Kept lines in first-seen
+            order, occurrences per kept line, {"rows_in", "rows_out",
+            "exact_duplicates", "near_duplicates"}).
+    """
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+
+    # --- Exact pass on normalized text ---
+    first_line: List[str] = []
+    counts: List[int] = []
+    keys: List[str] = []
+    index_of: Dict[str, int] = {}
+    rows_in = 0
+    for line in lines:
+        rows_in += 1
+        key = normalize_line(line, fold_digits)
+        i = index_of.get(key)
+        if i is None:
+            index_of[key] = len(keys)
+            keys.append(key)
+            first_line.append(line)
+            counts.append(1)
+        else:
+            counts[i] += 1
+
+    # --- Near-duplicate pass: MinHash + LSH banding ---
+    groups = _UnionFind(len(keys))
+    hasher = MinHasher(num_perm, shingle_size, seed)
+    rows_per_band = num_perm // bands
+    buckets: Dict[tuple, int] = {}
+    signatures: Dict[int, np.ndarray] = {}
+    # Near-duplicates must agree on their figures (all "#" when folded)
+    numbers = [_DIGITS_RE.findall(key) for key in keys]
+
+    for i, key in enumerate(keys):
+        tokens = key.split()
+        if len(tokens) < min_tokens:
+            continue
+        signature = signatures[i] = hasher.signature(tokens)
+        for band in range(bands):
+            bucket = (band, signature[band * rows_per_band:(band + 1) * rows_per_band].tobytes())
+            j = buckets.setdefault(bucket, i)
+            if (
+                j != i
+                and numbers[i] == numbers[j]
+                and groups.find(i) != groups.find(j)
+                and np.mean(signatures[j] == signature) >= threshold
+            ):
+                groups.union(i, j)
+
+    # --- Collapse groups onto their earliest line ---
+    totals: Dict[int, int] = {}
+    for i, count in enumerate(counts):
+        root = groups.find(i)
+        totals[root] = totals.get(root, 0) + count
+
+    kept = sorted(totals)
+    stats = {
+        "rows_in": rows_in,
+        "rows_out": len(kept),
+        "exact_duplicates": rows_in - len(keys),
+        "near_duplicates": len(keys) - len(kept),
+    }
+    return [first_line[i] for i in kept], [totals[i] for i in kept], stats
+
+
+def dedup_content(df: pd.DataFrame, config: Optional[Dict] = None) -> pd.DataFrame:
+    """
+    Collapses a `content` frame (one row per line) into distinct lines.
+
+    Args:
+        df (pd.DataFrame): Frame with a `content` column.
+        config (Dict, optional): Overrides `ingestion.dedup` from app_config.yaml.
+
+    Returns:
+        pd.DataFrame: `content` and `OCCURRENCES_COLUMN` columns; the stats from
+            `collapse_lines` are kept in `attrs["dedup_stats"]`.
+    """
+    settings = {**load_dedup_config(), **(config or {})}
+    kept, occurrences, stats = collapse_lines(
+        df["content"].astype(str),
+        threshold=float(settings["threshold"]),
+        num_perm=int(settings["num_perm"]),
+        bands=int(settings["bands"]),
+        shingle_size=int(settings["shingle_size"]),
+        min_tokens=int(settings["min_tokens"]),
+        fold_digits=bool(settings["fold_digits"])
+    )
+    result = pd.DataFrame({"content": kept, OCCURRENCES_COLUMN: np.asarray(occurrences, dtype=np.int64)})
+    result.attrs["dedup_stats"] = stats
+    return result
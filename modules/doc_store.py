@@ -0,0 +1,448 @@
+"""
+doc_store.py — Persistent, memory-mapped index of uploaded documents.
+
+Each ETL output (title, description, keywords per row) is indexed into an
+append-only segment on disk: a CSR inverted index stored as `.npy` arrays
+(opened with `mmap_mode="r"`), a vocabulary and a JSON-lines document file
+with byte offsets. Documents are de-duplicated by content hash across the
+whole store, so re-uploading the same material adds nothing. A manifest lists
+the live segments; small segments are merged once there are too many. Merged
+segments are retired rather than deleted, and removed by a later write once no
+in-flight search can still be reading them. The manifest's `generation` counts
+document additions, so callers can key cached search results on it.
+
+Layout:
+    <store_dir>/manifest.json
+    <store_dir>/<segment>/{docs.jsonl, doc_offsets.npy, doc_hashes.npy,
+                           doc_lengths.npy, doc_domains.npy, domains.json,
+                           vocab.json, term_offsets.npy, post_docs.npy, post_tfs.npy}
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from modules.config_loader import load_yaml_config
+from modules.corpus import tokenize
+
+STORE_VERSION = 1
+# Seconds a merged segment stays on disk for searches that opened it before the merge
+RETIRED_GRACE_SECONDS = 300
+
+DEFAULT_DOC_STORE_CONFIG = {
+    # Off by default: the store is shared, so one session's uploads reach every session
+    "enabled": False,
+    "dir": os.path.join(".cache", "doc_store"),
+    "max_segments": 16,
+}
+
+
+def load_doc_store_config() -> Dict:
+    """Loads the `doc_store` section of app_config.yaml merged over the defaults."""
+    try:
+        store_config = (load_yaml_config("app_config.yaml") or {}).get("doc_store", {}) or {}
+    except FileNotFoundError:
+        store_config = {}
+    return {**DEFAULT_DOC_STORE_CONFIG, **store_config}
+
+
+def document_hash(title: str, description: str) -> int:
+    """64-bit content hash used for de-duplication."""
+    digest = hashlib.blake2b(f"{title}\0{description}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _atomic_json(path: str, payload) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+# ----------------------
+# Segments
+# ----------------------
+def _write_segment(segment_dir: str, docs: List[Dict], hashes: List[int]) -> int:
+    """Writes one immutable segment; returns its total token count."""
+    os.makedirs(segment_dir)
+    domains = sorted({doc.get("domain", "") for doc in docs})
+    domain_codes = {domain: code for code, domain in enumerate(domains)}
+
+    offsets = [0]
+    lengths = []
+    term_docs: Dict[str, List[Tuple[int, int]]] = {}
+    with open(os.path.join(segment_dir, "docs.jsonl"), "wb") as f:
+        for doc_id, doc in enumerate(docs):
+            line = (json.dumps(doc, ensure_ascii=False) + "\n").encode("utf-8")
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+            tokens = tokenize(doc["title"]) + tokenize(doc["description"]) + tokenize(doc.get("keywords", ""))
+            lengths.append(len(tokens))
+            for token, tf in Counter(tokens).items():
+                term_docs.setdefault(token, []).append((doc_id, tf))
+
+    vocab = sorted(term_docs)
+    term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    term_offsets[1:] = np.cumsum([len(term_docs[token]) for token in vocab])
+    postings = [posting for token in vocab for posting in term_docs[token]]
+
+    np.save(os.path.join(segment_dir, "doc_offsets.npy"), np.array(offsets, dtype=np.int64))
+    np.save(os.path.join(segment_dir, "doc_hashes.npy"), np.array(hashes, dtype=np.uint64))
+    np.save(os.path.join(segment_dir, "doc_lengths.npy"), np.array(lengths, dtype=np.uint32))
+    np.save(os.path.join(segment_dir, "doc_domains.npy"),
+            np.array([domain_codes[doc.get("domain", "")] for doc in docs], dtype=np.uint16))
+    np.save(os.path.join(segment_dir, "term_offsets.npy"), term_offsets)
+    np.save(os.path.join(segment_dir, "post_docs.npy"), np.array([d for d, _ in postings], dtype=np.uint32))
+    np.save(os.path.join(segment_dir, "post_tfs.npy"),
+            np.minimum(np.array([tf for _, tf in postings], dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16))
+    with open(os.path.join(segment_dir, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(vocab, f, ensure_ascii=False)
+    with open(os.path.join(segment_dir, "domains.json"), "w", encoding="utf-8") as f:
+        json.dump(domains, f, ensure_ascii=False)
+    return int(sum(lengths))
+
+
+class _Segment:
+    """Read-only view of one segment; arrays are memory-mapped rather than read into memory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")  # noqa: E731
+        self.doc_offsets = load("doc_offsets")
+        self.doc_hashes = load("doc_hashes")
+        self.doc_lengths = load("doc_lengths")
+        self.doc_domains = load("doc_domains")
+        self.term_offsets = load("term_offsets")
+        self.post_docs = load("post_docs")
+        self.post_tfs = load("post_tfs")
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as f:
+            self.vocab = {token: term_id for term_id, token in enumerate(json.load(f))}
+        with open(os.path.join(path, "domains.json"), encoding="utf-8") as f:
+            self.domains = json.load(f)
+
+    def __len__(self) -> int:
+        return len(self.doc_hashes)
+
+    def postings(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        term_id = self.vocab.get(token)
+        if term_id is None:
+            return self.post_docs[:0], self.post_tfs[:0]
+        start, stop = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        return self.post_docs[start:stop], self.post_tfs[start:stop]
+
+    def allowed(self, doc_ids: np.ndarray, domain: Optional[str]) -> np.ndarray:
+        """Mask over `doc_ids` of docs visible to `domain` (untagged docs match every domain)."""
+        if not domain:
+            return np.ones(len(doc_ids), dtype=bool)
+        codes = [code for code, name in enumerate(self.domains) if name in ("", domain)]
+        return np.isin(self.doc_domains[doc_ids], codes)
+
+    def read(self, doc_ids: Iterable[int]) -> List[Dict]:
+        docs = []
+        with open(os.path.join(self.path, "docs.jsonl"), "rb") as f:
+            for doc_id in doc_ids:
+                start, stop = int(self.doc_offsets[doc_id]), int(self.doc_offsets[doc_id + 1])
+                f.seek(start)
+                docs.append(json.loads(f.read(stop - start)))
+        return docs
+
+
+# ----------------------
+# Store
+# ----------------------
+class DocumentStore:
+    """
+    On-disk BM25 index of uploaded documents, shared across sessions.
+
+    Args:
+        store_dir (str, optional): Directory holding the manifest and segments.
+        max_segments (int): Merge all segments into one beyond this many.
+        k1 (float): BM25 term-frequency saturation.
+        b (float): BM25 length normalization.
+    """
+
+    def __init__(self, store_dir: Optional[str] = None, max_segments: int = 16, k1: float = 1.5, b: float = 0.75):
+        self.store_dir = store_dir or DEFAULT_DOC_STORE_CONFIG["dir"]
+        self.max_segments = max_segments
+        self.k1 = k1
+        self.b = b
+        self.manifest_path = os.path.join(self.store_dir, "manifest.json")
+        self._lock = threading.Lock()
+        self._view: Tuple[Optional[int], Dict, List[_Segment]] = (None, {}, [])
+
+    # --- Manifest ---
+    def _empty_manifest(self) -> Dict:
+        return {"version": STORE_VERSION, "segments": [], "total_docs": 0, "total_tokens": 0,
+                "generation": 0, "retired": []}
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return self._empty_manifest()
+        if manifest.get("version") != STORE_VERSION:
+            print(f"⚠️ Document store format changed, starting empty: {self.store_dir}")
+            return self._empty_manifest()
+        return manifest
+
+    @contextmanager
+    def _writer(self):
+        """Serializes writers across threads and (where supported) processes."""
+        os.makedirs(self.store_dir, exist_ok=True)
+        with self._lock, open(os.path.join(self.store_dir, ".lock"), "w") as lock_file:
+            try:
+                import fcntl
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            except ImportError:  # not available on Windows; thread lock only
+                pass
+            yield
+
+    def _segments(self) -> Tuple[Dict, List[_Segment]]:
+        """Current manifest and open segments, re-opened only when the manifest changes."""
+        try:
+            stamp = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return self._empty_manifest(), []
+        if self._view[0] != stamp:
+            manifest = self._read_manifest()
+            self._view = (stamp, manifest, self._open(manifest))
+        return self._view[1], self._view[2]
+
+    def _open(self, manifest: Dict) -> List[_Segment]:
+        return [_Segment(os.path.join(self.store_dir, s["name"])) for s in manifest["segments"]]
+
+    def __len__(self) -> int:
+        return self._segments()[0]["total_docs"]
+
+    @property
+    def generation(self) -> int:
+        """Changes whenever documents are added or cleared; use it to key cached searches."""
+        return self._segments()[0].get("generation", 0)
+
+    # --- Indexing ---
+    def add_documents(self, docs: Iterable[Dict], domain: str = "", source: str = "") -> Dict[str, int]:
+        """
+        Indexes documents not already in the store.
+
+        Args:
+            docs (Iterable[Dict]): Dicts with `title`, `description` and optional `keywords`.
+            domain (str): Domain tag ('' makes the documents visible to every domain).
+            source (str): Where the documents came from (e.g. the uploaded file name).
+
+        Returns:
+            Dict[str, int]: {"added", "duplicates"}.
+        """
+        with self._writer():
+            manifest = self._read_manifest()
+            segments = self._open(manifest)
+            known = np.concatenate([s.doc_hashes for s in segments]) if segments else np.array([], dtype=np.uint64)
+
+            new_docs, new_hashes, seen, duplicates = [], [], set(), 0
+            for doc in docs:
+                title, description = str(doc.get("title", "") or ""), str(doc.get("description", "") or "")
+                if not (title.strip() or description.strip()):
+                    continue
+                digest = document_hash(title, description)
+                if digest in seen:
+                    duplicates += 1
+                    continue
+                seen.add(digest)
+                new_docs.append({
+                    "title": title,
+                    "description": description,
+                    "keywords": str(doc.get("keywords", "") or ""),
+                    "domain": domain.lower(),
+                    "source": source,
+                })
+                new_hashes.append(digest)
+
+            if new_hashes and len(known):
+                is_known = np.isin(np.array(new_hashes, dtype=np.uint64), known)
+                duplicates += int(is_known.sum())
+                new_docs = [doc for doc, dup in zip(new_docs, is_known) if not dup]
+                new_hashes = [h for h, dup in zip(new_hashes, is_known) if not dup]
+
+            if new_docs:
+                name = f"seg-{len(manifest['segments']):05d}-{uuid.uuid4().hex[:8]}"
+                tokens = _write_segment(os.path.join(self.store_dir, name), new_docs, new_hashes)
+                manifest["segments"].append({"name": name, "docs": len(new_docs), "tokens": tokens})
+                manifest["total_docs"] += len(new_docs)
+                manifest["total_tokens"] += tokens
+                manifest["generation"] = manifest.get("generation", 0) + 1
+                if len(manifest["segments"]) > self.max_segments:
+                    self._compact(manifest)
+                else:
+                    self._purge_retired(manifest)
+                    _atomic_json(self.manifest_path, manifest)
+
+        return {"added": len(new_docs), "duplicates": duplicates}
+
+    def index_etl_output(self, df, domain: str = "", source: str = "") -> Dict[str, int]:
+        """
+        Indexes the rows of a `run_etl` result that have a title or description.
+
+        PDF/DOCX outputs carry title/description/keywords; tabular uploads are
+        indexed only if they have `title` or `description` columns.
+        """
+        if df is None or not len(df) or not ({"title", "description"} & set(df.columns)):
+            return {"added": 0, "duplicates": 0}
+        columns = [c for c in ("title", "description", "keywords") if c in df.columns]
+        # object first: categorical / Arrow string columns cannot all be filled with ""
+        rows = df[columns].astype(object)
+        return self.add_documents(rows.where(rows.notna(), "").to_dict(orient="records"), domain, source)
+
+    def _compact(self, manifest: Dict) -> None:
+        """
+        Merges every segment into one and writes the manifest (caller holds the writer lock).
+
+        The merged segments are retired, not deleted: searches in this or other
+        processes may still hold the previous manifest and read their documents.
+        """
+        docs, hashes = [], []
+        for segment in self._open(manifest):
+            docs.extend(segment.read(range(len(segment))))
+            hashes.extend(int(h) for h in segment.doc_hashes)
+
+        name = f"seg-{len(manifest['segments']):05d}-{uuid.uuid4().hex[:8]}"
+        tokens = _write_segment(os.path.join(self.store_dir, name), docs, hashes)
+        now = time.time()
+        retired = manifest.get("retired", []) + [
+            {"name": s["name"], "retired_at": now} for s in manifest["segments"]
+        ]
+        manifest.update(segments=[{"name": name, "docs": len(docs), "tokens": tokens}],
+                        total_docs=len(docs), total_tokens=tokens, retired=retired)
+        self._purge_retired(manifest)
+        _atomic_json(self.manifest_path, manifest)
+
+    def _purge_retired(self, manifest: Dict) -> None:
+        """Deletes segments retired more than RETIRED_GRACE_SECONDS ago (updates `manifest` in place)."""
+        cutoff = time.time() - RETIRED_GRACE_SECONDS
+        keep = []
+        for entry in manifest.get("retired", []):
+            if entry["retired_at"] <= cutoff:
+                shutil.rmtree(os.path.join(self.store_dir, entry["name"]), ignore_errors=True)
+            else:
+                keep.append(entry)
+        manifest["retired"] = keep
+
+    def compact(self) -> None:
+        with self._writer():
+            manifest = self._read_manifest()
+            if len(manifest["segments"]) > 1:
+                self._compact(manifest)
+            elif manifest.get("retired"):
+                self._purge_retired(manifest)
+                _atomic_json(self.manifest_path, manifest)
+
+    def clear(self) -> None:
+        """Removes every document (not safe while other processes are searching)."""
+        with self._writer():
+            generation = self._read_manifest().get("generation", 0)
+            for entry in os.listdir(self.store_dir):
+                path = os.path.join(self.store_dir, entry)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+            _atomic_json(self.manifest_path, {**self._empty_manifest(), "generation": generation + 1})
+
+    # --- Search ---
+    def _idf(self, manifest: Dict, segments: List[_Segment], tokens: Iterable[str]) -> Dict[str, float]:
+        """BM25 idf per token, with statistics over the whole store."""
+        n_docs = manifest["total_docs"]
+        idf = {}
+        for token in tokens:
+            df = sum(len(s.postings(token)[0]) for s in segments)
+            idf[token] = float(np.log(1 + (n_docs - df + 0.5) / (df + 0.5)))
+        return idf
+
+    def max_score(self, query: str) -> float:
+        """
+        Upper bound of any document's BM25 score for `query` (sum of idf * (k1 + 1)).
+
+        Dividing scores by it puts them on a 0-1 scale that can be compared with
+        another index's normalized scores.
+        """
+        manifest, segments = self._segments()
+        if not manifest["total_docs"]:
+            return 0.0
+        return sum(self._idf(manifest, segments, set(tokenize(query))).values()) * (self.k1 + 1)
+
+    def search(self, query: str, domain: Optional[str] = None, top_k: int = 5) -> List[Tuple[Dict, float]]:
+        """
+        Ranks stored documents against a query with BM25 (statistics over the whole store).
+
+        Args:
+            query (str): Free-text search query.
+            domain (str, optional): Only documents tagged with this domain or untagged.
+            top_k (int): Maximum number of results.
+
+        Returns:
+            List[Tuple[Dict, float]]: (document, score) pairs, best first. Documents
+                look like strategies (`title`, `description`, empty `steps`) plus
+                `keywords` and `source`.
+        """
+        manifest, segments = self._segments()
+        tokens = set(tokenize(query))
+        if not segments or not tokens or not manifest["total_docs"]:
+            return []
+
+        avg_length = manifest["total_tokens"] / manifest["total_docs"]
+        domain_key = domain.lower() if domain else None
+        idf = self._idf(manifest, segments, tokens)
+
+        candidates = []
+        for segment_index, segment in enumerate(segments):
+            # Work only on the postings of the query tokens, never on every doc of the segment
+            posting_docs, contributions = [], []
+            for token in tokens:
+                docs, tfs = segment.postings(token)
+                if not len(docs):
+                    continue
+                tf = tfs.astype(np.float64)
+                norm = 1 - self.b + self.b * (segment.doc_lengths[docs] / avg_length if avg_length else 0)
+                posting_docs.append(docs)
+                contributions.append(idf[token] * tf * (self.k1 + 1) / (tf + self.k1 * norm))
+            if not posting_docs:
+                continue
+
+            doc_ids, inverse = np.unique(np.concatenate(posting_docs), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(contributions), minlength=len(doc_ids))
+            visible = segment.allowed(doc_ids, domain_key)
+            doc_ids, scores = doc_ids[visible], scores[visible]
+            if len(doc_ids) > top_k:
+                best = np.argpartition(scores, -top_k)[-top_k:]
+                doc_ids, scores = doc_ids[best], scores[best]
+            candidates.extend((float(score), segment_index, int(doc_id)) for doc_id, score in zip(doc_ids, scores))
+
+        results = []
+        for score, segment_index, doc_id in heapq.nlargest(top_k, candidates):
+            doc = segments[segment_index].read([doc_id])[0]
+            doc.pop("domain", None)
+            results.append(({**doc, "steps": []}, score))
+        return results
+
+
+_store: Optional[DocumentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> DocumentStore:
+    """Process-wide document store configured from the `doc_store` section of app_config.yaml."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store_config = load_doc_store_config()
+                _store = DocumentStore(store_config["dir"], int(store_config["max_segments"]))
+    return _store
@@ -0,0 +1,207 @@
+"""
+etl_cache.py — Persistent Arrow cache of transformed ETL outputs.
+
+Results of `spark_etl.run_etl` are written as uncompressed Arrow IPC files
+keyed by the input's content hash plus the ETL config and version, and later
+reloaded with a fast IPC read instead of recomputed. The file is memory-mapped,
+but converting it to pandas copies every column, so a reload costs one full
+read of the entry rather than being zero-copy. The cache directory can be shared
+by several workers: writes are atomic renames and eviction is LRU under a
+configurable size cap. `df.attrs` (e.g. the compact-dtype memory report) is
+stored as JSON in the Arrow schema metadata so cache hits keep it.
+"""
+
+import hashlib
+import importlib
+import io
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+import modules.spark_etl as spark_etl
+from modules.config_loader import load_yaml_config
+
+DEFAULT_CACHE_CONFIG = {
+    "enabled": True,
+    "dir": os.path.join(".cache", "etl"),
+    "max_bytes": 1 << 30,
+}
+_SUFFIX = ".arrow"
+_ATTRS_KEY = b"stratomind.attrs"
+
+
+def load_cache_config() -> Dict[str, Any]:
+    """Loads the `cache` section of spark_config.yaml merged over the defaults."""
+    try:
+        cache_config = (load_yaml_config("spark_config.yaml") or {}).get("cache", {}) or {}
+    except FileNotFoundError:
+        cache_config = {}
+    return {**DEFAULT_CACHE_CONFIG, **cache_config}
+
+
+# ----------------------
+# Cache keys
+# ----------------------
+def _hash_input(input_source, digest) -> Any:
+    """
+    Feeds the input's content into `digest` and returns an equivalent input
+    that can still be passed to `run_etl` (file-likes are consumed here).
+    """
+    if isinstance(input_source, pd.DataFrame):
+        digest.update(json.dumps([str(c) for c in input_source.columns]).encode())
+        digest.update(json.dumps([str(t) for t in input_source.dtypes]).encode())
+        digest.update(pd.util.hash_pandas_object(input_source, index=True).to_numpy().tobytes())
+        return input_source
+    if isinstance(input_source, str):
+        if not os.path.exists(input_source):
+            raise FileNotFoundError(f"No file found at {input_source}")
+        with open(input_source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return input_source
+    if hasattr(input_source, "read"):
+        data = input_source.getvalue() if hasattr(input_source, "getvalue") else input_source.read()
+        digest.update(data)
+        return io.BytesIO(data)
+    raise ValueError("Unsupported input type for ETL cache.")
+
+
+def cache_key(input_source) -> tuple:
+    """
+    Returns (key, replayable_input) for an ETL input.
+
+    The key covers the input content, the `etl` config section and
+    `spark_etl.ETL_VERSION`, so config or code changes never serve stale frames.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"etl-v{spark_etl.ETL_VERSION}".encode())
+    digest.update(json.dumps(spark_etl.load_etl_config(), sort_keys=True, default=str).encode())
+    replayable = _hash_input(input_source, digest)
+    return digest.hexdigest(), replayable
+
+
+# ----------------------
+# Read / write / evict
+# ----------------------
+def _read(path: str) -> pd.DataFrame:
+    """Reads one entry; `to_pandas` copies the columns out of the mapped file."""
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    df = table.to_pandas()
+    attrs = (table.schema.metadata or {}).get(_ATTRS_KEY)
+    if attrs:
+        df.attrs.update(json.loads(attrs))
+    os.utime(path)  # mark as recently used
+    return df
+
+
+def _write(df: pd.DataFrame, path: str) -> None:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    if df.attrs:
+        # Raises TypeError for non-JSON attrs; the caller then skips caching
+        metadata = {**(table.schema.metadata or {}), _ATTRS_KEY: json.dumps(df.attrs).encode("utf-8")}
+        table = table.replace_schema_metadata(metadata)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def evict(cache_dir: str, max_bytes: int) -> int:
+    """
+    Deletes least recently used entries until the cache fits in `max_bytes`.
+
+    Returns:
+        int: Number of entries removed.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(_SUFFIX):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:  # evicted by another worker
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    return removed
+
+
+def cached_run_etl(
+    input_source,
+    cache_dir: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    compute: Optional[Callable[[Any], pd.DataFrame]] = None
+) -> pd.DataFrame:
+    """
+    `spark_etl.run_etl` backed by the on-disk Arrow cache.
+
+    Falls back to a plain `run_etl` when the cache is disabled, pyarrow is
+    missing, the Spark path is active, or the input/output cannot be hashed or
+    serialized.
+
+    Args:
+        input_source (str | file-like | pd.DataFrame): Same inputs as `run_etl`.
+        cache_dir (str, optional): Overrides `cache.dir` from spark_config.yaml.
+        max_bytes (int, optional): Overrides `cache.max_bytes`.
+        compute (Callable, optional): Produces the frame on a cache miss
+            (default: `spark_etl.run_etl`), e.g. an incremental ETL.
+
+    Returns:
+        pd.DataFrame: Transformed data.
+    """
+    compute = compute or spark_etl.run_etl
+    cache_config = load_cache_config()
+    if not cache_config["enabled"] or spark_etl.USE_SPARK:
+        return compute(input_source)
+
+    try:
+        importlib.import_module("pyarrow")  # the cache needs Arrow IPC
+        key, input_source = cache_key(input_source)
+    except (ImportError, TypeError) as e:
+        print(f"⚠️ ETL cache bypassed: {e}")
+        return compute(input_source)
+
+    cache_dir = cache_dir or cache_config["dir"]
+    max_bytes = int(max_bytes if max_bytes is not None else cache_config["max_bytes"])
+    path = os.path.join(cache_dir, key + _SUFFIX)
+
+    if os.path.exists(path):
+        try:
+            return _read(path)
+        except Exception as e:  # corrupt or concurrently evicted entry
+            print(f"⚠️ ETL cache read failed, recomputing: {e}")
+
+    df = compute(input_source)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        _write(df, path)
+        evict(cache_dir, max_bytes)
+    except Exception as e:
+        print(f"⚠️ ETL cache write failed: {e}")
+    return df
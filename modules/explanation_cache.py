@@ -0,0 +1,198 @@
+"""
+explanation_cache.py — Memoized SHAP contributions per model version.
+
+Feature vectors repeat heavily across requests, so contributions are cached in
+an LRU keyed by (model version, feature vector). In "exact" mode the key is the
+vector itself and cached values equal a fresh `shap_values` call; in
+"quantized" mode vectors are snapped to a per-feature grid first and explained
+at the grid point. All cache misses of a batch are explained in one call, and
+the grid of observed (or configured) values can be precomputed ahead of time.
+"""
+
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from modules.config_loader import load_yaml_config
+
+CACHE_MODES = ("exact", "quantized", "off")
+# Distinct values remembered per feature for grid precomputation
+MAX_OBSERVED_VALUES = 1_000
+
+DEFAULT_SHAP_CONFIG = {
+    "enabled": True,
+    "cache": "exact",
+    "cache_max_entries": 10_000,
+    "quantize_steps": {},
+    "grid": {},
+    "max_grid_points": 5_000,
+}
+
+
+def load_shap_config() -> Dict:
+    """Loads the `shap` section of model_config.yaml merged over the defaults."""
+    try:
+        shap_config = (load_yaml_config("model_config.yaml") or {}).get("shap", {}) or {}
+    except FileNotFoundError:
+        shap_config = {}
+    return {**DEFAULT_SHAP_CONFIG, **shap_config}
+
+
+def feature_grid(values_per_feature: Sequence[Sequence[float]], max_points: Optional[int] = None) -> np.ndarray:
+    """
+    Cartesian product of per-feature values as a (points x features) matrix.
+
+    Raises:
+        ValueError: If the grid would exceed `max_points`.
+    """
+    sizes = [len(values) for values in values_per_feature]
+    n_points = int(np.prod(sizes)) if sizes else 0
+    if max_points is not None and n_points > max_points:
+        raise ValueError(f"Feature grid has {n_points} points (limit {max_points})")
+    return np.array(list(itertools.product(*values_per_feature)), dtype=float).reshape(n_points, len(sizes))
+
+
+class ExplanationCache:
+    """
+    Thread-safe LRU of SHAP contributions keyed by model version and feature vector.
+
+    Args:
+        n_features (int): Feature vector width.
+        max_entries (int): Cached vectors kept across all model versions.
+        mode (str): 'exact', 'quantized' or 'off' (no caching).
+        steps (Sequence[float], optional): Per-feature grid step for 'quantized'
+            mode; 0 leaves a feature unquantized.
+    """
+
+    def __init__(self, n_features: int, max_entries: int = 10_000, mode: str = "exact",
+                 steps: Optional[Sequence[float]] = None):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown SHAP cache mode: {mode}")
+        self.n_features = n_features
+        self.max_entries = max_entries
+        self.mode = mode
+        self.steps = np.asarray(steps if steps is not None else np.zeros(n_features), dtype=float)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._observed: List[set] = [set() for _ in range(n_features)]
+        self._lock = threading.Lock()
+
+    def quantize(self, vectors: np.ndarray) -> np.ndarray:
+        """Snaps vectors to the per-feature grid (features with step 0 are left as is)."""
+        vectors = np.asarray(vectors, dtype=float)
+        if not self.steps.any():
+            return vectors + 0.0
+        steps = np.where(self.steps > 0, self.steps, 1.0)
+        snapped = np.round(vectors / steps) * steps
+        # + 0.0 turns -0.0 into 0.0 so both hash to the same key
+        return np.where(self.steps > 0, snapped, vectors) + 0.0
+
+    def contributions(self, model_version, vectors: np.ndarray, mode: Optional[str] = None) -> np.ndarray:
+        """
+        SHAP contributions for each row, computing only rows not yet cached.
+
+        Args:
+            model_version (ModelVersion): Snapshot providing `version` and `explainer`.
+            vectors (np.ndarray): (n, k) feature matrix.
+            mode (str, optional): Overrides the cache mode for this call
+                ('off' always calls the explainer).
+
+        Returns:
+            np.ndarray: (n, k) contributions.
+        """
+        vectors = np.asarray(vectors, dtype=float).reshape(-1, self.n_features)
+        if (mode or self.mode) == "off":
+            return np.asarray(model_version.explainer.shap_values(vectors)).reshape(len(vectors), -1)
+
+        points = self.quantize(vectors) if (mode or self.mode) == "quantized" else vectors + 0.0
+        keys = [(model_version.version, point.tobytes()) for point in points]
+        result = np.empty((len(points), self.n_features), dtype=float)
+        missing: "OrderedDict[tuple, List[int]]" = OrderedDict()
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._entries.get(key)
+                if cached is None:
+                    missing.setdefault(key, []).append(i)
+                    continue
+                self._entries.move_to_end(key)
+                result[i] = cached
+            self.hits += len(keys) - sum(len(rows) for rows in missing.values())
+            self.misses += len(missing)
+            for column, values in enumerate(points.T):
+                if len(self._observed[column]) < MAX_OBSERVED_VALUES:
+                    self._observed[column].update(values.tolist())
+
+        if missing:
+            first_rows = [rows[0] for rows in missing.values()]
+            computed = np.asarray(model_version.explainer.shap_values(points[first_rows])).reshape(len(first_rows), -1)
+            with self._lock:
+                for (key, rows), values in zip(missing.items(), computed):
+                    result[rows] = values
+                    self._entries[key] = values
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return result
+
+    def precompute(self, model_version, values_per_feature: Optional[Sequence[Sequence[float]]] = None,
+                   max_points: int = 5_000) -> int:
+        """
+        Fills the cache for every point of a feature grid.
+
+        Args:
+            model_version (ModelVersion): Model to explain.
+            values_per_feature (Sequence[Sequence[float]], optional): Grid values
+                per feature (default: values observed so far, after quantization).
+            max_points (int): Refuse grids larger than this.
+
+        Returns:
+            int: Number of grid points.
+        """
+        if values_per_feature is None:
+            with self._lock:
+                values_per_feature = [sorted(values) for values in self._observed]
+        grid = feature_grid(values_per_feature, max_points)
+        if len(grid):
+            self.contributions(model_version, grid)
+        return len(grid)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._observed = [set() for _ in range(self.n_features)]
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+_cache: Optional[ExplanationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_explanation_cache(feature_keys: List[str]) -> ExplanationCache:
+    """Process-wide explanation cache configured from the `shap` section of model_config.yaml."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                shap_config = load_shap_config()
+                steps = shap_config.get("quantize_steps") or {}
+                _cache = ExplanationCache(
+                    len(feature_keys),
+                    int(shap_config["cache_max_entries"]),
+                    shap_config["cache"],
+                    [float(steps.get(key, 0)) for key in feature_keys]
+                )
+    return _cache
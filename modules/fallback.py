@@ -1,40 +1,26 @@
+import time
 from typing import Dict, Tuple, Callable, Any, Optional
-import streamlit as st
+
+from modules.instrumentation import metrics
 
 # --- Fallback Prediction ---
 def fallback_predict(features: Dict) -> Tuple[str, str]:
     """
     Fallback prediction logic when model is unavailable.
 
+    Scores one row with the rule engine in `fallback_rules` (weights,
+    thresholds and labels from the `fallback` section of model_config.yaml).
+    Use `fallback_rules.get_rules().predict(rows)` to score many rows at once.
+
     Args:
         features (Dict): Feature dictionary from feature_engineer.py
 
     Returns:
         Tuple[str, str]: (Prediction label, Explanation string)
     """
-    query_length = features.get("query_length", 0)
-    keyword_hits = features.get("keyword_hits", 0)
-    avg_steps = features.get("avg_steps", 0)
-
-    score = query_length + (2 * keyword_hits) + avg_steps
-
-    if score > 10:
-        prediction = " High Growth Potential"
-    elif score > 5:
-        prediction = " Moderate Strategic Fit"
-    else:
-        prediction = "Low Strategic Alignment"
+    from modules.fallback_rules import get_rules  # deferred: keeps safe_call importers light
 
-    explanation = (
-        f"(Fallback Mode)\n"
-        f"Prediction based on:\n"
-        f" • Query length: {query_length}\n"
-        f" • Keyword matches: {keyword_hits}\n"
-        f" • Average step count: {avg_steps}\n\n"
-        f"Weighted score = {score} → **{prediction}**"
-    )
-
-    return prediction, explanation
+    return get_rules().predict([features]).row(0)
 
 # --- Safe Call Wrapper ---
 def safe_call(
@@ -49,6 +35,10 @@ def safe_call(
     Executes a function with error handling.
     Returns fallback_value if the function raises an exception.
 
+    Every call is recorded in `instrumentation.metrics` under its label
+    (latency histogram, calls, exceptions, fallbacks) and may be sampled by
+    the profiler if profiling is enabled for that label.
+
     Args:
         func (Callable): Function to execute.
         fallback_value (Any): Value to return on failure.
@@ -60,12 +50,19 @@ def safe_call(
     Returns:
         Any: Result of func or fallback_value.
     """
+    context = label or getattr(func, "__name__", "call")
+    start = time.perf_counter()
     try:
-        return func(*args, **kwargs)
+        with metrics.profile(context):
+            result = func(*args, **kwargs)
     except Exception as e:
-        context = label or func.__name__
+        metrics.observe(context, time.perf_counter() - start, error=True, fallback=True)
         msg = f"[Fallback] Error in {context}: {e}"
         print(msg)
         if show_error:
+            import streamlit as st  # deferred: batch/service callers never need it
             st.warning(f"⚠️ {context} failed. Using fallback logic.")
-        return fallback_value
\ No newline at end of file
+        return fallback_value
+
+    metrics.observe(context, time.perf_counter() - start)
+    return result
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+fallback_rules.py — Config-driven, vectorized rule engine behind fallback predictions.
+
+Weights, thresholds and labels come from the `fallback` section of
+model_config.yaml. Whole batches (lists of feature dicts, arrays or DataFrames)
+are scored in one NumPy pass; labels and explanation strings are only built for
+the rows that are actually read.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from modules.config_loader import load_yaml_config
+
+DEFAULT_FALLBACK_RULES = {
+    "features": [
+        {"key": "query_length", "weight": 1, "name": "Query length"},
+        {"key": "keyword_hits", "weight": 2, "name": "Keyword matches"},
+        {"key": "avg_steps", "weight": 1, "name": "Average step count"},
+    ],
+    # Checked from the highest threshold down: score > above → label
+    "thresholds": [
+        {"above": 10, "label": " High Growth Potential"},
+        {"above": 5, "label": " Moderate Strategic Fit"},
+    ],
+    "default_label": "Low Strategic Alignment",
+}
+
+
+def load_fallback_config() -> Dict:
+    """Loads the `fallback` section of model_config.yaml merged over the defaults."""
+    try:
+        fallback_config = (load_yaml_config("model_config.yaml") or {}).get("fallback", {}) or {}
+    except FileNotFoundError:
+        fallback_config = {}
+    return {**DEFAULT_FALLBACK_RULES, **fallback_config}
+
+
+def _exact_number(value: Union[int, float]) -> Union[int, float]:
+    """Integral weights stay ints, so `2 * 3` renders as 6, not 6.0."""
+    return int(value) if float(value).is_integer() else float(value)
+
+
+class FallbackResult:
+    """
+    Scores for a batch of feature rows; labels and explanations are built on access.
+
+    Attributes:
+        scores (np.ndarray): (n,) weighted scores.
+        label_codes (np.ndarray): (n,) index into `rules.labels` per row.
+    """
+
+    def __init__(self, rules: "FallbackRules", rows: Any, scores: np.ndarray, label_codes: np.ndarray):
+        self.rules = rules
+        self._rows = rows
+        self.scores = scores
+        self.label_codes = label_codes
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def label(self, i: int) -> str:
+        return self.rules.labels[self.label_codes[i]]
+
+    @property
+    def labels(self) -> np.ndarray:
+        """All labels as an object array (one lookup, no per-row formatting)."""
+        return np.asarray(self.rules.labels, dtype=object)[self.label_codes]
+
+    def _row_values(self, i: int) -> List[Any]:
+        keys = self.rules.keys
+        rows = self._rows
+        if isinstance(rows, pd.DataFrame):
+            return [rows[key].iloc[i] if key in rows.columns else 0 for key in keys]
+        if isinstance(rows, np.ndarray):
+            return [value.item() for value in rows[i]]
+        return [rows[i].get(key, 0) for key in keys]
+
+    def explanation(self, i: int) -> str:
+        """
+        Explanation for row `i`, from the row's own values.
+
+        The score shown is recomputed from those values as Python scalars, in the
+        same order as the vectorized pass, so it prints exactly like the scalar rule.
+        """
+        values = self._row_values(i)
+        score = None
+        for weight, value in zip(self.rules.weights, values):
+            term = value if weight == 1 else weight * value
+            score = term if score is None else score + term
+        prediction = self.label(i)
+        lines = ["(Fallback Mode)", "Prediction based on:"]
+        lines += [f" • {name}: {value}" for name, value in zip(self.rules.names, values)]
+        return "\n".join(lines) + f"\n\nWeighted score = {score} → **{prediction}**"
+
+    def row(self, i: int) -> Tuple[str, str]:
+        """(label, explanation) for one row, as returned by `fallback_predict`."""
+        return self.label(i), self.explanation(i)
+
+
+class FallbackRules:
+    """
+    Weighted-sum scoring with threshold labels.
+
+    Args:
+        features (Sequence[Dict]): `key`, `weight` and display `name` per feature.
+        thresholds (Sequence[Dict]): `above` and `label`; a score strictly above
+            a threshold gets its label (highest threshold wins).
+        default_label (str): Label when no threshold is exceeded.
+    """
+
+    def __init__(self, features: Sequence[Dict], thresholds: Sequence[Dict], default_label: str):
+        self.keys = [f["key"] for f in features]
+        self.names = [f.get("name", f["key"]) for f in features]
+        self.weights = [_exact_number(f.get("weight", 1)) for f in features]
+        ordered = sorted(thresholds, key=lambda t: float(t["above"]))
+        self.cutoffs = np.array([float(t["above"]) for t in ordered], dtype=float)
+        # searchsorted code k = number of cutoffs strictly below the score
+        self.labels = [default_label] + [t["label"] for t in ordered]
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict] = None) -> "FallbackRules":
+        config = config or load_fallback_config()
+        return cls(config["features"], config["thresholds"], config["default_label"])
+
+    def matrix(self, rows: Any) -> np.ndarray:
+        """(n, features) float matrix from feature dicts, an array or a DataFrame (missing → 0)."""
+        if isinstance(rows, pd.DataFrame):
+            return rows.reindex(columns=self.keys).fillna(0).to_numpy(dtype=float)
+        if isinstance(rows, np.ndarray):
+            return np.asarray(rows, dtype=float).reshape(-1, len(self.keys))
+        return np.array([[row.get(key, 0) for key in self.keys] for row in rows], dtype=float).reshape(-1, len(self.keys))
+
+    def predict(self, rows: Union[List[Dict], np.ndarray, pd.DataFrame]) -> FallbackResult:
+        """
+        Scores every row in one pass.
+
+        Args:
+            rows (List[Dict] | np.ndarray | pd.DataFrame): Feature rows; arrays
+                must have one column per configured feature, in config order.
+
+        Returns:
+            FallbackResult: Scores and label codes; strings are built on access.
+        """
+        matrix = self.matrix(rows)
+        # Column by column (not a matmul) so float rounding matches the scalar rule
+        scores = np.zeros(len(matrix), dtype=float)
+        for column, weight in enumerate(self.weights):
+            scores = matrix[:, column] * weight if column == 0 else scores + matrix[:, column] * weight
+        codes = np.searchsorted(self.cutoffs, scores, side="left")
+        return FallbackResult(self, rows, scores, codes)
+
+
+_rules: Optional[FallbackRules] = None
+_rules_lock = threading.Lock()
+
+
+def get_rules() -> FallbackRules:
+    """Process-wide rules loaded from model_config.yaml (defaults if the section is invalid)."""
+    global _rules
+    if _rules is None:
+        with _rules_lock:
+            if _rules is None:
+                try:
+                    _rules = FallbackRules.from_config()
+                except Exception as e:
+                    # The fallback path must never fail on bad config
+                    print(f"⚠️ Invalid fallback rules, using defaults: {e}")
+                    _rules = FallbackRules.from_config(DEFAULT_FALLBACK_RULES)
+    return _rules
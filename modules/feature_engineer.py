@@ -1,15 +1,126 @@
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Optional, Union
 import numpy as np
 import pandas as pd
 
-def transform(strategy_query: Any, domain: str, strategy_docs: Union[List[Dict], pd.DataFrame]) -> Dict:
+from modules.corpus import StrategyCorpus, StrategyRecord
+from modules.dedup import OCCURRENCES_COLUMN
+
+DOMAIN_KEYS = ["EdTech", "FinTech", "SaaS"]
+
+
+def _domain_onehot(domain: str) -> Dict[str, int]:
+    """One-hot encodes the selected domain."""
+    return {f"domain_{key}": int(domain == key) for key in DOMAIN_KEYS}
+
+
+def _lowered_column(df: pd.DataFrame, column: str) -> np.ndarray:
+    """
+    Lowercased string values of a column, or empty strings if it is missing.
+
+    Missing cells become `str(value).lower()` ("nan", "none"), like the per-row
+    path; pandas >= 3 keeps them as nulls through `astype(str)`.
+    """
+    if column not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    values = df[column]
+    lowered = values.astype(str).str.lower().to_numpy(dtype=object)
+    missing = values.isna().to_numpy()
+    if missing.any():
+        lowered[missing] = [str(value).lower() for value in values[missing]]
+    return lowered
+
+
+def _step_counts(df: pd.DataFrame) -> np.ndarray:
+    """Number of steps per row; non-list/tuple `steps` values count as 0."""
+    if "steps" not in df.columns or df["steps"].dtype != object:
+        return np.zeros(len(df), dtype=int)
+    return np.fromiter(
+        (len(s) if isinstance(s, (list, tuple)) else 0 for s in df["steps"].to_numpy()),
+        dtype=int,
+        count=len(df)
+    )
+
+
+class _DocColumns:
+    """
+    Lowercased title/description columns and step counts, computed once.
+
+    Rows of deduplicated text are weighted by their occurrence count
+    (`OCCURRENCES_COLUMN`, set only by `modules.dedup`), so features match
+    those of the original, non-deduplicated lines.
+    """
+
+    def __init__(self, strategy_docs: Union[List[Dict], pd.DataFrame, StrategyCorpus]):
+        if isinstance(strategy_docs, StrategyCorpus):
+            strategy_docs = strategy_docs.records
+
+        weights = None
+        if isinstance(strategy_docs, pd.DataFrame):
+            titles = _lowered_column(strategy_docs, "title")
+            descriptions = _lowered_column(strategy_docs, "description")
+            step_counts = _step_counts(strategy_docs)
+            if OCCURRENCES_COLUMN in strategy_docs.columns:
+                # Deduplicated text: each row stands for that many original lines
+                weights = strategy_docs[OCCURRENCES_COLUMN].to_numpy(dtype=np.int64)
+        elif isinstance(strategy_docs, list) and all(isinstance(s, StrategyRecord) for s in strategy_docs):
+            # Pre-normalized corpus records: nothing to lowercase or count
+            titles = [s.title_lower for s in strategy_docs]
+            descriptions = [s.description_lower for s in strategy_docs]
+            step_counts = [s.step_count for s in strategy_docs]
+        elif isinstance(strategy_docs, list):
+            titles = [str(s.get("title", "")).lower() for s in strategy_docs]
+            descriptions = [str(s.get("description", "")).lower() for s in strategy_docs]
+            step_counts = [
+                len(s.get("steps", [])) if isinstance(s.get("steps", []), (list, tuple)) else 0
+                for s in strategy_docs
+            ]
+        else:
+            titles, descriptions, step_counts = [], [], []
+
+        self.size = len(titles)
+        self.titles = pd.Series(titles, dtype=object)
+        self.descriptions = pd.Series(descriptions, dtype=object)
+        self.weights = weights
+        self.avg_steps = np.average(step_counts, weights=weights) if self.size else 0
+
+    def keyword_hits(self, query_lower: str) -> int:
+        if not self.size:
+            return 0
+        hits = (
+            self.titles.str.contains(query_lower, regex=False).to_numpy(dtype=bool)
+            | self.descriptions.str.contains(query_lower, regex=False).to_numpy(dtype=bool)
+        )
+        if self.weights is not None:
+            return int(self.weights[hits].sum())
+        return int(np.count_nonzero(hits))
+
+
+def _features(query_str: str, domain: str, keyword_hits: int, avg_steps: Any) -> Dict:
+    return {
+        "query_length": len(query_str.split()),
+        "keyword_hits": keyword_hits,
+        "avg_steps": avg_steps,
+        **_domain_onehot(domain),
+        "raw_query": query_str,
+        "raw_domain": domain
+    }
+
+
+def transform(
+    strategy_query: Any,
+    domain: str,
+    strategy_docs: Union[List[Dict], pd.DataFrame, StrategyCorpus],
+    vectorized: Optional[bool] = None
+) -> Dict:
     """
     Transforms strategy input into a feature dictionary.
 
     Args:
         strategy_query (str | Any): User-entered strategy prompt. Will be coerced to str.
         domain (str): Selected domain (e.g., 'EdTech').
-        strategy_docs (List[Dict] | pd.DataFrame): Retrieved strategy data.
+        strategy_docs (List[Dict] | pd.DataFrame | StrategyCorpus): Retrieved strategy data.
+        vectorized (bool, optional): Work on DataFrame columns instead of per-row dicts.
+            Defaults to True for DataFrames and False for lists.
 
     Returns:
         Dict: Feature dictionary for prediction.
@@ -18,6 +129,25 @@ def transform(strategy_query: Any, domain: str, strategy_docs: Union[List[Dict],
     query_str = str(strategy_query or "").strip()
     query_lower = query_str.lower()
 
+    if vectorized is None:
+        vectorized = isinstance(strategy_docs, pd.DataFrame)
+
+    if isinstance(strategy_docs, StrategyCorpus):
+        strategy_docs = strategy_docs.records
+
+    if isinstance(strategy_docs, list) and strategy_docs and all(isinstance(s, StrategyRecord) for s in strategy_docs):
+        # Records carry lowercased fields and step counts from load time
+        keyword_hits = sum(
+            query_lower in s.title_lower or query_lower in s.description_lower
+            for s in strategy_docs
+        )
+        avg_steps = np.mean([s.step_count for s in strategy_docs])
+        return _features(query_str, domain, keyword_hits, avg_steps)
+
+    if vectorized:
+        columns = _DocColumns(strategy_docs)
+        return _features(query_str, domain, columns.keyword_hits(query_lower), columns.avg_steps)
+
     # Defensive fallback for empty or invalid input
     if isinstance(strategy_docs, pd.DataFrame):
         safe_docs = strategy_docs.to_dict(orient="records") if not strategy_docs.empty else []
@@ -26,9 +156,6 @@ def transform(strategy_query: Any, domain: str, strategy_docs: Union[List[Dict],
     else:
         safe_docs = []
 
-    # Basic keyword features
-    query_len = len(query_str.split())
-
     keyword_hits = sum(
         query_lower in str(s.get("title", "")).lower() or
         query_lower in str(s.get("description", "")).lower()
@@ -41,15 +168,32 @@ def transform(strategy_query: Any, domain: str, strategy_docs: Union[List[Dict],
         for s in safe_docs
     ]) if safe_docs else 0
 
-    # --- One-hot domain encoding ---
-    domain_keys = ["EdTech", "FinTech", "SaaS"]
-    domain_onehot = {f"domain_{key}": int(domain == key) for key in domain_keys}
+    return _features(query_str, domain, keyword_hits, avg_steps)
 
-    return {
-        "query_length": query_len,
-        "keyword_hits": keyword_hits,
-        "avg_steps": avg_steps,
-        **domain_onehot,
-        "raw_query": query_str,
-        "raw_domain": domain
-    }
\ No newline at end of file
+
+def transform_many(
+    queries: List[Any],
+    domain: str,
+    strategy_docs: Union[List[Dict], pd.DataFrame, StrategyCorpus]
+) -> List[Dict]:
+    """
+    Scores many queries against the same docs, lowercasing the docs only once.
+
+    Args:
+        queries (List[str | Any]): Strategy prompts. Each is coerced to str.
+        domain (str): Selected domain (e.g., 'EdTech').
+        strategy_docs (List[Dict] | pd.DataFrame | StrategyCorpus): Retrieved strategy data.
+
+    Returns:
+        List[Dict]: One feature dictionary per query, in input order.
+    """
+    columns = _DocColumns(strategy_docs)
+    hits_by_query: Dict[str, int] = {}
+    results = []
+    for strategy_query in queries:
+        query_str = str(strategy_query or "").strip()
+        query_lower = query_str.lower()
+        if query_lower not in hits_by_query:
+            hits_by_query[query_lower] = columns.keyword_hits(query_lower)
+        results.append(_features(query_str, domain, hits_by_query[query_lower], columns.avg_steps))
+    return results
@@ -1,5 +1,4 @@
 from typing import List, Dict
-from langchain.tools import Tool
 
 def format_strategy(doc: Dict) -> str:
     """
@@ -39,10 +38,27 @@ def generate_strategy(strategy_docs: List[Dict], query: str) -> str:
     body = "\n\n".join([format_strategy(doc) for doc in strategy_docs])
     return header + body
 
-# LangChain Tool wrapper
-generate_strategy_tool = Tool.from_function(
-    name="generate_strategy",
-    description="Generates a strategic narrative from structured strategy documents and a user query.",
-    func=lambda inputs: generate_strategy(inputs.get("strategy_docs", []), inputs.get("query", "")),
-    args_schema=None  # Optional: define Pydantic schema for stricter input validation
-)
\ No newline at end of file
+# LangChain Tool wrapper, built on first access so importing this module does not load langchain
+_generate_strategy_tool = None
+
+
+def get_generate_strategy_tool():
+    """Returns the LangChain Tool wrapping `generate_strategy`."""
+    global _generate_strategy_tool
+    if _generate_strategy_tool is None:
+        from langchain.tools import Tool
+
+        _generate_strategy_tool = Tool.from_function(
+            name="generate_strategy",
+            description="Generates a strategic narrative from structured strategy documents and a user query.",
+            func=lambda inputs: generate_strategy(inputs.get("strategy_docs", []), inputs.get("query", "")),
+            args_schema=None  # Optional: define Pydantic schema for stricter input validation
+        )
+    return _generate_strategy_tool
+
+
+def __getattr__(name: str):
+    # Keeps `genai_agent.generate_strategy_tool` working without an eager import
+    if name == "generate_strategy_tool":
+        return get_generate_strategy_tool()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
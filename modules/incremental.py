@@ -0,0 +1,180 @@
+"""
+incremental.py — Incremental ETL for re-uploaded versions of the same dataset.
+
+Per-row derived text features (title, description, counts, keywords,
+sentiment) are kept in a local store keyed by session, dataset identity and
+row content hash. When a revised export is uploaded again in the same session,
+only new or changed rows are computed; everything else is merged back from the
+store, so the work scales with the size of the diff. Sessions never read or
+overwrite each other's stores, and the least recently used stores are pruned.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+import modules.spark_etl as spark_etl
+from modules.text_features import TEXT_FEATURE_COLUMNS, extract_text_features
+
+STORE_DIR = os.path.join(".cache", "incremental")
+# Bump when the stored feature layout changes
+STORE_VERSION = "1"
+# Stores kept on disk; the least recently used are removed beyond this
+MAX_STORES = 64
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _row_hashes(content: pd.Series) -> pd.Index:
+    """64-bit content hash per row (independent of row position)."""
+    return pd.Index(pd.util.hash_pandas_object(content, index=False).to_numpy(), name="row_hash")
+
+
+class RowFeatureStore:
+    """
+    On-disk per-row text features for one dataset, indexed by row content hash.
+
+    Args:
+        dataset_key (str): Stable dataset identity, e.g. the uploaded file name.
+        store_dir (str, optional): Directory holding the stores.
+        session_key (str, optional): Owner of the store (e.g. the app session), so
+            two sessions uploading files with the same name keep separate stores.
+    """
+
+    def __init__(self, dataset_key: str, store_dir: Optional[str] = None, session_key: Optional[str] = None):
+        self.dataset_key = dataset_key
+        self.session_key = session_key
+        self.store_dir = store_dir or STORE_DIR
+        digest = hashlib.sha256(f"{session_key or ''}\0{dataset_key}".encode("utf-8")).hexdigest()[:24]
+        self.path = os.path.join(self.store_dir, f"{digest}.v{STORE_VERSION}.pkl")
+        with _locks_guard:
+            self.lock = _locks.setdefault(self.path, threading.Lock())
+
+    def load(self) -> pd.DataFrame:
+        """Stored features (empty if this dataset has not been seen)."""
+        if os.path.exists(self.path):
+            try:
+                return pd.read_pickle(self.path)
+            except Exception as e:
+                print(f"⚠️ Incremental store unreadable, rebuilding: {e}")
+        return pd.DataFrame(columns=TEXT_FEATURE_COLUMNS, index=pd.Index([], dtype="uint64", name="row_hash"))
+
+    def save(self, features: pd.DataFrame) -> None:
+        """Atomically replaces the stored features."""
+        os.makedirs(self.store_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            features.to_pickle(tmp_path)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        _prune_stores(self.store_dir, MAX_STORES)
+
+    def touch(self) -> None:
+        """Marks the store as recently used without rewriting it."""
+        try:
+            os.utime(self.path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def features_for(self, content: pd.Series, stats: Dict[str, int]) -> pd.DataFrame:
+        """
+        Returns text features for `content`, computing only rows missing from the store.
+
+        When there are new rows the store is rewritten to hold exactly the rows
+        of this version, so it tracks the latest upload instead of growing with
+        every delta. With no new rows it is left as is (it may still hold rows
+        of an earlier version until the next change).
+        """
+        hashes = _row_hashes(content)
+        with self.lock:
+            stored = self.load()
+            known = hashes.isin(stored.index)
+            new_content = content[~known]
+
+            stats["rows"] = len(content)
+            stats["new_rows"] = int((~known).sum())
+            stats["reused_rows"] = stats["rows"] - stats["new_rows"]
+
+            if stats["new_rows"]:
+                computed = extract_text_features(new_content)
+                computed.index = hashes[~known]
+                merged = pd.concat([stored[stored.index.isin(hashes)], computed])
+                merged = merged[~merged.index.duplicated(keep="last")]
+                self.save(merged)
+            else:
+                merged = stored
+                self.touch()
+
+        features = merged.reindex(hashes)
+        features.index = content.index
+        # Match the dtypes `extract_text_features` gives a full run (the store round-trip loses them)
+        return features.astype({
+            "title": "str", "description": "str", "keywords": "str",
+            "char_count": "int64", "word_count": "int64", "sentiment_polarity": "float64",
+        })
+
+
+def _prune_stores(store_dir: str, keep: int) -> None:
+    """Removes all but the `keep` most recently used stores."""
+    try:
+        entries = [entry for entry in os.scandir(store_dir) if entry.name.endswith(".pkl")]
+    except FileNotFoundError:
+        return
+    if len(entries) <= keep:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def run_etl_incremental(
+    input_source,
+    dataset_key: str,
+    store_dir: Optional[str] = None,
+    session_key: Optional[str] = None
+) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    `spark_etl.run_etl` (pandas path) that reuses per-row features from the
+    previous upload of the same dataset in the same session.
+
+    Args:
+        input_source (str | file-like | pd.DataFrame): Same inputs as `run_etl`.
+        dataset_key (str): Stable dataset identity, e.g. the uploaded file name.
+        store_dir (str, optional): Overrides the store directory.
+        session_key (str, optional): Session owning the store (see `RowFeatureStore`).
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, int]]: (Transformed data identical to
+            `run_etl`, {"rows", "new_rows", "reused_rows"}). Tabular inputs have
+            no per-row features to reuse and report all rows as new.
+    """
+    etl_config = spark_etl.load_etl_config()
+    df = spark_etl._load_pandas(input_source)
+    store = RowFeatureStore(dataset_key, store_dir, session_key)
+    stats: Dict[str, int] = {}
+
+    result = spark_etl._transform_pandas(
+        df,
+        clean_nulls=etl_config["clean_nulls"],
+        text_features_fn=lambda content: store.features_for(content, stats),
+        compact=etl_config["compact_dtypes"],
+        category_max_ratio=float(etl_config["category_max_ratio"])
+    )
+    if not stats:
+        stats = {"rows": len(result), "new_rows": len(result), "reused_rows": 0}
+    return result, stats
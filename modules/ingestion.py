@@ -0,0 +1,307 @@
+"""
+ingestion.py — Parses uploaded CSV, PDF and DOCX files into DataFrames.
+
+PDF pages are extracted in parallel page ranges across a reusable pool of
+worker processes, text documents are produced as a stream of lines, and
+extracted lines are cached on disk by file content hash (LRU-bounded) so a
+known document is never parsed twice.
+"""
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from modules.config_loader import load_yaml_config
+
+CACHE_DIR = os.path.join(".cache", "ingestion")
+# Bump when extraction logic changes so stale cache entries are ignored
+INGESTION_VERSION = "1"
+# Smaller PDFs are extracted in-process
+PARALLEL_MIN_PAGES = 8
+
+DEFAULT_INGESTION_CONFIG = {
+    # Line cache size cap; least recently used documents are evicted first
+    "cache_max_bytes": 256 * 1024 * 1024,
+}
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def load_ingestion_config() -> Dict[str, Any]:
+    """Loads the `ingestion` section of app_config.yaml merged over the defaults."""
+    try:
+        ingestion_config = (load_yaml_config("app_config.yaml") or {}).get("ingestion", {}) or {}
+    except FileNotFoundError:
+        ingestion_config = {}
+    return {**DEFAULT_INGESTION_CONFIG, **ingestion_config}
+
+
+def _read_bytes(file) -> bytes:
+    """Reads an uploaded file's bytes without consuming it for later readers."""
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    position = file.tell() if hasattr(file, "tell") else None
+    data = file.read()
+    if position is not None:
+        file.seek(position)
+    return data
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest of raw file bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _split_lines(text: str) -> List[str]:
+    return [line.strip() for line in text.split("\n") if line.strip()]
+
+
+# ----------------------
+# PDF / DOCX extraction
+# ----------------------
+# Worker process state: the PDF currently being extracted, opened once per
+# worker and document rather than once per page range
+_worker_document: Dict[str, Any] = {}
+
+
+def _open_staged_pdf(path: str, key: str):
+    pdf = _worker_document.get(key)
+    if pdf is None:
+        import pdfplumber
+
+        for previous in _worker_document.values():
+            previous.close()
+        _worker_document.clear()
+        # Read into memory so the staged file can be deleted while we hold the document
+        with open(path, "rb") as f:
+            pdf = _worker_document[key] = pdfplumber.open(io.BytesIO(f.read()))
+    return pdf
+
+
+def _extract_pdf_range(path: str, key: str, start: int, stop: int) -> List[str]:
+    """Worker entry point: lines of pages [start, stop) of the PDF staged at `path`."""
+    lines = []
+    for page in _open_staged_pdf(path, key).pages[start:stop]:
+        lines.extend(_split_lines(page.extract_text() or ""))
+        page.close()  # drop parsed layout objects; the worker outlives this document
+    return lines
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process-wide extraction pool of `workers` processes, created on first use.
+
+    Workers start with `forkserver` (or `spawn`), not `fork`, because uploads
+    are parsed from Streamlit script threads.
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context(method)
+            )
+        return pool
+
+
+def shutdown_pools() -> None:
+    """Stops the extraction workers (they are recreated on the next large PDF)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+def iter_pdf_lines(data: bytes, workers: Optional[int] = None) -> Iterator[str]:
+    """
+    Streams non-empty lines of a PDF in page order.
+
+    Large PDFs are staged once in a temporary file; tasks carry only its path
+    and a page range, and each worker opens the document once.
+
+    Args:
+        data (bytes): Raw PDF bytes.
+        workers (int, optional): Worker processes (default: CPU count).
+
+    Yields:
+        str: Stripped, non-empty lines.
+    """
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        page_count = len(pdf.pages)
+        workers = min(workers or os.cpu_count() or 1, page_count)
+        if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+            for page in pdf.pages:
+                yield from _split_lines(page.extract_text() or "")
+            return
+
+    # Several ranges per worker keeps the pool busy and the stream flowing
+    step = max(1, -(-page_count // (workers * 4)))
+    starts = list(range(0, page_count, step))
+    key = content_hash(data)
+    with tempfile.TemporaryDirectory(prefix="stratomind-pdf-") as staging_dir:
+        path = os.path.join(staging_dir, f"{key}.pdf")
+        with open(path, "wb") as f:
+            f.write(data)
+        for lines in _get_pool(workers).map(
+            _extract_pdf_range,
+            [path] * len(starts),
+            [key] * len(starts),
+            starts,
+            [start + step for start in starts]
+        ):
+            yield from lines
+
+
+def iter_docx_lines(data: bytes) -> Iterator[str]:
+    """Streams non-empty lines of a DOCX document's paragraphs."""
+    from docx import Document
+
+    doc = Document(io.BytesIO(data))
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            yield from _split_lines(paragraph.text)
+
+
+# ----------------------
+# Content-hash cache
+# ----------------------
+def _cache_path(digest: str, kind: str) -> str:
+    return os.path.join(CACHE_DIR, f"{digest}.{kind}.v{INGESTION_VERSION}.jsonl")
+
+
+def evict_cache(max_bytes: int, cache_dir: Optional[str] = None) -> int:
+    """
+    Deletes least recently used line files until the cache fits in `max_bytes`.
+
+    Returns:
+        int: Number of entries removed.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".jsonl"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:  # evicted concurrently
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    return removed
+
+
+def _open_cached(path: str):
+    """Opens a cached line file and marks it recently used, or returns None if it is absent."""
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except FileNotFoundError:  # evicted just now; the open handle still reads it
+        pass
+    return f
+
+
+def _cached_lines(lines: Iterator[str], path: str) -> Iterator[str]:
+    """Passes lines through while writing them to `path`; committed only when complete."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp_f:
+            for line in lines:
+                tmp_f.write(json.dumps(line) + "\n")
+                yield line
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    evict_cache(int(load_ingestion_config()["cache_max_bytes"]))
+
+
+def iter_document_lines(file, workers: Optional[int] = None, use_cache: bool = True) -> Iterator[str]:
+    """
+    Streams the text lines of an uploaded PDF or DOCX file.
+
+    Args:
+        file (file-like): Uploaded file with a `.name` ending in .pdf or .docx.
+        workers (int, optional): Worker processes for PDF page extraction.
+        use_cache (bool): Read/write the on-disk line cache.
+
+    Yields:
+        str: Stripped, non-empty lines in document order.
+    """
+    name = file.name.lower()
+    if name.endswith(".pdf"):
+        kind = "pdf"
+    elif name.endswith(".docx"):
+        kind = "docx"
+    else:
+        raise ValueError(f"Unsupported document type: {file.name}")
+
+    data = _read_bytes(file)
+    path = _cache_path(content_hash(data), kind)
+
+    cached = _open_cached(path) if use_cache else None
+    if cached is not None:
+        with cached:
+            for line in cached:
+                yield json.loads(line)
+        return
+
+    lines = iter_pdf_lines(data, workers) if kind == "pdf" else iter_docx_lines(data)
+    yield from (_cached_lines(lines, path) if use_cache else lines)
+
+
+def parse_uploaded_file(file, dedup: Optional[bool] = None) -> Optional[pd.DataFrame]:
+    """
+    Parses an uploaded CSV, PDF or DOCX file into a DataFrame.
+
+    Args:
+        file (file-like): Uploaded file with a `.name` attribute.
+        dedup (bool, optional): Collapse repeated and near-duplicate lines of
+            PDF/DOCX text (see `modules.dedup`). Defaults to `ingestion.dedup.enabled`
+            in app_config.yaml.
+
+    Returns:
+        pd.DataFrame | None: CSV contents, or a `content` column with one row per
+            text line (plus `dedup.OCCURRENCES_COLUMN` when deduplicated). None for
+            unsupported file types.
+    """
+    name = file.name.lower()
+    if name.endswith(".csv"):
+        return pd.read_csv(file)
+    elif name.endswith((".pdf", ".docx")):
+        df = pd.DataFrame({"content": list(iter_document_lines(file))})
+        from modules.dedup import dedup_content, load_dedup_config  # deferred: only text documents need it
+        if dedup is None:
+            dedup = load_dedup_config()["enabled"]
+        if dedup:
+            df = dedup_content(df)
+        return df
+    else:
+        return None
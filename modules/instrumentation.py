@@ -0,0 +1,413 @@
+"""
+instrumentation.py — Low-overhead stage metrics for `fallback.safe_call`.
+
+Records per-label latency histograms, call/exception counts and fallback rates,
+exports them through pluggable exporters (Prometheus text or JSON, to a file or
+a small HTTP endpoint) and can sample chosen labels with cProfile or
+tracemalloc. Exporters run on a background thread, never on the recording path.
+"""
+
+import abc
+import atexit
+import bisect
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Histogram bucket upper bounds, in seconds (Prometheus convention)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class _LabelStats:
+    __slots__ = ("calls", "errors", "fallbacks", "total_seconds", "max_seconds", "buckets",
+                 "profiled_calls", "peak_mem_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.profiled_calls = 0
+        self.peak_mem_bytes = 0
+
+
+class MetricsRegistry:
+    """Thread-safe per-label counters and latency histograms."""
+
+    def __init__(self):
+        self._stats: Dict[str, _LabelStats] = {}
+        self._lock = threading.Lock()
+        self._exporters: List["Exporter"] = []
+        self._export_thread: Optional[threading.Thread] = None
+        self._export_stop = threading.Event()
+        self._profiles: Dict[str, Dict] = {}
+        self._profilers: Dict[str, pstats.Stats] = {}
+        self._tracemalloc_active = False
+
+    def _get(self, label: str) -> _LabelStats:
+        stats = self._stats.get(label)
+        if stats is None:
+            stats = self._stats.setdefault(label, _LabelStats())
+        return stats
+
+    # --- Recording ---
+    def observe(self, label: str, seconds: float, error: bool = False, fallback: bool = False) -> None:
+        """Records one call of `label` that took `seconds`."""
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            stats = self._get(label)
+            stats.calls += 1
+            stats.errors += error
+            stats.fallbacks += fallback
+            stats.total_seconds += seconds
+            if seconds > stats.max_seconds:
+                stats.max_seconds = seconds
+            stats.buckets[index] += 1
+
+    def record_fallback(self, label: str, call: bool = True) -> None:
+        """
+        Counts a call that went straight to fallback logic (e.g. forced fallback mode).
+
+        Pass `call=False` when the call itself is already timed with `observe`
+        (e.g. a graph node that chose its fallback internally).
+        """
+        with self._lock:
+            stats = self._get(label)
+            stats.calls += call
+            stats.fallbacks += 1
+
+    @contextlib.contextmanager
+    def timer(self, label: str):
+        """Times the enclosed block; an exception is recorded as an error and re-raised."""
+        start = time.perf_counter()
+        try:
+            with self.profile(label):
+                yield
+        except Exception:
+            self.observe(label, time.perf_counter() - start, error=True)
+            raise
+        self.observe(label, time.perf_counter() - start)
+
+    # --- Sampling profiler ---
+    def enable_profiling(self, labels: Iterable[str], mode: str = "cprofile", sample_rate: float = 0.1) -> None:
+        """
+        Profiles a random `sample_rate` share of calls for the given labels.
+
+        Args:
+            labels (Iterable[str]): safe_call labels to sample.
+            mode (str): 'cprofile' (aggregated pstats per label) or 'tracemalloc' (peak memory).
+            sample_rate (float): Probability that a call is profiled.
+        """
+        if mode not in ("cprofile", "tracemalloc"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        with self._lock:
+            for label in labels:
+                self._profiles[label] = {"mode": mode, "sample_rate": float(sample_rate)}
+
+    def disable_profiling(self, labels: Optional[Iterable[str]] = None) -> None:
+        with self._lock:
+            for label in list(labels) if labels is not None else list(self._profiles):
+                self._profiles.pop(label, None)
+
+    def profile(self, label: str):
+        """Context manager that profiles this call if `label` is sampled, else a no-op."""
+        settings = self._profiles.get(label)
+        if settings is None or random.random() >= settings["sample_rate"]:
+            return contextlib.nullcontext()
+        if settings["mode"] == "cprofile":
+            return self._cprofile(label)
+        return self._tracemalloc(label)
+
+    @contextlib.contextmanager
+    def _cprofile(self, label: str):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler is active on this thread
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                self._get(label).profiled_calls += 1
+                aggregate = self._profilers.get(label)
+                if aggregate is None:
+                    self._profilers[label] = pstats.Stats(profiler)
+                else:
+                    aggregate.add(profiler)
+
+    @contextlib.contextmanager
+    def _tracemalloc(self, label: str):
+        with self._lock:
+            if tracemalloc.is_tracing():  # someone else owns tracemalloc
+                owner = False
+            else:
+                tracemalloc.start()
+                owner = self._tracemalloc_active = True
+        if not owner:
+            yield
+            return
+        try:
+            tracemalloc.reset_peak()
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            with self._lock:
+                tracemalloc.stop()
+                self._tracemalloc_active = False
+                stats = self._get(label)
+                stats.profiled_calls += 1
+                stats.peak_mem_bytes = max(stats.peak_mem_bytes, peak)
+
+    def profile_report(self, label: str, limit: int = 25, sort: str = "cumulative") -> str:
+        """Top functions of the aggregated cProfile samples for `label`."""
+        with self._lock:
+            aggregate = self._profilers.get(label)
+            if aggregate is None:
+                return f"No cProfile samples for {label}."
+            out = io.StringIO()
+            aggregate.stream = out
+            aggregate.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    # --- Reading ---
+    def snapshot(self) -> Dict[str, Dict]:
+        """Plain-dict copy of every label's metrics."""
+        with self._lock:
+            return {
+                label: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "fallbacks": stats.fallbacks,
+                    "fallback_rate": stats.fallbacks / stats.calls if stats.calls else 0.0,
+                    "mean_seconds": stats.total_seconds / max(sum(stats.buckets), 1),
+                    "max_seconds": stats.max_seconds,
+                    "total_seconds": stats.total_seconds,
+                    "buckets": dict(zip(("+Inf" if b == float("inf") else repr(b) for b in BUCKETS), stats.buckets)),
+                    "profiled_calls": stats.profiled_calls,
+                    "peak_mem_bytes": stats.peak_mem_bytes
+                }
+                for label, stats in self._stats.items()
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix: str = "stratomind_stage") -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        def esc(label: str) -> str:
+            return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_seconds Stage latency.",
+            f"# TYPE {prefix}_seconds histogram"
+        ]
+        for label, stats in snapshot.items():
+            cumulative = 0
+            for bound, count in stats["buckets"].items():
+                cumulative += count
+                lines.append(f'{prefix}_seconds_bucket{{label="{esc(label)}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_seconds_sum{{label="{esc(label)}"}} {stats["total_seconds"]}')
+            lines.append(f'{prefix}_seconds_count{{label="{esc(label)}"}} {cumulative}')
+        for name, key, help_text in (
+            ("calls_total", "calls", "Calls, including forced fallbacks."),
+            ("errors_total", "errors", "Calls that raised."),
+            ("fallbacks_total", "fallbacks", "Calls answered by fallback logic."),
+        ):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for label, stats in snapshot.items():
+                lines.append(f'{prefix}_{name}{{label="{esc(label)}"}} {stats[key]}')
+        return "\n".join(lines) + "\n"
+
+    # --- Exporters ---
+    def add_exporter(self, exporter: "Exporter") -> None:
+        """Registers `exporter` and starts the background export thread if needed."""
+        with self._lock:
+            self._exporters.append(exporter)
+            if self._export_thread is None or not self._export_thread.is_alive():
+                self._export_stop.clear()
+                self._export_thread = threading.Thread(
+                    target=self._export_loop, name="metrics-export", daemon=True
+                )
+                self._export_thread.start()
+
+    def export(self) -> None:
+        """Runs every exporter now."""
+        for exporter in list(self._exporters):
+            self._run_exporter(exporter)
+
+    def _run_exporter(self, exporter: "Exporter") -> None:
+        try:
+            exporter.export(self)
+        except Exception as e:
+            print(f"⚠️ Metrics export failed ({type(exporter).__name__}): {e}")
+
+    def _export_loop(self) -> None:
+        # Wakes at the shortest exporter interval; each exporter keeps its own schedule
+        while True:
+            exporters = list(self._exporters)
+            wait = min((exporter.interval for exporter in exporters), default=1.0)
+            if self._export_stop.wait(max(wait, 0.05)):
+                return
+            for exporter in exporters:
+                if exporter.due():
+                    self._run_exporter(exporter)
+
+    def stop_exporting(self, flush: bool = True) -> None:
+        """Stops the background export thread, optionally exporting one last time."""
+        self._export_stop.set()
+        thread = self._export_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._export_thread = None
+        if flush:
+            self.export()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._profilers.clear()
+
+
+class Exporter(abc.ABC):
+    """
+    Base exporter. Subclasses implement `export(registry)`; the registry's
+    export thread calls it every `interval` seconds.
+    """
+
+    def __init__(self, interval: float = 10.0):
+        self.interval = interval
+        self._next = 0.0
+
+    def due(self) -> bool:
+        now = time.monotonic()
+        if now < self._next:
+            return False
+        self._next = now + self.interval
+        return True
+
+    @abc.abstractmethod
+    def export(self, registry: MetricsRegistry) -> None:
+        """Publishes the current metrics of `registry`."""
+
+
+class FileExporter(Exporter):
+    """
+    Atomically writes metrics to `path` as 'prometheus' text (e.g. for the node
+    exporter textfile collector) or 'json'.
+    """
+
+    def __init__(self, path: str, fmt: str = "prometheus", interval: float = 10.0):
+        super().__init__(interval)
+        if fmt not in ("prometheus", "json"):
+            raise ValueError(f"Unknown metrics format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+
+    def export(self, registry: MetricsRegistry) -> None:
+        body = registry.to_prometheus() if self.fmt == "prometheus" else registry.to_json()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(body)
+        os.replace(tmp_path, self.path)
+
+
+class CallbackExporter(Exporter):
+    """Hands the snapshot dict to any callable (StatsD, logging, ...)."""
+
+    def __init__(self, callback: Callable[[Dict], None], interval: float = 10.0):
+        super().__init__(interval)
+        self.callback = callback
+
+    def export(self, registry: MetricsRegistry) -> None:
+        self.callback(registry.snapshot())
+
+
+def start_http_exporter(port: int = 9108, host: str = "127.0.0.1", registry: Optional[MetricsRegistry] = None):
+    """
+    Serves `/metrics` (Prometheus text) and `/metrics.json` from a daemon thread.
+
+    Binds to localhost by default; pass `host="0.0.0.0"` (or `http_host` in the
+    config) to expose it to a remote scraper.
+
+    Returns:
+        ThreadingHTTPServer: The running server (call `.shutdown()` to stop).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    registry = registry or metrics
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, content_type = registry.to_json(), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, content_type = registry.to_prometheus(), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
+
+
+def configure(config: Optional[Dict] = None) -> None:
+    """
+    Applies an `instrumentation` config section, e.g. from app_config.yaml:
+
+        instrumentation:
+          prometheus_file: .cache/metrics/stratomind.prom
+          json_file: .cache/metrics/stratomind.json
+          http_port: 9108
+          http_host: 127.0.0.1
+          export_interval: 10
+          profile:
+            labels: [graph.prediction]
+            mode: cprofile
+            sample_rate: 0.05
+    """
+    config = config or {}
+    interval = float(config.get("export_interval", 10))
+    if config.get("prometheus_file"):
+        metrics.add_exporter(FileExporter(config["prometheus_file"], "prometheus", interval))
+    if config.get("json_file"):
+        metrics.add_exporter(FileExporter(config["json_file"], "json", interval))
+    if config.get("prometheus_file") or config.get("json_file"):
+        # Write the final numbers on exit; the export thread is a daemon
+        atexit.register(metrics.stop_exporting)
+    if config.get("http_port"):
+        start_http_exporter(int(config["http_port"]), config.get("http_host", "127.0.0.1"))
+    profile = config.get("profile") or {}
+    if profile.get("labels"):
+        metrics.enable_profiling(profile["labels"], profile.get("mode", "cprofile"), profile.get("sample_rate", 0.1))
+
+
+# Process-wide registry used by safe_call
+metrics = MetricsRegistry()
@@ -0,0 +1,253 @@
+"""
+llm_narrative.py — Optional local-LLM strategy narratives.
+
+Narratives are produced by a pluggable backend (GPT4All for local CPU
+inference, or a deterministic stub for tests and demos), streamed token by
+token so the UI can render progressively, and cached on disk by normalized
+prompt, model id and generation settings with LRU eviction.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from modules.config_loader import load_yaml_config
+from modules.instrumentation import metrics
+
+DEFAULT_LLM_CONFIG = {
+    "backend": "stub",
+    "model": "orca-mini-3b-gguf2-q4_0.gguf",
+    "max_tokens": 400,
+    "temperature": 0.3,
+    "cache_dir": os.path.join(".cache", "narratives"),
+    "cache_max_entries": 2_000,
+}
+
+
+def load_llm_config() -> Dict:
+    """Loads the `llm` section of model_config.yaml merged over the defaults."""
+    try:
+        llm_config = (load_yaml_config("model_config.yaml") or {}).get("llm", {}) or {}
+    except FileNotFoundError:
+        llm_config = {}
+    return {**DEFAULT_LLM_CONFIG, **llm_config}
+
+
+def build_prompt(strategy_docs: List[Dict], query: str) -> str:
+    """Instruction prompt grounding the model in the retrieved strategies."""
+    lines = [
+        "You are a strategy consultant. Using only the playbooks below, write a concise, "
+        "actionable strategy narrative for the request.",
+        f"Request: {query or 'General strategy overview'}",
+        "",
+        "Playbooks:"
+    ]
+    for doc in strategy_docs:
+        lines.append(f"- {doc.get('title', 'Untitled Strategy')}: {doc.get('description', '')}")
+        for step in doc.get("steps", []) or []:
+            lines.append(f"  * {step}")
+    lines += ["", "Narrative:"]
+    return "\n".join(lines)
+
+
+# ----------------------
+# Backends
+# ----------------------
+class StubBackend:
+    """Deterministic backend: same prompt, same tokens. No model download needed."""
+
+    model_id = "stub-v1"
+    temperature = 0.0
+
+    def stream(self, prompt: str, max_tokens: int = 400) -> Iterator[str]:
+        playbooks = [line[2:].split(":", 1)[0] for line in prompt.splitlines() if line.startswith("- ")]
+        request = next((line[len("Request: "):] for line in prompt.splitlines() if line.startswith("Request: ")), "")
+        text = (
+            f"To advance '{request}', prioritise "
+            + (", then ".join(playbooks) if playbooks else "a discovery phase")
+            + ". Sequence the steps above, measure outcomes after each phase, and iterate."
+        )
+        for i, token in enumerate(re.findall(r"\S+\s*", text)):
+            if i >= max_tokens:
+                break
+            yield token
+
+
+class GPT4AllBackend:
+    """
+    Local CPU inference via gpt4all. The model is loaded once per process.
+
+    Args:
+        model_name (str): gpt4all model file name (downloaded on first use).
+        temperature (float): Sampling temperature.
+    """
+
+    _models: Dict[str, object] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, model_name: str, temperature: float = 0.3):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.model_id = f"gpt4all:{model_name}"
+
+    def _model(self):
+        with self._lock:
+            if self.model_name not in self._models:
+                from gpt4all import GPT4All
+                self._models[self.model_name] = GPT4All(self.model_name)
+            return self._models[self.model_name]
+
+    def stream(self, prompt: str, max_tokens: int = 400) -> Iterator[str]:
+        yield from self._model().generate(prompt, max_tokens=max_tokens, temp=self.temperature, streaming=True)
+
+
+def get_backend(name: Optional[str] = None):
+    """Backend by name ('stub' or 'gpt4all'), defaulting to `llm.backend` in model_config.yaml."""
+    llm_config = load_llm_config()
+    name = name or llm_config["backend"]
+    if name == "stub":
+        return StubBackend()
+    if name == "gpt4all":
+        return GPT4AllBackend(llm_config["model"], float(llm_config["temperature"]))
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+# ----------------------
+# Prompt-result cache
+# ----------------------
+def normalize_prompt(prompt: str) -> str:
+    """Case- and whitespace-insensitive form of a prompt, used for cache keys."""
+    return " ".join(prompt.split()).casefold()
+
+
+class NarrativeCache:
+    """
+    On-disk prompt → response cache with LRU eviction by entry count.
+
+    Args:
+        cache_dir (str): Directory holding one file per response.
+        max_entries (int): Entries kept; least recently used are evicted first.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 2_000):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, prompt: str, model_id: str, max_tokens: int, temperature: float) -> str:
+        # Generation settings change the response, so they are part of the key
+        key = hashlib.sha256(
+            f"{model_id}\0{int(max_tokens)}\0{float(temperature)!r}\0{normalize_prompt(prompt)}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def get(self, prompt: str, model_id: str, max_tokens: int, temperature: float) -> Optional[str]:
+        path = self._path(prompt, model_id, max_tokens, temperature)
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    def put(self, prompt: str, model_id: str, max_tokens: int, temperature: float, text: str) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self._path(prompt, model_id, max_tokens, temperature))
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".txt"):
+                try:
+                    entries.append((os.stat(os.path.join(self.cache_dir, name)).st_mtime, name))
+                except FileNotFoundError:
+                    continue
+        for _, name in sorted(entries)[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+_cache: Optional[NarrativeCache] = None
+
+
+def get_cache() -> NarrativeCache:
+    """Process-wide narrative cache configured from model_config.yaml."""
+    global _cache
+    if _cache is None:
+        llm_config = load_llm_config()
+        _cache = NarrativeCache(llm_config["cache_dir"], int(llm_config["cache_max_entries"]))
+    return _cache
+
+
+def stream_narrative(
+    strategy_docs: List[Dict],
+    query: str,
+    backend=None,
+    use_cache: bool = True,
+    max_tokens: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Streams an LLM strategy narrative, token by token.
+
+    Cache hits are replayed from disk; misses are streamed from the backend and
+    stored once complete. Time-to-first-token is recorded in
+    `instrumentation.metrics` under "Narrative TTFT" (cache hits under
+    "Narrative TTFT (cached)").
+
+    Args:
+        strategy_docs (List[Dict]): Retrieved strategy data.
+        query (str): User-entered strategy prompt.
+        backend (optional): Object with `model_id`, `temperature` and
+            `stream(prompt, max_tokens)`.
+        use_cache (bool): Read and write the prompt-result cache.
+        max_tokens (int, optional): Generation limit (default from config).
+
+    Yields:
+        str: Text fragments in order.
+    """
+    backend = backend or get_backend()
+    max_tokens = max_tokens or int(load_llm_config()["max_tokens"])
+    temperature = float(getattr(backend, "temperature", 0.0))
+    prompt = build_prompt(strategy_docs, query)
+    cache = get_cache() if use_cache else None
+    start = time.perf_counter()
+
+    cached = cache.get(prompt, backend.model_id, max_tokens, temperature) if cache else None
+    if cached is not None:
+        metrics.observe("Narrative TTFT (cached)", time.perf_counter() - start)
+        yield from re.findall(r"\S+\s*|\s+", cached)
+        return
+
+    parts = []
+    for token in backend.stream(prompt, max_tokens):
+        if not parts:
+            metrics.observe("Narrative TTFT", time.perf_counter() - start)
+        parts.append(token)
+        yield token
+
+    if cache and parts:
+        cache.put(prompt, backend.model_id, max_tokens, temperature, "".join(parts))
+
+
+def generate_narrative(strategy_docs: List[Dict], query: str, **kwargs) -> str:
+    """Non-streaming convenience wrapper around `stream_narrative`."""
+    return "".join(stream_narrative(strategy_docs, query, **kwargs))
@@ -0,0 +1,162 @@
+"""
+model_registry.py — Lazy, versioned loading of the XGBoost strategy model.
+
+The registry loads the booster on first use, keeps one SHAP explainer and one
+single-row scorer per model version and swaps in a new version when the model
+file changes on disk.
+Callers take a `ModelVersion` snapshot per request; a reload never mutates a
+snapshot that is already in use.
+"""
+
+import hashlib
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+
+def _file_digest(path: str) -> str:
+    """Returns the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SingleRowScorer:
+    """
+    Scores one row with `Booster.inplace_predict`, skipping DMatrix construction.
+
+    Each thread writes its row into its own preallocated float32 buffer, which
+    is the same conversion DMatrix applies (NaN stays missing), so scores match
+    the full path; tests/test_predictor.py checks this bit for bit.
+
+    Args:
+        booster (xgb.Booster): Loaded model.
+        n_features (int): Row width.
+    """
+
+    def __init__(self, booster, n_features: int):
+        self.booster = booster
+        self.n_features = n_features
+        self._local = threading.local()
+
+    def _row_buffer(self) -> np.ndarray:
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = self._local.row = np.empty((1, self.n_features), dtype=np.float32)
+        return row
+
+    def score(self, vector) -> np.float32:
+        row = self._row_buffer()
+        row[0, :] = vector
+        return self.booster.inplace_predict(row, validate_features=False).reshape(-1)[0]
+
+
+class ModelVersion:
+    """
+    Immutable snapshot of one loaded model file.
+
+    Attributes:
+        booster (xgb.Booster): Loaded model.
+        version (str): Short content hash identifying this model.
+        path (str): File the model was loaded from.
+    """
+
+    def __init__(self, booster, version: str, path: str, stat_key: tuple):
+        self.booster = booster
+        self.version = version
+        self.path = path
+        self._stat_key = stat_key
+        self._explainer = None
+        self._explainer_lock = threading.Lock()
+        self._scorer: Optional[SingleRowScorer] = None
+
+    @property
+    def explainer(self):
+        """SHAP TreeExplainer for this version, built once on first access."""
+        if self._explainer is None:
+            with self._explainer_lock:
+                if self._explainer is None:
+                    import shap
+                    self._explainer = shap.TreeExplainer(self.booster)
+        return self._explainer
+
+    def single_row_scorer(self, feature_names: List[str]) -> SingleRowScorer:
+        """Fast single-row scorer for this version (cheap; created on first use)."""
+        if self._scorer is None:
+            # A racing thread at worst builds a second, identical scorer
+            self._scorer = SingleRowScorer(self.booster, len(feature_names))
+        return self._scorer
+
+
+class ModelRegistry:
+    """
+    Loads a model lazily and reloads it atomically when the file changes.
+
+    Args:
+        path (str): Path to the XGBoost model JSON.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._current: Optional[ModelVersion] = None
+        self._lock = threading.Lock()
+
+    def _stat_key(self) -> tuple:
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self) -> ModelVersion:
+        """
+        Returns the current model version, loading or reloading it if needed.
+
+        Only an mtime/size change triggers hashing; only a content change
+        triggers a reload.
+
+        Raises:
+            FileNotFoundError: If the model file does not exist.
+        """
+        current = self._current
+        try:
+            stat_key = self._stat_key()
+        except FileNotFoundError:
+            # File is mid-replacement (or deleted): keep serving what we have
+            if current is not None:
+                return current
+            raise
+        if current is not None and current._stat_key == stat_key:
+            return current
+
+        with self._lock:
+            current = self._current
+            stat_key = self._stat_key()
+            if current is not None and current._stat_key == stat_key:
+                return current
+
+            digest = _file_digest(self.path)
+            version = digest[:12]
+            if current is not None and current.version == version:
+                # Touched but unchanged: keep the warm explainer.
+                current._stat_key = stat_key
+                return current
+
+            import xgboost as xgb
+            booster = xgb.Booster()
+            booster.load_model(self.path)
+            self._current = ModelVersion(booster, version, self.path, stat_key)
+            return self._current
+
+    def reload(self) -> ModelVersion:
+        """Forces the next `get()` to re-check the model file."""
+        with self._lock:
+            if self._current is not None:
+                self._current._stat_key = None
+        return self.get()
+
+    @property
+    def loaded(self) -> Optional[ModelVersion]:
+        """The currently loaded version without touching the file system."""
+        return self._current
@@ -1,67 +1,167 @@
-from typing import Dict, Tuple
-import xgboost as xgb
-import shap
+from typing import Any, Dict, List, Optional, Tuple, Union
 import numpy as np
+import pandas as pd
+
+from modules.explanation_cache import get_explanation_cache
+from modules.instrumentation import metrics
+from modules.model_registry import ModelRegistry
 
 # Model path and feature schema
 MODEL_PATH = "models/strategy_predictor.json"
 FEATURE_KEYS = ["query_length", "keyword_hits", "avg_steps"]
+# Score single rows with inplace_predict instead of building a DMatrix
+SINGLE_ROW_FAST_PATH = True
 
-# Load model safely
-try:
-    model = xgb.Booster()
-    model.load_model(MODEL_PATH)
-except Exception as e:
-    print(f"⚠️ Failed to load model: {e}")
-    model = None  # You can trigger fallback here if needed
+# Loaded lazily on first prediction and reloaded when the file changes
+registry = ModelRegistry(MODEL_PATH)
 
-def predict(features: Dict) -> Tuple[str, str]:
+
+def __getattr__(name: str):
+    # Backwards-compatible `predictor.model`: the current booster, or None
+    if name == "model":
+        try:
+            return registry.get().booster
+        except Exception as e:
+            print(f"⚠️ Failed to load model: {e}")
+            return None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def current_version() -> str:
+    """Version of the model `predict` would use now, or 'unavailable' if it cannot load."""
+    try:
+        return registry.get().version
+    except Exception:
+        return "unavailable"
+
+
+def _label_for(score: float) -> str:
+    """Maps a model score to its threshold-based label."""
+    if score > 0.7:
+        return " High Growth Potential"
+    elif score > 0.4:
+        return " Moderate Strategic Fit"
+    return " Low Strategic Alignment"
+
+
+def _feature_matrix(features_list: Union[List[Dict], pd.DataFrame]) -> np.ndarray:
     """
-    Predicts strategy outcome using XGBoost and explains it with SHAP.
+    Builds a (rows x FEATURE_KEYS) matrix, defaulting missing features to 0.
+    """
+    if isinstance(features_list, pd.DataFrame):
+        frame = features_list.reindex(columns=FEATURE_KEYS).fillna(0)
+        return frame.to_numpy(dtype=float)
+    return np.array(
+        [[features.get(key, 0) for key in FEATURE_KEYS] for features in features_list],
+        dtype=float
+    ).reshape(-1, len(FEATURE_KEYS))
+
+
+def predict_batch(
+    features_list: Union[List[Dict], pd.DataFrame],
+    explain: bool = True,
+    shap_mode: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Scores many feature rows with one DMatrix, one model call and one SHAP pass
+    over the rows missing from the explanation cache.
+
+    A single row skips DMatrix construction and uses the model version's
+    `inplace_predict` scorer, which returns the same scores; if it raises, the
+    row is scored with a DMatrix and counted as a fallback under the metrics
+    label "Single-row Prediction".
 
     Args:
-        features (Dict): Feature dictionary from feature_engineer.py
+        features_list (List[Dict] | pd.DataFrame): Feature dicts from feature_engineer.py,
+            or a DataFrame with one column per feature key.
+        explain (bool): Whether to compute SHAP contributions.
+        shap_mode (str, optional): Explanation cache mode for this call: 'exact',
+            'quantized' or 'off' (default: `shap.cache` in model_config.yaml).
 
     Returns:
-        Tuple[str, str]: (Prediction label, Explanation string)
+        Dict: {
+            "vectors": (n, k) input matrix,
+            "scores": (n,) model scores,
+            "labels": (n,) prediction labels,
+            "contributions": (n, k) SHAP values, or None if unavailable,
+            "shap_error": error message when SHAP failed, else None,
+            "model_version": version of the model that produced the scores
+        }
+
+    Raises:
+        Exception: Any model error, so callers can decide how to fall back.
     """
-    # Defensive feature vector
-    input_vector = [features.get(key, 0) for key in FEATURE_KEYS]
-    dmatrix = xgb.DMatrix(np.array([input_vector]), feature_names=FEATURE_KEYS)
+    # One snapshot per call: a concurrent reload never changes it mid-request.
+    # Raises before any xgboost import when the model file is missing (fallback mode).
+    model_version = registry.get()
 
-    # Predict score
-    try:
-        score = model.predict(dmatrix)[0]
-    except Exception as e:
-        return "⚠️ Prediction Failed", f"Model error: {e}"
+    vectors = _feature_matrix(features_list)
+    scores = None
+    if SINGLE_ROW_FAST_PATH and len(vectors) == 1:
+        try:
+            scores = np.array([model_version.single_row_scorer(FEATURE_KEYS).score(vectors[0])], dtype=np.float32)
+        except Exception:
+            metrics.record_fallback("Single-row Prediction")
+    if scores is None:
+        import xgboost as xgb  # deferred: only the DMatrix path needs it here
+        dmatrix = xgb.DMatrix(vectors, feature_names=FEATURE_KEYS)
+        scores = np.asarray(model_version.booster.predict(dmatrix)).reshape(-1)
+    labels = np.array([_label_for(score) for score in scores], dtype=object)
 
-    # Threshold-based label
-    if score > 0.7:
-        prediction = " High Growth Potential"
-    elif score > 0.4:
-        prediction = " Moderate Strategic Fit"
-    else:
-        prediction = " Low Strategic Alignment"
+    contributions, shap_error = None, None
+    if explain and len(vectors):
+        try:
+            contributions = get_explanation_cache(FEATURE_KEYS).contributions(model_version, vectors, shap_mode)
+        except Exception as e:
+            shap_error = str(e)
 
-    # SHAP explanation
-    try:
-        explainer = shap.TreeExplainer(model)
-        shap_values = explainer.shap_values(np.array([input_vector]))[0]
+    return {
+        "vectors": vectors,
+        "scores": scores,
+        "labels": labels,
+        "contributions": contributions,
+        "shap_error": shap_error,
+        "model_version": model_version.version
+    }
 
-        explanation_lines = [
-            f"Prediction: **{prediction}** (Score: {score:.2f})",
-            "",
-            "🔍 Feature Contributions:"
-        ]
-        for key, value, shap_val in zip(FEATURE_KEYS, input_vector, shap_values):
-            explanation_lines.append(f" • {key}: {value} → SHAP impact: {shap_val:+.2f}")
 
-        explanation = "\n".join(explanation_lines)
+def explain_row(batch: Dict[str, Any], index: int) -> str:
+    """
+    Renders the explanation string for one row of a `predict_batch` result.
+    """
+    prediction = batch["labels"][index]
+    score = batch["scores"][index]
 
-    except Exception as e:
-        explanation = (
+    if batch["contributions"] is None:
+        return (
             f"Prediction: **{prediction}** (Score: {score:.2f})\n\n"
-            f"⚠️ SHAP explanation unavailable due to error: {e}"
+            f"⚠️ SHAP explanation unavailable due to error: {batch['shap_error']}"
         )
 
-    return prediction, explanation
\ No newline at end of file
+    explanation_lines = [
+        f"Prediction: **{prediction}** (Score: {score:.2f})",
+        "",
+        "🔍 Feature Contributions:"
+    ]
+    for key, value, shap_val in zip(FEATURE_KEYS, batch["vectors"][index], batch["contributions"][index]):
+        explanation_lines.append(f" • {key}: {value:g} → SHAP impact: {shap_val:+.2f}")
+
+    return "\n".join(explanation_lines)
+
+
+def predict(features: Dict) -> Tuple[str, str]:
+    """
+    Predicts strategy outcome using XGBoost and explains it with SHAP.
+
+    Args:
+        features (Dict): Feature dictionary from feature_engineer.py
+
+    Returns:
+        Tuple[str, str]: (Prediction label, Explanation string)
+    """
+    try:
+        batch = predict_batch([features])
+    except Exception as e:
+        return "⚠️ Prediction Failed", f"Model error: {e}"
+
+    return batch["labels"][0], explain_row(batch, 0)
@@ -1,35 +1,178 @@
-import importlib
-from typing import List, Dict
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import List, Dict, Optional, Tuple, Union
 
-def get_relevant_docs(domain: str, strategy: str = "") -> List[Dict]:
+from modules.corpus import StrategyCorpus, StrategyRecord, load_corpus, tokenize
+
+
+class StrategyIndex:
+    """
+    In-memory BM25 inverted index over strategy documents.
+
+    Postings map each token to (doc_id, term_frequency) pairs, so a query only
+    touches the postings of its own tokens. Documents are `StrategyRecord`s whose
+    tokens were computed when the corpus was loaded.
+
+    Args:
+        corpus (StrategyCorpus | Dict[str, List[Dict]]): Strategy corpus, or
+            plain strategy dicts keyed by lowercase domain.
+        k1 (float): BM25 term-frequency saturation.
+        b (float): BM25 length normalization.
+    """
+
+    def __init__(self, corpus: Union[StrategyCorpus, Dict[str, List[Dict]]], k1: float = 1.5, b: float = 0.75):
+        if not isinstance(corpus, StrategyCorpus):
+            corpus = StrategyCorpus.from_corpora(corpus)
+        self.k1 = k1
+        self.b = b
+        self.corpus = corpus
+        self.docs: List[StrategyRecord] = corpus.records
+        self.doc_domains: List[str] = [record.domain for record in corpus.records]
+        self.doc_lengths: List[int] = [len(record.tokens) for record in corpus.records]
+        self.domain_docs: Dict[str, List[StrategyRecord]] = corpus.by_domain
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+        for doc_id, record in enumerate(corpus.records):
+            for token, tf in Counter(record.tokens).items():
+                self.postings[token].append((doc_id, tf))
+
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+    def _idf(self, token: str) -> float:
+        n_docs = len(self.docs)
+        df = len(self.postings.get(token, ()))
+        return math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def max_score(self, query: str) -> float:
+        """Upper bound of any document's BM25 score for `query` (sum of idf * (k1 + 1))."""
+        return sum(self._idf(token) for token in set(tokenize(query))) * (self.k1 + 1)
+
+    def search(self, query: str, domain: Optional[str] = None, top_k: int = 5) -> List[Tuple[StrategyRecord, float]]:
+        """
+        Ranks documents against a query with BM25.
+
+        Args:
+            query (str): Free-text search query.
+            domain (str, optional): Restrict results to this domain.
+            top_k (int): Maximum number of results.
+
+        Returns:
+            List[Tuple[StrategyRecord, float]]: (strategy, score) pairs, best first.
+        """
+        domain_key = domain.lower() if domain else None
+        scores: Dict[int, float] = defaultdict(float)
+
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = self._idf(token)
+            for doc_id, tf in postings:
+                if domain_key and self.doc_domains[doc_id] != domain_key:
+                    continue
+                norm = 1 - self.b + self.b * (self.doc_lengths[doc_id] / self.avg_length if self.avg_length else 0)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(self.docs[doc_id], score) for doc_id, score in best]
+
+
+_INDEX: Optional[StrategyIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> StrategyIndex:
+    """Returns the process-wide strategy index, building it on first use."""
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = StrategyIndex(load_corpus())
+    return _INDEX
+
+
+def search(
+    query: str,
+    domain: Optional[str] = None,
+    top_k: int = 5,
+    include_uploads: bool = False
+) -> List[Tuple[StrategyRecord, float]]:
+    """
+    Ranked top-k strategy search across all domains (or one domain).
+
+    Args:
+        query (str): Free-text search query.
+        domain (str, optional): Domain filter (e.g., 'FinTech').
+        top_k (int): Maximum number of results.
+        include_uploads (bool): Also search previously uploaded documents
+            (`doc_store`), merged with the built-in strategies by normalized score.
+
+    Returns:
+        List[Tuple[StrategyRecord, float]]: (strategy, BM25 score) pairs, best first.
+            With `include_uploads`, each source's scores are divided by that
+            source's `max_score(query)` (its own idf statistics), so both are on
+            a 0-1 scale before merging.
+    """
+    index = get_index()
+    results = index.search(query, domain=domain, top_k=top_k)
+    if include_uploads:
+        from modules.doc_store import get_store  # deferred: numpy-backed, optional
+        store = get_store()
+        results = heapq.nlargest(
+            top_k,
+            _normalized(results, index.max_score(query))
+            + _normalized(store.search(query, domain=domain, top_k=top_k), store.max_score(query)),
+            key=lambda item: item[1]
+        )
+    return results
+
+
+def _normalized(results: List[Tuple], max_score: float) -> List[Tuple]:
+    """(doc, score / max_score) pairs; BM25 scores of different indexes are not comparable as is."""
+    if not max_score:
+        return results
+    return [(doc, score / max_score) for doc, score in results]
+
+
+def get_relevant_docs(
+    domain: str,
+    strategy: str = "",
+    top_k: Optional[int] = None,
+    include_uploads: bool = False
+) -> List[Union[StrategyRecord, Dict]]:
     """
     Retrieves structured strategy data for the given domain.
 
+    Changed in the compact-corpus release: matches are the index's shared
+    `StrategyRecord` objects rather than fresh dicts. Records support read-only
+    dict access (`get`, `[]`, `keys`) for title/description/steps, but cannot be
+    mutated or passed to `json.dumps`; call `record.to_dict()` for a plain dict.
+
     Args:
         domain (str): Domain name (e.g., 'EdTech', 'FinTech', 'SaaS').
-        strategy (str): Optional search term to filter strategies.
+        strategy (str): Optional search term to rank strategies by.
+        top_k (int, optional): Maximum number of ranked matches (default: all matches).
+        include_uploads (bool): Also rank previously uploaded documents.
 
     Returns:
-        List[Dict]: Matching strategies as a list of dicts.
+        List[StrategyRecord | Dict]: Matching strategies, best match first, as
+            `StrategyRecord`s. Falls back to the full domain list when nothing
+            matches, and to a single placeholder dict for unknown domains.
     """
-    try:
-        module_name = f"assets.strategy_docs.{domain.lower()}_strategies"
-        strategies = importlib.import_module(module_name).STRATEGIES
-
-        # Filter if a search term is provided
-        if strategy:
-            filtered = [
-                s for s in strategies
-                if strategy.lower() in s["title"].lower()
-                or strategy.lower() in s["description"].lower()
-            ]
-            return filtered if filtered else strategies
-
-        return strategies
-
-    except ModuleNotFoundError:
+    index = get_index()
+    strategies = index.domain_docs.get(domain.lower())
+    if strategies is None:
         return [{
             "title": "N/A",
             "description": f"No strategies found for {domain}",
             "steps": []
-        }]
\ No newline at end of file
+        }]
+
+    if strategy:
+        ranked = search(strategy, domain=domain, top_k=top_k or len(strategies), include_uploads=include_uploads)
+        if ranked:
+            return [doc for doc, _ in ranked]
+
+    return strategies
@@ -0,0 +1,394 @@
+"""
+service.py — Lightweight asyncio HTTP service for the strategy pipeline.
+
+Concurrent prediction requests are coalesced into micro-batches: the first
+request opens a short window (`max_wait_ms`) and everything that arrives
+before it closes, up to `max_batch_size`, is scored with one XGBoost/SHAP call.
+Retrieval, feature engineering and narrative generation run on a separate
+thread pool (`pipeline_workers`), so the event loop only does I/O and batching.
+
+Endpoints:
+    POST /predict   {"features": {...}} or {"domain": ..., "query": ...}
+                    (non-numeric model features are rejected with 400)
+    POST /analyze   {"domain": ..., "query": ..., "use_fallback": false}
+    GET  /metrics   batch-size histogram, request counters and stage metrics
+                    (JSON; `?format=prometheus` for stage metrics as Prometheus text)
+    GET  /health
+
+Usage:
+    python -m modules.service --port 8080
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+
+import modules.feature_engineer as feature_engineer
+import modules.predictor as predictor
+import modules.retriever as retriever
+import modules.strategy_graph as strategy_graph
+from modules.config_loader import load_yaml_config
+from modules.fallback import fallback_predict
+from modules.fallback_rules import get_rules
+from modules.instrumentation import metrics
+
+DEFAULT_SERVICE_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8080,
+    "max_batch_size": 64,
+    "max_wait_ms": 5,
+    "pipeline_workers": 8,
+}
+MAX_BODY_BYTES = 1 << 20
+
+logger = logging.getLogger(__name__)
+
+
+def load_service_config() -> Dict[str, Any]:
+    """Loads the `service` section of app_config.yaml merged over the defaults."""
+    try:
+        service_config = (load_yaml_config("app_config.yaml") or {}).get("service", {}) or {}
+    except FileNotFoundError:
+        service_config = {}
+    return {**DEFAULT_SERVICE_CONFIG, **service_config}
+
+
+class BadRequest(Exception):
+    """Client error in a request payload; answered with 400."""
+
+
+def _numeric_features(features: Dict) -> Dict:
+    """
+    Copy of `features` with the model and fallback inputs coerced to numbers.
+
+    Raises:
+        BadRequest: If one of those inputs is not numeric.
+    """
+    coerced = dict(features)
+    for key in dict.fromkeys(predictor.FEATURE_KEYS + get_rules().keys):
+        value = coerced.get(key)
+        if key not in coerced or (isinstance(value, (int, float)) and not isinstance(value, bool)):
+            continue
+        try:
+            coerced[key] = float(value)
+        except (TypeError, ValueError):
+            raise BadRequest(f"Feature '{key}' must be a number, got {value!r}.") from None
+    return coerced
+
+
+# ----------------------
+# Micro-batching
+# ----------------------
+class MicroBatcher:
+    """
+    Coalesces concurrent `submit()` calls into `predictor.predict_batch` calls.
+
+    Args:
+        max_batch_size (int): Upper bound on rows per model call.
+        max_wait_ms (float): How long the first request in a batch waits for company.
+    """
+
+    def __init__(self, max_batch_size: int = 64, max_wait_ms: float = 5):
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.batch_sizes: Counter = Counter()
+        self.rows = 0
+        self.fallback_rows = 0
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._has_pending: Optional[asyncio.Event] = None
+        self._is_full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._has_pending = asyncio.Event()
+        self._is_full = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, features: Dict) -> Tuple[str, str, bool]:
+        """Queues one feature dict; resolves to (label, explanation, used_fallback)."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((features, future))
+        self._has_pending.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._is_full.set()
+        return await future
+
+    async def _collect(self) -> List[Tuple[Dict, asyncio.Future]]:
+        await self._has_pending.wait()
+        if len(self._pending) < self.max_batch_size and self.max_wait:
+            try:
+                await asyncio.wait_for(self._is_full.wait(), self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+
+        batch = self._pending[:self.max_batch_size]
+        del self._pending[:self.max_batch_size]
+        if not self._pending:
+            self._has_pending.clear()
+        if len(self._pending) < self.max_batch_size:
+            self._is_full.clear()
+        return batch
+
+    async def _score(self, features_list: List[Dict]) -> List[Tuple[str, str, bool]]:
+        start = time.perf_counter()
+        try:
+            # Model + SHAP run off the event loop so new requests keep queueing
+            result = await asyncio.get_running_loop().run_in_executor(None, predictor.predict_batch, features_list)
+            outcomes = [
+                (result["labels"][i], predictor.explain_row(result, i), False)
+                for i in range(len(features_list))
+            ]
+            metrics.observe("Micro-batch Prediction", time.perf_counter() - start)
+        except Exception:
+            metrics.observe("Micro-batch Prediction", time.perf_counter() - start, error=True, fallback=True)
+            self.fallback_rows += len(features_list)
+            # One vectorized pass over the whole batch
+            fallback = get_rules().predict(features_list)
+            outcomes = [(*fallback.row(i), True) for i in range(len(features_list))]
+        return outcomes
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            self.batch_sizes[len(batch)] += 1
+            self.rows += len(batch)
+            try:
+                outcomes = await self._score([features for features, _ in batch])
+            except Exception as e:
+                # Fail this batch's requests, never the loop: later requests must still be served
+                logger.exception("Micro-batch of %s rows failed", len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), outcome in zip(batch, outcomes):
+                if not future.done():
+                    future.set_result(outcome)
+
+    def histogram(self) -> Dict[str, int]:
+        """Batch counts bucketed by size (1, 2, 3-4, 5-8, ...)."""
+        buckets: Counter = Counter()
+        for size, count in self.batch_sizes.items():
+            upper = 1
+            while upper < size:
+                upper *= 2
+            lower = upper // 2 + 1 if upper > 1 else 1
+            buckets[(lower, upper)] += count
+        return {
+            (str(lower) if lower == upper else f"{lower}-{upper}"): count
+            for (lower, upper), count in sorted(buckets.items())
+        }
+
+
+# ----------------------
+# Pipeline handlers
+# ----------------------
+def _retrieve_features(domain: str, query: str) -> Tuple[List[Dict], Dict]:
+    """Retrieved strategies and their feature dict (blocking; runs on the pipeline pool)."""
+    docs = retriever.get_relevant_docs(domain, query)
+    return docs, feature_engineer.transform(query, domain, docs)
+
+
+class StrategyService:
+    """
+    Request handlers plus the shared micro-batcher and counters.
+
+    Args:
+        batcher (MicroBatcher): Started micro-batcher for model calls.
+        pipeline_workers (int): Threads for retrieval, features and narratives.
+    """
+
+    def __init__(self, batcher: MicroBatcher, pipeline_workers: int = 8):
+        self.batcher = batcher
+        self.requests: Counter = Counter()
+        self.started = time.time()
+        # Separate from the default executor that runs model batches, so slow
+        # narratives never delay a batch
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(pipeline_workers)),
+                                           thread_name_prefix="service-pipeline")
+
+    async def _offload(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def predict(self, payload: Dict) -> Dict:
+        features = payload.get("features")
+        if isinstance(features, dict):
+            # Validated here so one bad row cannot fail or degrade a shared batch
+            features = _numeric_features(features)
+        else:
+            domain, query = str(payload.get("domain", "")), str(payload.get("query", "") or "")
+            _, features = await self._offload(_retrieve_features, domain, query)
+        label, explanation, used_fallback = await self.batcher.submit(features)
+        return {"prediction": str(label), "explanation": explanation, "fallback": used_fallback}
+
+    async def analyze(self, payload: Dict) -> Dict:
+        domain, query = str(payload.get("domain", "")), str(payload.get("query", "") or "")
+        docs, features = await self._offload(_retrieve_features, domain, query)
+        if payload.get("use_fallback"):
+            (label, explanation), used_fallback = fallback_predict(features), True
+        else:
+            label, explanation, used_fallback = await self.batcher.submit(features)
+        strategy = await self._offload(strategy_graph.run_strategy_pipeline, domain, query, docs, str(label))
+        return {
+            "domain": domain,
+            "query": query,
+            "prediction": str(label),
+            "explanation": explanation,
+            "fallback": used_fallback,
+            "strategy": strategy,
+            "documents": [doc.get("title", "") for doc in docs]
+        }
+
+    def metrics(self) -> Dict:
+        batches = sum(self.batcher.batch_sizes.values())
+        return {
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "requests": dict(self.requests),
+            "batches": batches,
+            "rows": self.batcher.rows,
+            "fallback_rows": self.batcher.fallback_rows,
+            "mean_batch_size": round(self.batcher.rows / batches, 2) if batches else 0,
+            "batch_size_histogram": self.batcher.histogram(),
+            "config": {
+                "max_batch_size": self.batcher.max_batch_size,
+                "max_wait_ms": self.batcher.max_wait * 1000
+            },
+            "stages": metrics.snapshot()
+        }
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        """Routes a request; returns (status, JSON-able dict or plain-text str)."""
+        route, _, query = path.partition("?")
+        self.requests[route] += 1
+        if method == "GET" and route == "/health":
+            return HTTPStatus.OK, {"status": "ok"}
+        if method == "GET" and route == "/metrics":
+            if "format=prometheus" in query:
+                return HTTPStatus.OK, metrics.to_prometheus()
+            return HTTPStatus.OK, self.metrics()
+        if method == "POST" and route in ("/predict", "/analyze"):
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, {"error": "Request body must be JSON."}
+            if not isinstance(payload, dict):
+                return HTTPStatus.BAD_REQUEST, {"error": "Request body must be a JSON object."}
+            handler = self.predict if route == "/predict" else self.analyze
+            try:
+                return HTTPStatus.OK, await handler(payload)
+            except BadRequest as e:
+                return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        return HTTPStatus.NOT_FOUND, {"error": f"No route for {method} {route}"}
+
+    # --- Minimal HTTP/1.1 with keep-alive ---
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0) or 0)
+                if length > MAX_BODY_BYTES:
+                    status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Body too large."}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, payload = await self.dispatch(method.upper(), path, body)
+                    except Exception as e:
+                        status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+                if isinstance(payload, str):
+                    data, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+                else:
+                    data = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+                    content_type = "application/json; charset=utf-8"
+                writer.write(
+                    f"HTTP/1.1 {int(status)} {HTTPStatus(status).phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host: str, port: int, max_batch_size: int, max_wait_ms: float, pipeline_workers: int = 8) -> None:
+    """Runs the service until cancelled."""
+    # Warm the corpora and model before accepting traffic
+    retriever.get_index()
+    try:
+        predictor.registry.get()
+    except Exception as e:
+        logger.warning("Failed to load model, /predict will use fallback: %s", e)
+
+    batcher = MicroBatcher(max_batch_size, max_wait_ms)
+    batcher.start()
+    service = StrategyService(batcher, pipeline_workers)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    logger.info("StratoMind service listening on http://%s:%s (max_batch_size=%s, max_wait_ms=%s)",
+                host, port, batcher.max_batch_size, max_wait_ms)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+        service.close()
+
+
+def main(argv=None) -> None:
+    service_config = load_service_config()
+    parser = argparse.ArgumentParser(description="Serve the StratoMind pipeline over HTTP.")
+    parser.add_argument("--host", default=service_config["host"])
+    parser.add_argument("--port", type=int, default=service_config["port"])
+    parser.add_argument("--max-batch-size", type=int, default=service_config["max_batch_size"])
+    parser.add_argument("--max-wait-ms", type=float, default=service_config["max_wait_ms"])
+    parser.add_argument("--pipeline-workers", type=int, default=service_config["pipeline_workers"])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms, args.pipeline_workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
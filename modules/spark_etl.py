@@ -1,23 +1,136 @@
 """
 spark_etl.py — Data ingestion and transformation with Spark or Pandas.
 
-Switch `USE_SPARK=True` when deploying in a Spark-enabled environment.
+Switch `USE_SPARK=True` when deploying in a Spark-enabled environment. The
+Spark path runs the same cleaning and content features as the pandas path
+(through Arrow-backed `mapInPandas`), on `local[*]` by default or on the
+master configured in spark_config.yaml.
 """
 
+import atexit
+import importlib
 import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
 import pandas as pd
 
+from modules.config_loader import load_yaml_config
+from modules.dedup import OCCURRENCES_COLUMN
+
 # Toggle for real Spark usage
 USE_SPARK = False
 
-try:
-    if USE_SPARK:
-        from pyspark.sql import SparkSession
-except ImportError:
-    pass
+# Bump whenever transformation output changes (invalidates cached ETL results)
+ETL_VERSION = "4"
+
+# Column sets treated as extracted document text (see `modules.dedup` for occurrence counts)
+CONTENT_COLUMN_SETS = ({"content"}, {"content", OCCURRENCES_COLUMN})
+
+DEFAULT_SPARK_CONFIG = {
+    "master": "local[*]",
+    "app_name": "StratoMind ETL",
+    "shuffle_partitions": 8,
+}
+
+_spark_session = None
+_spark_local_dir: Optional[str] = None
+_spark_lock = threading.Lock()
+
+# Defaults used when config/spark_config.yaml is missing a key
+DEFAULT_ETL_CONFIG = {
+    "clean_nulls": True,
+    "normalize_text": True,
+    "max_lines": None,
+    "chunk_size": 50_000,
+    "compact_dtypes": False,
+    # Text columns with at most this share of distinct values become `category`
+    "category_max_ratio": 0.5,
+}
+
+
+def load_etl_config() -> Dict[str, Any]:
+    """
+    Loads the `etl` section of spark_config.yaml merged over the defaults.
+    """
+    try:
+        etl_config = (load_yaml_config("spark_config.yaml") or {}).get("etl", {}) or {}
+    except FileNotFoundError:
+        etl_config = {}
+    return {**DEFAULT_ETL_CONFIG, **etl_config}
+
+
+def _row_limit(max_lines) -> Optional[int]:
+    """`max_lines` config value as a row limit (None or 0 = no limit)."""
+    return int(max_lines) if max_lines else None
 
 
-def run_etl(input_source):
+def load_spark_config() -> Dict[str, Any]:
+    """
+    Loads the `spark` section of spark_config.yaml merged over the defaults.
+    """
+    try:
+        spark_config = (load_yaml_config("spark_config.yaml") or {}).get("spark", {}) or {}
+    except FileNotFoundError:
+        spark_config = {}
+    return {**DEFAULT_SPARK_CONFIG, **spark_config}
+
+
+def get_spark_session():
+    """
+    Returns the process-wide SparkSession, creating it on first use.
+
+    Arrow is enabled for pandas conversions and UDFs, and shuffle/spill files
+    go to a private temp directory instead of a shared default. That directory
+    lives as long as the session (one per process, shared by every job; Spark
+    cleans up a job's shuffle files itself once its DataFrames are released) and
+    is removed by `stop_spark_session`, which also runs at interpreter exit.
+    """
+    global _spark_session, _spark_local_dir
+    if _spark_session is None:
+        with _spark_lock:
+            if _spark_session is None:
+                from pyspark.sql import SparkSession
+
+                spark_config = load_spark_config()
+                local_dir = tempfile.mkdtemp(prefix="stratomind-spark-")
+                _spark_local_dir = local_dir
+                _spark_session = (
+                    SparkSession.builder
+                    .appName(spark_config["app_name"])
+                    .master(spark_config["master"])
+                    .config("spark.sql.shuffle.partitions", str(spark_config["shuffle_partitions"]))
+                    .config("spark.sql.execution.arrow.pyspark.enabled", "true")
+                    .config("spark.local.dir", local_dir)
+                    .getOrCreate()
+                )
+                atexit.register(stop_spark_session)
+    return _spark_session
+
+
+def stop_spark_session() -> None:
+    """Stops the process-wide SparkSession and removes its local directory."""
+    global _spark_session, _spark_local_dir
+    with _spark_lock:
+        if _spark_session is not None:
+            _spark_session.stop()
+            _spark_session = None
+        if _spark_local_dir:
+            shutil.rmtree(_spark_local_dir, ignore_errors=True)
+            _spark_local_dir = None
+
+
+def _stage_upload(file_obj, job_dir: str) -> str:
+    """Copies a file-like upload into `job_dir` and returns its path."""
+    path = os.path.join(job_dir, "upload.csv")
+    with open(path, "wb") as tmp_f:
+        shutil.copyfileobj(file_obj, tmp_f)
+    return path
+
+
+def run_etl(input_source, max_lines: Optional[int] = None):
     """
     Runs ETL pipeline on the provided dataset.
 
@@ -26,94 +139,354 @@ def run_etl(input_source):
             - Path to the input CSV
             - File-like object (e.g., from Streamlit uploader)
             - Pandas DataFrame (skips loading step)
+        max_lines (int, optional): Keep at most this many input rows. Unlike
+            `iter_etl`, the config's `max_lines` is not applied: a full run
+            processes every row.
 
     Returns:
         pd.DataFrame or pyspark.sql.DataFrame: Transformed data.
+
+    Both engines apply `clean_nulls` from the `etl` section of spark_config.yaml,
+    like `iter_etl`.
     """
+    etl_config = load_etl_config()
+    max_lines = _row_limit(max_lines)
+
     if USE_SPARK:
-        spark = (
-            SparkSession.builder
-            .appName("StratoMind ETL")
-            .config("spark.sql.shuffle.partitions", "8")
-            .getOrCreate()
-        )
+        spark = get_spark_session()
 
-        if isinstance(input_source, str):
+        if isinstance(input_source, pd.DataFrame):
+            df = spark.createDataFrame(input_source)
+        elif isinstance(input_source, str):
             df = spark.read.csv(input_source, header=True, inferSchema=True)
         elif hasattr(input_source, "read"):  # file-like object
-            tmp_path = "_temp_upload.csv"
-            with open(tmp_path, "wb") as tmp_f:
-                tmp_f.write(input_source.read())
-            df = spark.read.csv(tmp_path, header=True, inferSchema=True)
-            os.remove(tmp_path)
+            with tempfile.TemporaryDirectory(prefix="stratomind-etl-job-") as job_dir:
+                df = spark.read.csv(_stage_upload(input_source, job_dir), header=True, inferSchema=True)
+                if max_lines:
+                    df = df.limit(max_lines)
+                # Spark reads lazily: materialize the rows before the staged copy is deleted
+                df = df.localCheckpoint(eager=True)
         else:
             raise ValueError("Unsupported input type for Spark ETL.")
 
-        return _transform_spark(df)
+        if max_lines:
+            df = df.limit(max_lines)
+        return _transform_spark(df, clean_nulls=etl_config["clean_nulls"])
 
     else:
         # Pandas fallback
-        if isinstance(input_source, pd.DataFrame):
-            df = input_source
-        elif isinstance(input_source, str):
-            if not os.path.exists(input_source):
-                raise FileNotFoundError(f"No file found at {input_source}")
-            df = pd.read_csv(input_source)
-        elif hasattr(input_source, "read"):  # file-like object
-            df = pd.read_csv(input_source)
-        else:
-            raise ValueError("Unsupported input type for Pandas ETL.")
+        return _transform_pandas(
+            _load_pandas(input_source, max_lines),
+            clean_nulls=etl_config["clean_nulls"],
+            compact=etl_config["compact_dtypes"],
+            category_max_ratio=float(etl_config["category_max_ratio"])
+        )
+
+
+def _load_pandas(input_source, max_lines: Optional[int] = None) -> pd.DataFrame:
+    """Loads a `run_etl` input (path, file-like or DataFrame) with pandas, keeping at most `max_lines` rows."""
+    if isinstance(input_source, pd.DataFrame):
+        return input_source.iloc[:max_lines] if max_lines else input_source
+    elif isinstance(input_source, str):
+        if not os.path.exists(input_source):
+            raise FileNotFoundError(f"No file found at {input_source}")
+        return pd.read_csv(input_source, nrows=max_lines)
+    elif hasattr(input_source, "read"):  # file-like object
+        return pd.read_csv(input_source, nrows=max_lines)
+    else:
+        raise ValueError("Unsupported input type for Pandas ETL.")
+
+
+# ----------------------
+# Streaming (chunked) ETL
+# ----------------------
+def _read_chunks(input_source, chunk_size: int, max_lines: Optional[int]) -> Iterator[pd.DataFrame]:
+    """Yields raw DataFrame chunks of at most `chunk_size` rows."""
+    if isinstance(input_source, pd.DataFrame):
+        stop = len(input_source) if max_lines is None else min(max_lines, len(input_source))
+        for start in range(0, stop, chunk_size):
+            yield input_source.iloc[start:min(start + chunk_size, stop)]
+        return
+
+    if isinstance(input_source, str):
+        if not os.path.exists(input_source):
+            raise FileNotFoundError(f"No file found at {input_source}")
+    elif not hasattr(input_source, "read"):  # file-like object
+        raise ValueError("Unsupported input type for streaming ETL.")
+
+    with pd.read_csv(input_source, chunksize=chunk_size, nrows=max_lines) as reader:
+        yield from reader
+
+
+def iter_etl(
+    input_source,
+    chunk_size: Optional[int] = None,
+    max_lines: Optional[int] = None,
+    clean_nulls: Optional[bool] = None,
+    compact: Optional[bool] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams the pandas ETL chunk by chunk, so peak memory follows the chunk size.
+
+    Unset arguments come from the `etl` section of config/spark_config.yaml.
+
+    Args:
+        input_source (str | file-like | pd.DataFrame): Same inputs as `run_etl`.
+        chunk_size (int, optional): Rows read and transformed per chunk.
+        max_lines (int, optional): Stop after this many input rows (0 = no limit).
+        clean_nulls (bool, optional): Drop rows that are entirely empty.
+        compact (bool, optional): Compact each chunk's dtypes. Decisions are made
+            per chunk, so two chunks may differ (e.g. category vs string).
+
+    Yields:
+        pd.DataFrame: Transformed chunks, in input order.
+    """
+    etl_config = load_etl_config()
+    chunk_size = chunk_size or etl_config["chunk_size"]
+    max_lines = _row_limit(max_lines if max_lines is not None else etl_config["max_lines"])
+    clean_nulls = clean_nulls if clean_nulls is not None else etl_config["clean_nulls"]
+    compact = compact if compact is not None else etl_config["compact_dtypes"]
+
+    for chunk in _read_chunks(input_source, int(chunk_size), max_lines):
+        yield _transform_pandas(
+            chunk,
+            clean_nulls=clean_nulls,
+            compact=compact,
+            category_max_ratio=float(etl_config["category_max_ratio"])
+        )
+
+
+def run_etl_streaming(
+    input_source,
+    reducer: Optional[Callable[[Any, pd.DataFrame], Any]] = None,
+    initial: Any = None,
+    **kwargs
+) -> Any:
+    """
+    Folds the streamed ETL chunks with `reducer`, e.g. to aggregate without
+    ever holding the full transformed frame.
+
+    Args:
+        input_source (str | file-like | pd.DataFrame): Same inputs as `run_etl`.
+        reducer (Callable, optional): `reducer(accumulator, chunk) -> accumulator`.
+            Defaults to concatenating all chunks into one DataFrame.
+        initial (Any): Starting accumulator for `reducer`.
+        **kwargs: Passed to `iter_etl` (chunk_size, max_lines, clean_nulls, compact).
+
+    Returns:
+        Any: Final accumulator (a DataFrame when no reducer is given).
+    """
+    if reducer is None:
+        # Compact once after the concat so every column gets a single dtype
+        compact = kwargs.pop("compact", None)
+        etl_config = load_etl_config()
+        compact = compact if compact is not None else etl_config["compact_dtypes"]
+        frames = list(iter_etl(input_source, compact=False, **kwargs))
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if compact and frames:
+            df, report = compact_dtypes(df, float(etl_config["category_max_ratio"]))
+            df.attrs["memory_report"] = report
+        return df
 
-        return _transform_pandas(df)
+    chunks = iter_etl(input_source, **kwargs)
+
+    accumulator = initial
+    for chunk in chunks:
+        accumulator = reducer(accumulator, chunk)
+    return accumulator
 
 
 # ----------------------
 # Spark Transformation
 # ----------------------
-def _transform_spark(df):
-    """Example Spark transformations."""
-    return (
-        df.dropna()
-          .withColumnRenamed("old_column", "new_column")
-    )
+TEXT_FEATURE_SPARK_SCHEMA = (
+    "content string, title string, description string, char_count long, "
+    "word_count long, keywords string, sentiment_polarity double"
+)
+
+
+def _text_features_partition(batches):
+    """mapInPandas body: derives the content-only columns for each Arrow batch."""
+    from modules.text_features import TEXT_FEATURE_COLUMNS, extract_text_features
+
+    for pdf in batches:
+        # Null content (cast from an empty cell) hashes and splits as ""
+        pdf["content"] = pdf["content"].fillna("")
+        # Spark already parallelizes across partitions; no nested process pool
+        features = extract_text_features(pdf["content"], workers=1)
+        for col in TEXT_FEATURE_COLUMNS:
+            pdf[col] = features[col]
+        yield pdf
+
+
+def _transform_spark(df, clean_nulls: bool = True):
+    """
+    Spark transformations, mirroring `_transform_pandas`:
+    - Clean column names
+    - Drop fully empty rows (when `clean_nulls`)
+    - If only a `content` (+ dedup occurrence count) column exists, derive title/description, counts,
+      keywords and sentiment with an Arrow-backed pandas UDF
+    - Otherwise render nulls in string columns as "nan", like `astype(str)`
+    """
+    from pyspark.sql import functions as F
+
+    # Clean column names
+    df = df.toDF(*[c.strip().lower().replace(" ", "_") for c in df.columns])
+
+    # Drop full-empty rows (but keep 0s)
+    if clean_nulls:
+        df = df.dropna(how="all")
+
+    if set(df.columns) in CONTENT_COLUMN_SETS:
+        df = df.withColumn("content", F.col("content").cast("string"))
+        schema = TEXT_FEATURE_SPARK_SCHEMA
+        if OCCURRENCES_COLUMN in df.columns:
+            df = df.select("content", F.col(OCCURRENCES_COLUMN).cast("long"))
+            schema = schema.replace("content string, ", f"content string, {OCCURRENCES_COLUMN} long, ", 1)
+        return df.mapInPandas(_text_features_partition, schema=schema)
+
+    for col, dtype in df.dtypes:
+        if dtype == "string":
+            df = df.withColumn(col, F.coalesce(F.col(col), F.lit("nan")))
+    return df
+
+
+# ----------------------
+# Compact dtypes
+# ----------------------
+def _string_dtype():
+    """Arrow-backed strings when pyarrow is installed, pandas' own strings otherwise."""
+    try:
+        importlib.import_module("pyarrow")
+        return pd.StringDtype("pyarrow")
+    except ImportError:
+        return pd.StringDtype()
+
+
+def _compact_numeric(series: pd.Series) -> pd.Series:
+    """Smallest integer type that holds the values; float32 only when lossless."""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    if pd.api.types.is_float_dtype(series):
+        downcast = series.astype("float32")
+        if downcast.astype(series.dtype).equals(series):
+            return downcast
+    return series
+
+
+def compact_dtypes(df: pd.DataFrame, category_max_ratio: float = 0.5) -> Tuple[pd.DataFrame, List[Dict]]:
+    """
+    Shrinks a frame's resident size without changing its values:
+    - text columns become `category` when at most `category_max_ratio` of the
+      values are distinct, Arrow-backed strings otherwise
+    - integers are downcast, floats become float32 when that is lossless
+    - missing values stay real nulls (no "nan" strings)
+
+    Args:
+        df (pd.DataFrame): Frame to compact (not modified).
+        category_max_ratio (float): Distinct-value share up to which text is categorical.
+
+    Returns:
+        Tuple[pd.DataFrame, List[Dict]]: (Compacted frame, per-column report with
+            `column`, `dtype_before`, `dtype_after`, `bytes_before`, `bytes_after`).
+    """
+    before = df.memory_usage(deep=True, index=False)
+    compacted = df.copy()
+    string_dtype = None
+
+    for col in compacted.columns:
+        series = compacted[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            non_null = series.dropna()
+            if len(non_null) and pd.api.types.infer_dtype(non_null, skipna=True) != "string":
+                continue  # mixed or nested values (e.g. lists): leave as is
+            if len(non_null) and non_null.nunique() <= category_max_ratio * len(non_null):
+                compacted[col] = series.astype("category")
+            else:
+                string_dtype = string_dtype or _string_dtype()
+                compacted[col] = series.astype(string_dtype)
+        else:
+            compacted[col] = _compact_numeric(series)
+
+    after = compacted.memory_usage(deep=True, index=False)
+    report = [
+        {
+            "column": col,
+            "dtype_before": str(df[col].dtype),
+            "dtype_after": str(compacted[col].dtype),
+            "bytes_before": int(before[col]),
+            "bytes_after": int(after[col]),
+        }
+        for col in df.columns
+    ]
+    return compacted, report
+
+
+def format_memory_report(report: List[Dict]) -> str:
+    """Renders a `compact_dtypes` report as a plain-text table."""
+    lines = [f"{'column':<24} {'before':>16} {'after':>16} {'bytes before':>14} {'bytes after':>14}"]
+    for row in report:
+        lines.append(
+            f"{row['column']:<24} {row['dtype_before']:>16} {row['dtype_after']:>16} "
+            f"{row['bytes_before']:>14,} {row['bytes_after']:>14,}"
+        )
+    total_before = sum(row["bytes_before"] for row in report)
+    total_after = sum(row["bytes_after"] for row in report)
+    lines.append(f"{'total':<24} {'':>16} {'':>16} {total_before:>14,} {total_after:>14,}")
+    return "\n".join(lines)
 
 
 # ----------------------
 # Pandas Transformation
 # ----------------------
-def _transform_pandas(df):
+def _transform_pandas(
+    df,
+    clean_nulls: bool = True,
+    text_features_fn: Optional[Callable] = None,
+    compact: bool = False,
+    category_max_ratio: float = 0.5
+):
     """
     Pandas transformations:
     - Clean column names
-    - If only a `content` column exists (from PDF/DOCX), derive title/description
-    - Extract simple NLP features
+    - Drop fully empty rows (when `clean_nulls`)
+    - If only a `content` column exists (from PDF/DOCX, plus `OCCURRENCES_COLUMN`
+      when deduplicated), derive title/description
+    - Extract simple NLP features (via `text_features_fn(content_series)` if given,
+      e.g. the incremental row store)
+    - With `compact`, shrink dtypes via `compact_dtypes` instead of casting text
+      to `str`; the per-column report is kept in `df.attrs["memory_report"]`
     """
     # Clean column names
     df = df.rename(columns=lambda c: c.strip().lower().replace(" ", "_"))
 
     # Drop full-empty rows (but keep 0s)
-    df = df.dropna(how="all")
+    if clean_nulls:
+        df = df.dropna(how="all")
 
-    # Handle pure text extraction case
-    if set(df.columns) == {"content"}:
-        from textblob import TextBlob
+    # Handle pure text extraction case (optionally deduplicated, with per-line occurrence counts)
+    if set(df.columns) in CONTENT_COLUMN_SETS:
+        from modules.text_features import TEXT_FEATURE_COLUMNS, extract_text_features
 
-        # Ensure strings
-        df["content"] = df["content"].astype(str)
+        # Ensure strings (pandas >= 3 keeps nulls through astype(str))
+        df["content"] = df["content"].fillna("").astype(str)
 
-        # Derive a pseudo title and description
-        df["title"] = df["content"].apply(lambda x: x.split("\n")[0][:80] if x else "")
-        df["description"] = df["content"].apply(lambda x: " ".join(x.split()[1:50]) if len(x.split()) > 1 else "")
+        # Pseudo title/description, counts, keywords & sentiment in one pass per row
+        features = (text_features_fn or extract_text_features)(df["content"])
+        for col in TEXT_FEATURE_COLUMNS:
+            df[col] = features[col]
 
-        # Basic keyword extraction & sentiment
-        df["char_count"] = df["content"].apply(len)
-        df["word_count"] = df["content"].apply(lambda x: len(x.split()))
-        df["keywords"] = df["content"].apply(lambda x: ", ".join(sorted(set(x.split()[:5]))))
-        df["sentiment_polarity"] = df["content"].apply(lambda x: round(TextBlob(x).sentiment.polarity, 3))
-
-    else:
+    elif not compact:
         # Convert all object columns to strings to avoid .lower() errors later
         for col in df.select_dtypes(include=["object"]).columns:
             df[col] = df[col].astype(str)
 
-    return df
\ No newline at end of file
+    if compact:
+        df, report = compact_dtypes(df, category_max_ratio)
+        df.attrs["memory_report"] = report
+
+    return df
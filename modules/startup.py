@@ -0,0 +1,193 @@
+"""
+startup.py — Cold-start diagnostics and an optional pre-warm hook.
+
+`import_report` measures what importing each app module costs in a fresh
+interpreter (via `python -X importtime`), so regressions in start-up time can
+be traced to the package that caused them. `prewarm` loads heavy resources
+ahead of the first request, optionally in a background thread.
+
+Usage:
+    python -m modules.startup            # per-module import cost
+    python -m modules.startup --json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# What the Streamlit app (and its workers) import at start-up
+APP_MODULES = [
+    "streamlit",
+    "pandas",
+    "modules.feature_engineer",
+    "modules.predictor",
+    "modules.fallback",
+    "modules.ingestion",
+    "modules.retriever",
+    "modules.strategy_graph",
+    "modules.spark_etl",
+    "modules.etl_cache",
+]
+
+# Loaded lazily at the point of use; listed so the report shows what they would cost
+LAZY_MODULES = ["xgboost", "shap", "pdfplumber", "docx", "textblob", "langchain.tools", "pyarrow"]
+
+PREWARM_COMPONENTS = ("retriever", "model", "explainer", "textblob")
+# Opt-in: precomputes SHAP contributions over the `shap.grid` in model_config.yaml
+OPTIONAL_PREWARM_COMPONENTS = ("explanations",)
+
+
+def _run_importtime(code: str):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=os.getcwd()
+    )
+    return proc, time.perf_counter() - start
+
+
+_interpreter_packages: Optional[set] = None
+
+
+def _parse_importtime(stderr: str) -> List[Dict]:
+    packages = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+            packages.append({"package": name.strip(), "self_ms": int(self_us) / 1000,
+                             "cumulative_ms": int(cumulative_us) / 1000})
+        except ValueError:  # header line
+            continue
+    return packages
+
+
+def _importtime(module: str) -> Dict:
+    """Imports `module` in a fresh interpreter and parses `-X importtime` output."""
+    global _interpreter_packages
+    if _interpreter_packages is None:
+        # Modules every interpreter loads at start-up are not the module's fault
+        baseline, _ = _run_importtime("pass")
+        _interpreter_packages = {p["package"] for p in _parse_importtime(baseline.stderr)}
+
+    proc, wall = _run_importtime(f"import {module}")
+    packages = [p for p in _parse_importtime(proc.stderr) if p["package"] not in _interpreter_packages]
+
+    top_level = [p for p in packages if p["package"] == module]
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        "import_ms": top_level[-1]["cumulative_ms"] if top_level else None,
+        "process_ms": wall * 1000,
+        "heaviest": sorted(packages, key=lambda p: p["self_ms"], reverse=True)[:5],
+    }
+
+
+def import_report(modules: Optional[Iterable[str]] = None) -> List[Dict]:
+    """
+    Per-module import cost, each measured in its own cold interpreter.
+
+    Args:
+        modules (Iterable[str], optional): Modules to measure (default: app + lazy modules).
+
+    Returns:
+        List[Dict]: One entry per module with `import_ms` (cumulative import time),
+            `process_ms` (interpreter wall time) and the five heaviest packages.
+    """
+    return [_importtime(module) for module in (modules or APP_MODULES + LAZY_MODULES)]
+
+
+def format_report(report: List[Dict]) -> str:
+    lines = [f"{'module':<28} {'import ms':>10} {'process ms':>11}  heaviest dependencies"]
+    for entry in report:
+        if not entry["ok"]:
+            lines.append(f"{entry['module']:<28} {'—':>10} {'—':>11}  {entry['error']}")
+            continue
+        heaviest = ", ".join(f"{p['package']} {p['self_ms']:.0f}" for p in entry["heaviest"][:3])
+        lines.append(f"{entry['module']:<28} {entry['import_ms'] or 0:>10.1f} {entry['process_ms']:>11.1f}  {heaviest}")
+    return "\n".join(lines)
+
+
+# ----------------------
+# Pre-warm hook
+# ----------------------
+def _warm(component: str) -> None:
+    if component == "retriever":
+        import modules.retriever as retriever
+        retriever.get_index()
+    elif component == "model":
+        import modules.predictor as predictor
+        importlib.import_module("xgboost")
+        predictor.registry.get()
+    elif component == "explainer":
+        import modules.predictor as predictor
+        predictor.registry.get().explainer
+    elif component == "explanations":
+        import modules.predictor as predictor
+        from modules.explanation_cache import get_explanation_cache, load_shap_config
+        shap_config = load_shap_config()
+        grid = shap_config.get("grid") or {}
+        if grid:
+            get_explanation_cache(predictor.FEATURE_KEYS).precompute(
+                predictor.registry.get(),
+                [grid.get(key, [0]) for key in predictor.FEATURE_KEYS],
+                int(shap_config["max_grid_points"])
+            )
+    elif component == "textblob":
+        from textblob import TextBlob
+        TextBlob("warm up").sentiment
+    else:
+        raise ValueError(f"Unknown pre-warm component: {component}")
+
+
+def prewarm(components: Iterable[str] = PREWARM_COMPONENTS, background: bool = False) -> Dict[str, float]:
+    """
+    Loads heavy resources before the first request.
+
+    Args:
+        components (Iterable[str]): Any of 'retriever', 'model', 'explainer', 'textblob'
+            and 'explanations'.
+        background (bool): Run in a daemon thread and return immediately.
+
+    Returns:
+        Dict[str, float]: Seconds spent per component (filled in as they finish
+            when running in the background). Failures are printed, not raised.
+    """
+    timings: Dict[str, float] = {}
+
+    def run():
+        for component in components:
+            start = time.perf_counter()
+            try:
+                _warm(component)
+            except Exception as e:
+                print(f"⚠️ Pre-warm of {component} failed: {e}")
+            timings[component] = time.perf_counter() - start
+
+    if background:
+        threading.Thread(target=run, name="stratomind-prewarm", daemon=True).start()
+    else:
+        run()
+    return timings
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Report per-module import cost for StratoMind.")
+    parser.add_argument("modules", nargs="*", help="Modules to measure (default: app and lazy modules)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    report = import_report(args.modules or None)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,14 @@
-from typing import List, Dict
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
 import modules.genai_agent as genai_agent
+from modules.instrumentation import metrics
 
 def run_strategy_pipeline(domain: str, query: str, strategy_docs: List[Dict], prediction: str) -> str:
     """
@@ -42,4 +51,421 @@ def run_strategy_pipeline(domain: str, query: str, strategy_docs: List[Dict], pr
             f"**Predicted Outcome:** {prediction}\n\n"
             f"⚠️ Strategy generation failed due to an internal error.\n"
             f"Error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+# ----------------------
+# DAG executor
+# ----------------------
+_MISSING = object()
+
+
+def fingerprint(value: Any) -> str:
+    """
+    Stable content hash of a node input, used as a memoization key.
+
+    DataFrames are hashed by content; other values by their JSON (or repr) form.
+    """
+    import pandas as pd
+
+    digest = hashlib.sha1()
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr((list(value.columns), [str(t) for t in value.dtypes])).encode())
+        try:
+            digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        except TypeError:  # unhashable cells (e.g. lists)
+            digest.update(value.to_json(orient="split", default_handler=str).encode())
+    else:
+        try:
+            digest.update(json.dumps(value, sort_keys=True, default=repr).encode())
+        except (TypeError, ValueError):
+            digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+
+def approx_size(value: Any) -> int:
+    """Rough in-memory size of a node output in bytes, used to bound the memo."""
+    import pandas as pd
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approx_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(approx_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class Node:
+    """
+    One pipeline step.
+
+    Args:
+        name (str): Output name other nodes depend on.
+        func (Callable): Called with one keyword argument per dependency.
+        deps (Iterable[str]): Graph inputs or other node names.
+        timeout (float, optional): Seconds before the node is routed to `fallback`.
+            Python threads cannot be cancelled: the timed-out call keeps running
+            (and holds a pool worker) until it returns, and its result is dropped.
+        fallback (Callable | Any, optional): Called with the same kwargs (or returned
+            as-is) when the node times out or raises. Without it, errors propagate.
+        memoize (bool): Reuse outputs for identical inputs.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        deps: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        fallback: Any = _MISSING,
+        memoize: bool = True
+    ):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.fallback = fallback
+        self.memoize = memoize
+
+    def run_fallback(self, kwargs: Dict, error: Exception):
+        if self.fallback is _MISSING:
+            raise error
+        return self.fallback(**kwargs) if callable(self.fallback) else self.fallback
+
+
+def _call_node(node: Node, kwargs: Dict) -> Any:
+    # Sampled by the profiler when `graph.<node>` is in the profiled labels
+    with metrics.profile(f"graph.{node.name}"):
+        return node.func(**kwargs)
+
+
+class GraphRun:
+    """Outputs and diagnostics of one `StrategyGraph.run`."""
+
+    def __init__(self):
+        self.outputs: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+        self.memo_hits: List[str] = []
+        self.fallbacks: Dict[str, str] = {}
+        self.wall_seconds = 0.0
+        self.critical_path_seconds = 0.0
+
+    def __getitem__(self, name: str) -> Any:
+        return self.outputs[name]
+
+
+class StrategyGraph:
+    """
+    Minimal LangGraph-style DAG engine: independent nodes run concurrently on a
+    thread pool, slow or failing nodes are routed to their fallbacks, and node
+    outputs are memoized by the keys of their inputs.
+
+    Graph inputs are keyed by their fingerprint (or a caller-supplied key); a
+    node output is keyed by the node name plus its input keys, so downstream
+    nodes never re-hash large intermediate values such as DataFrames.
+
+    Every node execution is timed under the metrics label `graph.<node>` and
+    can be sampled by the profiler (`instrumentation.configure`, `profile.labels`).
+
+    The thread pool is shared across runs. A node that times out keeps its
+    worker until its function returns, so size `max_workers` to cover the
+    widest stage plus any calls that may hang (e.g. a stalled model load).
+
+    Args:
+        nodes (Iterable[Node]): Pipeline steps.
+        max_workers (int): Thread pool size.
+        memo_size (int): Memoized outputs kept (LRU, across all nodes).
+        memo_max_bytes (int, optional): Also evict once memoized outputs exceed
+            this approximate size.
+    """
+
+    def __init__(
+        self,
+        nodes: Iterable[Node] = (),
+        max_workers: int = 4,
+        memo_size: int = 256,
+        memo_max_bytes: Optional[int] = None
+    ):
+        self.nodes: Dict[str, Node] = {}
+        self.max_workers = max_workers
+        self.memo_size = memo_size
+        self.memo_max_bytes = memo_max_bytes
+        self._memo: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (value, size)
+        self._memo_bytes = 0
+        self._memo_lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node: Node) -> None:
+        if node.name in self.nodes:
+            raise ValueError(f"Duplicate node: {node.name}")
+        self.nodes[node.name] = node
+
+    def _required(self, targets: Iterable[str]) -> List[str]:
+        """Nodes needed for `targets`, in dependency order (raises on cycles)."""
+        order, state = [], {}
+
+        def visit(name: str):
+            if name not in self.nodes:
+                return  # graph input
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle detected at node: {name}")
+            if state.get(name) == "done":
+                return
+            state[name] = "visiting"
+            for dep in self.nodes[name].deps:
+                visit(dep)
+            state[name] = "done"
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def _memo_get(self, key: tuple) -> Any:
+        with self._memo_lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key][0]
+        return _MISSING
+
+    def _memo_put(self, key: tuple, value: Any) -> None:
+        size = approx_size(value) if self.memo_max_bytes else 0
+        with self._memo_lock:
+            if key in self._memo:
+                self._memo_bytes -= self._memo.pop(key)[1]
+            self._memo[key] = (value, size)
+            self._memo_bytes += size
+            while self._memo and (
+                len(self._memo) > self.memo_size
+                or (self.memo_max_bytes and self._memo_bytes > self.memo_max_bytes)
+            ):
+                self._memo_bytes -= self._memo.popitem(last=False)[1][1]
+
+    @property
+    def memo_bytes(self) -> int:
+        """Approximate size of memoized outputs (0 unless `memo_max_bytes` is set)."""
+        return self._memo_bytes
+
+    def _executor(self) -> ThreadPoolExecutor:
+        # Shared across runs; a timed-out node keeps its worker until it returns (see class docstring)
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="strategy-graph")
+        return self._pool
+
+    def clear_memo(self) -> None:
+        with self._memo_lock:
+            self._memo.clear()
+            self._memo_bytes = 0
+
+    def run(
+        self,
+        inputs: Dict[str, Any],
+        targets: Optional[Iterable[str]] = None,
+        input_keys: Optional[Dict[str, str]] = None
+    ) -> GraphRun:
+        """
+        Executes the nodes needed for `targets` (default: all nodes).
+
+        Args:
+            inputs (Dict[str, Any]): Values for dependencies that are not nodes.
+            targets (Iterable[str], optional): Node names to compute.
+            input_keys (Dict[str, str], optional): Precomputed memo keys for some
+                inputs (e.g. an uploaded file's content hash), used instead of
+                fingerprinting their values.
+
+        Returns:
+            GraphRun: Outputs of every executed node plus timings, memo hits and fallbacks.
+        """
+        order = self._required(targets or list(self.nodes))
+        for name in order:
+            missing = [d for d in self.nodes[name].deps if d not in self.nodes and d not in inputs]
+            if missing:
+                raise KeyError(f"Node '{name}' is missing inputs: {missing}")
+
+        run = GraphRun()
+        values = dict(inputs)
+        value_keys: Dict[str, str] = dict(input_keys or {})
+        pending = list(order)
+        running: Dict[Any, tuple] = {}  # future -> (node, kwargs, key, started)
+        run_start = time.perf_counter()
+
+        def key_of(name: str) -> str:
+            if name not in value_keys:
+                value_keys[name] = fingerprint(values[name])
+            return value_keys[name]
+
+        def finish(node: Node, value: Any, started: float, key: Optional[tuple] = None):
+            values[node.name] = run.outputs[node.name] = value
+            run.timings[node.name] = time.perf_counter() - started
+            if key:
+                # Lineage key: same node, same input keys → same output
+                value_keys[node.name] = hashlib.sha1(repr(key).encode()).hexdigest()
+
+        pool = self._executor()
+        while pending or running:
+            # Launch every node whose dependencies are available (memo hits may unblock more)
+            ready = [n for n in pending if all(d in values for d in self.nodes[n].deps)]
+            while ready:
+                for name in ready:
+                    pending.remove(name)
+                    node = self.nodes[name]
+                    kwargs = {dep: values[dep] for dep in node.deps}
+                    key = (name,) + tuple(key_of(dep) for dep in node.deps) if node.memoize else None
+                    started = time.perf_counter()
+                    cached = self._memo_get(key) if key else _MISSING
+                    if cached is not _MISSING:
+                        run.memo_hits.append(name)
+                        finish(node, cached, started, key)
+                    else:
+                        running[pool.submit(_call_node, node, kwargs)] = (node, kwargs, key, started)
+                ready = [n for n in pending if all(d in values for d in self.nodes[n].deps)]
+
+            if not running:
+                break
+
+            now = time.perf_counter()
+            deadlines = [
+                started + node.timeout - now
+                for node, _, _, started in running.values() if node.timeout is not None
+            ]
+            done, _ = wait(list(running), timeout=max(0.0, min(deadlines)) if deadlines else None,
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                node, kwargs, key, started = running.pop(future)
+                try:
+                    value = future.result()
+                    metrics.observe(f"graph.{node.name}", time.perf_counter() - started)
+                    if key:
+                        self._memo_put(key, value)
+                except Exception as e:
+                    metrics.observe(f"graph.{node.name}", time.perf_counter() - started, error=True, fallback=True)
+                    run.fallbacks[node.name] = f"error: {e}"
+                    value, key = node.run_fallback(kwargs, e), None
+                finish(node, value, started, key)
+
+            # Route nodes past their deadline to fallbacks; their threads finish in the background
+            now = time.perf_counter()
+            for future, (node, kwargs, key, started) in list(running.items()):
+                if node.timeout is not None and now - started >= node.timeout:
+                    running.pop(future)
+                    metrics.observe(f"graph.{node.name}", now - started, error=True, fallback=True)
+                    run.fallbacks[node.name] = f"timeout after {node.timeout}s"
+                    finish(node, node.run_fallback(kwargs, TimeoutError(node.name)), started)
+
+        run.wall_seconds = time.perf_counter() - run_start
+
+        # Longest chain of dependent node timings
+        path_cost: Dict[str, float] = {}
+        for name in order:
+            upstream = [path_cost[d] for d in self.nodes[name].deps if d in path_cost]
+            path_cost[name] = run.timings.get(name, 0.0) + (max(upstream) if upstream else 0.0)
+        run.critical_path_seconds = max(path_cost.values(), default=0.0)
+        return run
+
+
+# ----------------------
+# Analysis pipeline
+# ----------------------
+def _etl_node(source, dataset_key, session_key=None):
+    from modules.etl_cache import cached_run_etl
+    from modules.incremental import run_etl_incremental
+
+    stats: Dict[str, int] = {}
+    if dataset_key:
+        def compute(src):
+            result, run_stats = run_etl_incremental(src, dataset_key, session_key=session_key)
+            stats.update(run_stats)
+            return result
+        docs = cached_run_etl(source, compute=compute)
+    else:
+        docs = cached_run_etl(source)
+    return {"docs": docs, "stats": stats}
+
+
+def _index_node(etl, dataset_key):
+    """Adds an uploaded dataset's ETL output to the shared document store."""
+    if not dataset_key:
+        return {"added": 0, "duplicates": 0}
+    from modules.doc_store import get_store
+    return get_store().index_etl_output(etl["docs"], source=dataset_key)
+
+
+def _prediction_node(features, use_fallback, model_version=None):
+    import modules.predictor as predictor
+    from modules.fallback import fallback_predict
+
+    if use_fallback:
+        # Same label the graph times this node under; the call itself is counted there
+        metrics.record_fallback("graph.prediction", call=False)
+        return fallback_predict(features)
+    batch = predictor.predict_batch([features])
+    return batch["labels"][0], predictor.explain_row(batch, 0)
+
+
+def build_analysis_graph(
+    timeouts: Optional[Dict[str, float]] = None,
+    max_workers: int = 4,
+    memo_size: int = 256,
+    memo_max_bytes: Optional[int] = None,
+    use_doc_store: bool = False
+) -> StrategyGraph:
+    """
+    The app's end-to-end pipeline as a DAG. Retrieval and ETL are independent
+    and run concurrently:
+
+        retrieve(domain, query) ───────────────────────────────┐
+        etl(source, dataset_key, session_key) → features(query, domain) → prediction → narrative
+
+    Inputs: domain, query, source (path | DataFrame), dataset_key (str | None),
+    session_key (str | None; scopes the incremental ETL store), use_fallback,
+    model_version (str; keys the prediction memo, see `predictor.current_version`)
+    and, with `use_doc_store`, doc_store_generation (`DocumentStore.generation`;
+    keys the retrieve memo so new uploads are searched). Changing only the domain or query re-runs
+    retrieve/features/prediction/narrative and reuses the ETL output.
+    Outputs: retrieve (docs), etl ({"docs", "stats"}), features, prediction
+    ((label, explanation)), narrative (str), and with `use_doc_store` also
+    index ({"added", "duplicates"}).
+
+    With `use_doc_store`, retrieval also ranks previously uploaded documents
+    and each uploaded dataset's ETL output is indexed into the shared store
+    alongside the rest of the pipeline.
+
+    Args:
+        timeouts (Dict[str, float], optional): Per-node timeouts in seconds.
+        max_workers (int): Thread pool size.
+        memo_size (int): Memoized node outputs kept.
+        memo_max_bytes (int, optional): Approximate memory bound for memoized outputs.
+        use_doc_store (bool): Search and grow the persistent upload store (`doc_store`).
+    """
+    import modules.feature_engineer as feature_engineer
+    import modules.retriever as retriever
+    from modules.fallback import fallback_predict
+
+    timeouts = timeouts or {}
+    retrieve_deps = ("domain", "query", "doc_store_generation") if use_doc_store else ("domain", "query")
+    nodes = [
+        Node("retrieve",
+             lambda domain, query, doc_store_generation=None:
+                 retriever.get_relevant_docs(domain, query, include_uploads=use_doc_store),
+             deps=retrieve_deps, timeout=timeouts.get("retrieve"), fallback=[]),
+        Node("etl", _etl_node, deps=("source", "dataset_key", "session_key"), timeout=timeouts.get("etl")),
+        Node("features", lambda query, domain, etl: feature_engineer.transform(query, domain, etl["docs"]),
+             deps=("query", "domain", "etl"), timeout=timeouts.get("features")),
+        Node("prediction", _prediction_node, deps=("features", "use_fallback", "model_version"),
+             timeout=timeouts.get("prediction"),
+             fallback=lambda features, **_: fallback_predict(features)),
+        Node("narrative",
+             lambda domain, query, retrieve, prediction: run_strategy_pipeline(domain, query, retrieve, prediction[0]),
+             deps=("domain", "query", "retrieve", "prediction"), timeout=timeouts.get("narrative"),
+             fallback=" Strategy generation failed."),
+    ]
+    if use_doc_store:
+        nodes.append(Node("index", _index_node, deps=("etl", "dataset_key"), timeout=timeouts.get("index"),
+                          fallback={"added": 0, "duplicates": 0}))
+    return StrategyGraph(nodes, max_workers=max_workers, memo_size=memo_size, memo_max_bytes=memo_max_bytes)
@@ -0,0 +1,162 @@
+"""
+text_features.py — Single-pass text features for content-only uploads.
+
+Each row is split once and all derived columns (title, description, counts,
+keywords, sentiment) are computed together. Distinct texts are computed only
+once per process thanks to a content-hash memo, and large inputs are spread
+across a process pool that is created once per process and reused.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+TEXT_FEATURE_COLUMNS = ["title", "description", "char_count", "word_count", "keywords", "sentiment_polarity"]
+
+# Below this many uncached distinct texts a process pool costs more than it saves.
+# Full runs (`run_etl`) reach it on large uploads; streamed chunks are capped by `etl.max_lines`.
+PARALLEL_MIN_ROWS = 2_000
+# Distinct texts remembered per process
+CACHE_SIZE = 100_000
+
+_cache: "OrderedDict[bytes, Tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _content_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def row_features(text: str) -> Tuple[str, str, int, int, str, float]:
+    """
+    Computes every text feature for one row from a single split.
+
+    Returns:
+        Tuple: (title, description, char_count, word_count, keywords, sentiment_polarity)
+    """
+    from textblob import TextBlob
+
+    words = text.split()
+    title = text.split("\n", 1)[0][:80] if text else ""
+    description = " ".join(words[1:50])
+    keywords = ", ".join(sorted(set(words[:5])))
+    polarity = round(TextBlob(text).sentiment.polarity, 3)
+    return title, description, len(text), len(words), keywords, polarity
+
+
+def _row_features_batch(texts: List[str]) -> List[Tuple]:
+    """Process-pool entry point."""
+    return [row_features(text) for text in texts]
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process-wide pool of `workers` processes, created on first use.
+
+    Workers are started with `forkserver` (or `spawn` where unavailable), never
+    `fork`: callers run on Streamlit script threads and DAG worker threads, and
+    forking a multithreaded process can deadlock the child.
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context(method)
+            )
+        return pool
+
+
+def _discard_pool(workers: int, pool: ProcessPoolExecutor) -> None:
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _compute(texts: List[str], workers: int) -> List[Tuple]:
+    if workers <= 1 or len(texts) < PARALLEL_MIN_ROWS:
+        return _row_features_batch(texts)
+
+    batch_size = max(1, -(-len(texts) // (workers * 4)))
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    pool = _get_pool(workers)
+    try:
+        results = []
+        for batch_result in pool.map(_row_features_batch, batches):
+            results.extend(batch_result)
+        return results
+    except BrokenProcessPool as e:
+        # A worker died (e.g. OOM-killed): drop the pool and finish in-process
+        print(f"⚠️ Text feature pool failed, computing serially: {e}")
+        _discard_pool(workers, pool)
+        return _row_features_batch(texts)
+
+
+def extract_text_features(contents: Iterable[str], workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Derives the content-only ETL columns for every row.
+
+    Args:
+        contents (Iterable[str] | pd.Series): Row texts (already coerced to str).
+        workers (int, optional): Process pool size for large inputs (default: CPU count).
+
+    Returns:
+        pd.DataFrame: One column per TEXT_FEATURE_COLUMNS entry, aligned to the
+            input index when `contents` is a Series.
+    """
+    index = contents.index if isinstance(contents, pd.Series) else None
+    texts = list(contents)
+    hashes = [_content_hash(text) for text in texts]
+
+    # Look up cached rows and collect each distinct miss once
+    found = {}
+    missing = {}
+    with _cache_lock:
+        for key, text in zip(hashes, texts):
+            if key in found or key in missing:
+                continue
+            cached = _cache.get(key)
+            if cached is not None:
+                _cache.move_to_end(key)
+                found[key] = cached
+            else:
+                missing[key] = text
+
+    if missing:
+        computed = _compute(list(missing.values()), workers or os.cpu_count() or 1)
+        with _cache_lock:
+            for key, features in zip(missing.keys(), computed):
+                found[key] = features
+                _cache[key] = features
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    rows = [found[key] for key in hashes]
+    frame = pd.DataFrame(rows, columns=TEXT_FEATURE_COLUMNS, index=index)
+    return frame.astype({"char_count": "int64", "word_count": "int64", "sentiment_polarity": "float64"})
+
+
+def clear_cache() -> None:
+    """Drops all memoized rows."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def shutdown_pools() -> None:
+    """Stops the worker processes (they are recreated on the next large call)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
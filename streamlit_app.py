@@ -1,43 +1,86 @@
 import os
-import pandas as pd
+import uuid
 import streamlit as st
-import pdfplumber
-from docx import Document
 
-import modules.feature_engineer as feature_engineer
+from modules.config_loader import load_yaml_config
+from modules.instrumentation import metrics, configure as configure_instrumentation
+from modules.startup import prewarm
+from modules.ingestion import parse_uploaded_file, content_hash
+from modules.doc_store import get_store, load_doc_store_config
 import modules.predictor as predictor
-from modules.fallback import fallback_predict, safe_call
 import modules.retriever as retriever
 import modules.strategy_graph as strategy_graph
-import modules.spark_etl as spark_etl
+import modules.llm_narrative as llm_narrative
 
-# --- Page Config ---
+# --- Page Config (must be the first Streamlit call) ---
 st.set_page_config(page_title="StratoMind — AI Strategy Assistant", layout="wide")
 
+# --- Metrics exporters / profiling (once per process) ---
+@st.cache_resource
+def _init_instrumentation():
+    try:
+        configure_instrumentation(load_yaml_config("app_config.yaml").get("instrumentation"))
+    except FileNotFoundError:
+        pass
+    return metrics
+
+_init_instrumentation()
+
+# --- Optional pre-warm of heavy resources (once per process, in the background) ---
+@st.cache_resource
+def _prewarm():
+    try:
+        components = (load_yaml_config("app_config.yaml").get("startup") or {}).get("prewarm") or []
+    except FileNotFoundError:
+        components = []
+    return prewarm(components, background=True) if components else {}
+
+_prewarm()
+
+def _pipeline_config():
+    try:
+        return load_yaml_config("app_config.yaml").get("pipeline") or {}
+    except FileNotFoundError:
+        return {}
+
+PIPELINE_CONFIG = _pipeline_config()
+DOC_STORE_ENABLED = load_doc_store_config()["enabled"]
+
+# --- Warm-up: load the strategy index and model once per process ---
+# (the pipeline reads both through `retriever` / `predictor.registry`)
+@st.cache_resource
+def _warm_shared_resources() -> bool:
+    retriever.get_index()
+    try:
+        predictor.registry.get()
+    except Exception as e:
+        print(f"⚠️ Model unavailable, predictions will use fallback logic: {e}")
+        return False
+    return True
+
+# --- Pipeline DAG (one per process, memoizes node outputs across reruns) ---
+@st.cache_resource
+def get_analysis_graph():
+    memo_max_mb = PIPELINE_CONFIG.get("memo_max_mb")
+    return strategy_graph.build_analysis_graph(
+        timeouts=PIPELINE_CONFIG.get("timeouts"),
+        max_workers=PIPELINE_CONFIG.get("max_workers", 4),
+        memo_size=PIPELINE_CONFIG.get("memo_size", 256),
+        memo_max_bytes=int(memo_max_mb * 1024 * 1024) if memo_max_mb else None,
+        use_doc_store=DOC_STORE_ENABLED
+    )
+
+# --- Parsed uploads, keyed by content hash (the file object itself is not hashed) ---
+@st.cache_data(max_entries=PIPELINE_CONFIG.get("upload_cache_entries", 8), show_spinner=False)
+def _parse_upload(file_hash: str, file_name: str, _uploaded_file):
+    return parse_uploaded_file(_uploaded_file)
+
 # --- Inject Custom CSS ---
 css_path = "assets/custom_styles.css"
 if os.path.exists(css_path):
     with open(css_path) as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
-# --- Helpers for parsing all file types into DataFrame ---
-def parse_uploaded_file(file):
-    name = file.name.lower()
-    if name.endswith(".csv"):
-        return pd.read_csv(file)
-    elif name.endswith(".pdf"):
-        with pdfplumber.open(file) as pdf:
-            text = "\n".join([p.extract_text() or "" for p in pdf.pages])
-        lines = [line.strip() for line in text.split("\n") if line.strip()]
-        return pd.DataFrame({"content": lines})
-    elif name.endswith(".docx"):
-        doc = Document(file)
-        text = "\n".join([p.text for p in doc.paragraphs if p.text.strip()])
-        lines = [line.strip() for line in text.split("\n") if line.strip()]
-        return pd.DataFrame({"content": lines})
-    else:
-        return None
-
 # --- App Header ---
 st.markdown("<h1 class='section-header'> StratoMind</h1>", unsafe_allow_html=True)
 st.markdown("#### Your AI‑powered strategy co‑pilot — from raw data to explainable playbooks.")
@@ -48,55 +91,84 @@ domain = st.sidebar.selectbox(" Select Domain", ["EdTech", "FinTech", "SaaS"])
 strategy_type = st.sidebar.text_input(" Strategy Focus", placeholder="e.g., Customer Strategy: B2B")
 uploaded_file = st.sidebar.file_uploader("Upload CSV, PDF, or Word (optional)", type=["csv", "pdf", "docx"])
 use_fallback = st.sidebar.checkbox("Force Fallback Mode", value=False)
+use_llm = st.sidebar.checkbox("Local LLM Narrative", value=False)
 run_button = st.sidebar.button(" Run Analysis")
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("[View on GitHub](https://github.com/vamsikrishna34/stratomind)")
 
 # --- Main Panel ---
+# Results stay on screen across widget reruns until an input changes
+file_hash = content_hash(uploaded_file.getvalue()) if uploaded_file else None
+analysis_inputs = (domain, strategy_type, file_hash, use_fallback)
 if run_button:
+    st.session_state["analysis_inputs"] = analysis_inputs
+show_analysis = st.session_state.get("analysis_inputs") == analysis_inputs
+
+if show_analysis:
     with st.spinner(" Analyzing your strategy..."):
+        _warm_shared_resources()
+
         # Step 1: File ingestion
         if uploaded_file:
-            df = parse_uploaded_file(uploaded_file)
+            df = _parse_upload(file_hash, uploaded_file.name, uploaded_file)
             if df is None or df.empty:
                 st.error("Unsupported or empty file. Please upload a valid CSV, PDF, or DOCX.")
                 st.stop()
-            docs = spark_etl.run_etl(df)
-            st.markdown("<h4 class='section-header'> Uploaded File Preview</h4>", unsafe_allow_html=True)
-            st.dataframe(docs.head(5), use_container_width=True)
+            dedup_stats = df.attrs.get("dedup_stats")
+            if dedup_stats and dedup_stats["rows_out"] < dedup_stats["rows_in"]:
+                st.caption(f"🧹 Collapsed {dedup_stats['rows_in']} lines into {dedup_stats['rows_out']} distinct lines "
+                           f"({dedup_stats['exact_duplicates']} repeated, {dedup_stats['near_duplicates']} near-duplicates).")
+            # Incremental ETL keyed by session + file name: only rows changed since this
+            # session's last upload of the file are recomputed
+            source, dataset_key, preview_title = df, uploaded_file.name, "Uploaded File Preview"
+            source_key = file_hash
         else:
             sample_path = "assets/sample_data.csv"
-            if os.path.exists(sample_path):
-                docs = spark_etl.run_etl(sample_path)
-                st.markdown("<h4 class='section-header'> Sample Data Preview</h4>", unsafe_allow_html=True)
-                st.dataframe(docs.head(5), use_container_width=True)
-            else:
+            if not os.path.exists(sample_path):
                 st.error("No sample dataset found. Please upload a file.")
                 st.stop()
+            source, dataset_key, preview_title = sample_path, None, "Sample Data Preview"
+            source_key = f"{sample_path}@{os.stat(sample_path).st_mtime_ns}"
 
-        # Step 2: Feature engineering
-        features = feature_engineer.transform(strategy_type, domain, docs)
-
-        # Step 3: Prediction with fallback toggle
         if use_fallback:
             st.info(" Fallback mode enabled manually.")
-            pred, explanation = fallback_predict(features)
-        else:
-            pred, explanation = safe_call(
-                predictor.predict,
-                fallback_predict(features),
-                features,
-                label="Prediction"
-            )
-
-        # Step 4: Strategy generation with fallback
-        strategy_output = safe_call(
-            strategy_graph.run_strategy_pipeline,
-            " Strategy generation failed.",
-            domain, strategy_type, docs, pred,
-            label="Strategy Pipeline"
-        )
+
+        # Steps 2-4: retrieval ∥ ETL → features → prediction → narrative, as a concurrent DAG.
+        # Each node is memoized by its inputs, so a rerun redoes only the stages whose inputs changed.
+        run = get_analysis_graph().run({
+            "domain": domain,
+            "query": strategy_type,
+            "source": source,
+            "dataset_key": dataset_key,
+            "session_key": st.session_state.setdefault("session_key", uuid.uuid4().hex),
+            "use_fallback": use_fallback,
+            "model_version": "fallback" if use_fallback else predictor.current_version(),
+            "doc_store_generation": get_store().generation if DOC_STORE_ENABLED else 0
+        }, input_keys={"source": source_key})
+
+        docs = run["etl"]["docs"]
+        etl_stats = run["etl"]["stats"]
+        if etl_stats.get("reused_rows") and "etl" not in run.memo_hits:
+            st.caption(f"♻️ Reused {etl_stats['reused_rows']} of {etl_stats['rows']} rows from the previous upload.")
+        indexed = run.outputs.get("index") or {}
+        if indexed.get("added") and "index" not in run.memo_hits:
+            st.caption(f"📚 Added {indexed['added']} documents to the shared corpus "
+                       f"({indexed['duplicates']} already known).")
+        st.markdown(f"<h4 class='section-header'> {preview_title}</h4>", unsafe_allow_html=True)
+        st.dataframe(docs.head(5), use_container_width=True)
+        memory_report = docs.attrs.get("memory_report")
+        if memory_report:
+            bytes_before = sum(row["bytes_before"] for row in memory_report)
+            bytes_after = sum(row["bytes_after"] for row in memory_report)
+            st.caption(f"🗜️ Compact dtypes: {bytes_before / 1e6:.1f} MB → {bytes_after / 1e6:.1f} MB in memory.")
+
+        for node, reason in run.fallbacks.items():
+            print(f"[Fallback] {node}: {reason}")
+            st.warning(f"⚠️ {node} failed. Using fallback logic.")
+
+        pred, explanation = run["prediction"]
+        strategy_output = run["narrative"]
 
     # --- Output Cards ---
     st.markdown("<div class='card'>", unsafe_allow_html=True)
@@ -104,6 +176,21 @@ if run_button:
     st.markdown(strategy_output)
     st.markdown("</div>", unsafe_allow_html=True)
 
+    if use_llm:
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("<h4 class='section-header'>🤖 AI Narrative</h4>", unsafe_allow_html=True)
+
+        def _narrative_tokens():
+            # Errors surface while streaming, so handle them here rather than via safe_call
+            try:
+                yield from llm_narrative.stream_narrative(run["retrieve"], strategy_type)
+            except Exception as e:
+                print(f"[Fallback] Error in LLM Narrative: {e}")
+                yield "⚠️ Local narrative unavailable."
+
+        st.write_stream(_narrative_tokens())
+        st.markdown("</div>", unsafe_allow_html=True)
+
     st.markdown("<div class='card'>", unsafe_allow_html=True)
     st.markdown("<h4 class='section-header'>📊 Prediction Insights</h4>", unsafe_allow_html=True)
     st.markdown(f"**Prediction:** {pred}")
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def _repo_cwd(monkeypatch):
+    # Config and asset paths are relative to the repository root
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture(scope="session")
+def model_path(tmp_path_factory):
+    """The shipped model, or a small booster trained on the same features when none is checked in."""
+    pytest.importorskip("xgboost")
+    import modules.predictor as predictor
+    from benchmarks.synthetic import train_booster
+
+    shipped = os.path.join(ROOT, predictor.MODEL_PATH)
+    if os.path.exists(shipped):
+        return shipped
+    return train_booster(str(tmp_path_factory.mktemp("model") / "strategy_predictor.json"))
+
+
+@pytest.fixture
+def local_model(model_path, monkeypatch):
+    """Points `predictor` at `model_path` for one test."""
+    import modules.predictor as predictor
+    from modules.model_registry import ModelRegistry
+
+    registry = ModelRegistry(model_path)
+    monkeypatch.setattr(predictor, "registry", registry)
+    return registry
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+import modules.batch as batch  # noqa: E402
+
+JOBS = [
+    {"domain": "FinTech", "query": "credit risk"},
+    {"domain": "SaaS", "query": "reduce churn"},
+]
+
+
+@pytest.fixture(autouse=True)
+def _reset_fallback(monkeypatch):
+    # run_batch(workers=1) sets the worker global in this process
+    monkeypatch.setattr(batch, "_force_fallback", False)
+
+
+def test_load_jobs_jsonl_and_csv(tmp_path):
+    jsonl = tmp_path / "jobs.jsonl"
+    jsonl.write_text("\n".join(json.dumps(job) for job in JOBS) + "\n\n", encoding="utf-8")
+    csv_path = tmp_path / "jobs.csv"
+    csv_path.write_text("domain,query\nFinTech,credit risk\nSaaS,reduce churn\nEdTech,\n", encoding="utf-8")
+
+    assert batch.load_jobs(str(jsonl)) == JOBS
+    assert batch.load_jobs(str(csv_path)) == JOBS + [{"domain": "EdTech", "query": ""}]
+
+
+def test_run_job_with_forced_fallback(monkeypatch):
+    monkeypatch.setattr(batch, "_force_fallback", True)
+    result = batch.run_job(7, "FinTech", "credit risk")
+
+    assert result["job"] == 7 and result["domain"] == "FinTech" and result["query"] == "credit risk"
+    assert result["fallback"] is True
+    assert result["explanation"].startswith("(Fallback Mode)")
+    assert set(result["timings"]) == set(batch.STAGES)
+
+
+def test_run_job_falls_back_without_model(tmp_path, monkeypatch):
+    from modules.model_registry import ModelRegistry
+
+    monkeypatch.setattr(batch.predictor, "registry", ModelRegistry(str(tmp_path / "missing.json")))
+    result = batch.run_job(0, "SaaS", "reduce churn")
+    assert result["fallback"] is True
+    assert result["explanation"].startswith("(Fallback Mode)")
+
+
+def test_run_batch_reports_job_errors(monkeypatch):
+    real = batch.retriever.get_relevant_docs
+
+    def flaky(domain, query):
+        if domain == "SaaS":
+            raise RuntimeError("index unavailable")
+        return real(domain, query)
+    monkeypatch.setattr(batch.retriever, "get_relevant_docs", flaky)
+
+    results = sorted(batch.run_batch(JOBS, workers=1, force_fallback=True), key=lambda r: r["job"])
+    assert [r["job"] for r in results] == [0, 1]
+    assert "error" not in results[0]
+    assert results[1] == {"job": 1, **JOBS[1], "error": "index unavailable", "timings": {}}
+
+
+def test_main_writes_jsonl_results(tmp_path, capsys):
+    jobs = tmp_path / "jobs.jsonl"
+    jobs.write_text("\n".join(json.dumps(job) for job in JOBS), encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+
+    assert batch.main([str(jobs), "-o", str(output), "--workers", "1", "--fallback"]) == 0
+    results = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+
+    assert sorted(r["job"] for r in results) == [0, 1]
+    for result in results:
+        job = JOBS[result["job"]]
+        assert (result["domain"], result["query"]) == (job["domain"], job["query"])
+        assert set(result) == {
+            "job", "domain", "query", "prediction", "explanation", "fallback", "strategy", "documents", "timings"
+        }
+        assert result["fallback"] is True
+        assert isinstance(result["strategy"], str) and isinstance(result["documents"], list)
+        assert set(result["timings"]) == set(batch.STAGES)
+        assert all(seconds >= 0 for seconds in result["timings"].values())
+    assert "Jobs: 2 (0 failed)" in capsys.readouterr().err
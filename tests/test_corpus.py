@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+import modules.corpus as corpus_module
+from modules.corpus import StrategyCorpus, StrategyRecord
+
+CORPORA = {
+    "fintech": [
+        {"title": "Credit Scoring", "description": "Score credit risk.", "steps": ["Collect data", "Train model"]},
+        {"title": "Fraud Detection", "description": "Flag card fraud.", "steps": []},
+    ],
+    "saas": [{"title": "Freemium Funnel", "description": "Convert free users.", "steps": ["Gate features"]}],
+}
+
+
+def test_save_load_round_trip(tmp_path):
+    original = StrategyCorpus.from_corpora(CORPORA)
+    path = str(tmp_path / "corpus.pkl")
+    original.save(path)
+    loaded = StrategyCorpus.load(path)
+
+    assert [r.to_dict() for r in loaded.records] == [r.to_dict() for r in original.records]
+    assert [r.tokens for r in loaded.records] == [r.tokens for r in original.records]
+    assert set(loaded.by_domain) == {"fintech", "saas"}
+
+
+def test_failed_save_leaves_no_temp_file(tmp_path, monkeypatch):
+    path = tmp_path / "corpus.pkl"
+    StrategyCorpus.from_corpora(CORPORA).save(str(path))
+    before = path.read_bytes()
+
+    def broken_dump(*args, **kwargs):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(corpus_module.pickle, "dump", broken_dump)
+
+    with pytest.raises(RuntimeError):
+        StrategyCorpus.from_corpora(CORPORA).save(str(path))
+    assert os.listdir(tmp_path) == ["corpus.pkl"]
+    assert path.read_bytes() == before
+
+
+def test_records_behave_like_read_only_dicts():
+    record = StrategyRecord.from_dict("fintech", CORPORA["fintech"][0])
+    assert record["title"] == record.get("title") == "Credit Scoring"
+    assert record.get("domain") is None and record.get("missing", "x") == "x"
+    assert dict(record) == record.to_dict()
+    with pytest.raises(KeyError):
+        record["tokens"]
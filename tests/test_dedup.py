@@ -0,0 +1,44 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("numpy")
+
+from modules.dedup import OCCURRENCES_COLUMN, collapse_lines, dedup_content, load_dedup_config, normalize_line  # noqa: E402
+
+BODY = (
+    "Expand partner channels in the mid-market segment to grow recurring revenue "
+    "across every region while keeping acquisition costs flat and churn low"
+)
+
+
+def test_page_numbers_fold_but_figures_do_not():
+    assert normalize_line("Page 3 of 20") == normalize_line("page 4 of 20")
+    assert normalize_line("- 3 -") == normalize_line("- 12 -")
+    assert normalize_line("Revenue grew 12%") != normalize_line("Revenue grew 40%")
+    assert normalize_line("Revenue grew 12%", fold_digits=True) == normalize_line("Revenue grew 40%", fold_digits=True)
+
+
+def test_collapse_counts_exact_and_near_duplicates():
+    lines = ["ACME Confidential", BODY, "acme  confidential", BODY + ".", "Page 1 of 2", "Page 2 of 2"]
+    kept, counts, stats = collapse_lines(lines)
+    assert kept == ["ACME Confidential", BODY, "Page 1 of 2"]
+    assert counts == [2, 2, 2]
+    assert stats == {"rows_in": 6, "rows_out": 3, "exact_duplicates": 2, "near_duplicates": 1}
+
+
+def test_lines_with_different_figures_are_kept():
+    long_line = BODY + " by {}%"
+    lines = [long_line.format(12), long_line.format(40)]
+    assert collapse_lines(lines)[0] == lines
+    assert collapse_lines(lines, fold_digits=True)[0] == lines[:1]
+
+
+def test_dedup_content_uses_private_column():
+    result = dedup_content(pd.DataFrame({"content": [BODY, BODY, "Closing note"]}))
+    assert list(result.columns) == ["content", OCCURRENCES_COLUMN]
+    assert result[OCCURRENCES_COLUMN].tolist() == [2, 1]
+    assert result.attrs["dedup_stats"]["rows_out"] == 2
+
+
+def test_dedup_is_off_by_default():
+    assert load_dedup_config()["enabled"] is False
@@ -0,0 +1,142 @@
+import math
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import modules.doc_store as doc_store  # noqa: E402
+import modules.retriever as retriever  # noqa: E402
+from modules.corpus import tokenize  # noqa: E402
+from modules.doc_store import DocumentStore  # noqa: E402
+
+UPLOADS = [
+    [{"title": "Credit Scoring Pilot", "description": "Score credit risk for thin-file borrowers.", "keywords": "credit"}],
+    [{"title": "Partner Resale", "description": "Grow revenue through reseller partners.", "keywords": ""},
+     {"title": "Churn Playbook", "description": "Reduce churn with credit offers.", "keywords": "churn"}],
+    [{"title": "Fraud Review", "description": "Queue risky payments for review.", "keywords": "fraud"}],
+]
+
+
+def _store(tmp_path, **kwargs):
+    store = DocumentStore(str(tmp_path / "store"), **kwargs)
+    for i, docs in enumerate(UPLOADS):
+        store.add_documents(docs, domain="fintech" if i != 1 else "", source=f"upload-{i}.pdf")
+    return store
+
+
+def _reference_scores(store, query):
+    """Plain-Python BM25 over every stored document."""
+    docs = [doc for segment in store._segments()[1] for doc in segment.read(range(len(segment)))]
+    tokens = [tokenize(d["title"]) + tokenize(d["description"]) + tokenize(d["keywords"]) for d in docs]
+    avg = sum(map(len, tokens)) / len(tokens)
+    scores = {}
+    for doc, doc_tokens in zip(docs, tokens):
+        score = 0.0
+        for token in set(tokenize(query)):
+            df = sum(token in t for t in tokens)
+            tf = doc_tokens.count(token)
+            if tf:
+                idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                norm = 1 - store.b + store.b * len(doc_tokens) / avg
+                score += idf * tf * (store.k1 + 1) / (tf + store.k1 * norm)
+        if score:
+            scores[doc["title"]] = score
+    return scores
+
+
+def test_search_matches_reference_bm25(tmp_path):
+    store = _store(tmp_path)
+    for query in ("credit", "credit risk churn", "payments review", "unknown"):
+        expected = _reference_scores(store, query)
+        results = store.search(query, top_k=10)
+        assert {doc["title"]: pytest.approx(score) for doc, score in results} == expected
+        assert all(score <= store.max_score(query) for _, score in results)
+
+
+def test_domain_filter_and_dedup(tmp_path):
+    store = _store(tmp_path)
+    # Untagged documents are visible to every domain
+    assert {d["title"] for d, _ in store.search("credit", domain="SaaS")} == {"Churn Playbook"}
+    assert {d["title"] for d, _ in store.search("credit", domain="FinTech")} == {"Credit Scoring Pilot", "Churn Playbook"}
+    generation = store.generation
+    assert store.add_documents(UPLOADS[0]) == {"added": 0, "duplicates": 1}
+    assert store.generation == generation  # nothing new, cached searches stay valid
+
+
+def test_generation_tracks_additions(tmp_path):
+    store = DocumentStore(str(tmp_path / "store"))
+    assert store.generation == 0
+    store.add_documents(UPLOADS[0])
+    store.add_documents(UPLOADS[1])
+    assert store.generation == 2
+    store.clear()
+    assert store.generation == 3 and len(store) == 0
+
+
+def test_compaction_defers_deleting_merged_segments(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    reader = DocumentStore(store.store_dir)
+    _, old_segments = reader._segments()  # a search that started before the merge
+    old_dirs = {os.path.basename(segment.path) for segment in old_segments}
+
+    store.compact()
+    manifest, segments = store._segments()
+    assert len(segments) == 1
+    assert {entry["name"] for entry in manifest["retired"]} == old_dirs
+    # The in-flight reader can still read every document
+    assert sum(len(segment.read(range(len(segment)))) for segment in old_segments) == 4
+    assert {d["title"] for d, _ in store.search("credit", top_k=10)} == {"Credit Scoring Pilot", "Churn Playbook"}
+
+    monkeypatch.setattr(doc_store, "RETIRED_GRACE_SECONDS", 0)
+    store.add_documents([{"title": "New", "description": "Fresh credit idea."}])
+    assert store._segments()[0]["retired"] == []
+    assert not old_dirs & set(os.listdir(store.store_dir))
+
+
+def test_automatic_compaction(tmp_path):
+    store = _store(tmp_path, max_segments=2)
+    assert len(store._segments()[1]) == 1
+    assert len(store) == 4
+
+
+def test_merged_search_normalizes_each_source(tmp_path, monkeypatch):
+    index = retriever.StrategyIndex({
+        "fintech": [{"title": "Credit Scoring", "description": "Score credit risk.", "steps": []}]
+        + [{"title": f"Other {i}", "description": "Unrelated playbook.", "steps": []} for i in range(30)],
+    })
+    store = _store(tmp_path)
+    monkeypatch.setattr(retriever, "_INDEX", index)
+    monkeypatch.setattr(doc_store, "_store", store)
+
+    results = retriever.search("credit scoring", domain="FinTech", top_k=5, include_uploads=True)
+    assert all(0 < score < 1 for _, score in results)
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+    static = {doc["title"]: score for doc, score in index.search("credit scoring", "FinTech")}
+    merged = {doc["title"]: score for doc, score in results}
+    assert merged["Credit Scoring"] == pytest.approx(static["Credit Scoring"] / index.max_score("credit scoring"))
+
+
+def test_retrieve_memo_follows_doc_store_generation(tmp_path, monkeypatch):
+    from modules.strategy_graph import build_analysis_graph
+
+    store = DocumentStore(str(tmp_path / "store"))
+    monkeypatch.setattr(doc_store, "_store", store)
+    monkeypatch.setattr(retriever, "_INDEX", retriever.StrategyIndex({"fintech": [
+        {"title": "Credit Scoring", "description": "Score credit risk.", "steps": []},
+    ]}))
+    graph = build_analysis_graph(use_doc_store=True)
+
+    def retrieve():
+        run = graph.run({"domain": "FinTech", "query": "fraud", "doc_store_generation": store.generation},
+                        targets=["retrieve"])
+        return [doc["title"] for doc in run["retrieve"]], run.memo_hits
+
+    assert retrieve() == (["Credit Scoring"], [])
+    assert retrieve()[1] == ["retrieve"]
+    store.add_documents(UPLOADS[2], domain="fintech")
+    assert retrieve() == (["Fraud Review"], [])
+
+
+def test_doc_store_is_off_by_default():
+    assert doc_store.load_doc_store_config()["enabled"] is False
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+import modules.etl_cache as etl_cache  # noqa: E402
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({"strategy": ["Credit", "Fraud", None], "budget": [1, 2, 3]})
+
+
+def test_cached_run_etl_hit_matches_miss(frame, tmp_path):
+    calls = []
+
+    def compute(source):
+        calls.append(1)
+        return etl_cache.spark_etl.run_etl(source)
+
+    first = etl_cache.cached_run_etl(frame, cache_dir=str(tmp_path), compute=compute)
+    second = etl_cache.cached_run_etl(frame, cache_dir=str(tmp_path), compute=compute)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_key_changes_with_content(frame):
+    key, _ = etl_cache.cache_key(frame)
+    changed = frame.copy()
+    changed.loc[0, "budget"] = 10
+    assert etl_cache.cache_key(changed)[0] != key
+    assert etl_cache.cache_key(frame.copy())[0] == key
+
+
+def test_evict_keeps_newest(tmp_path):
+    for i in range(4):
+        path = tmp_path / f"{i}.arrow"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (i, i))
+    assert etl_cache.evict(str(tmp_path), 250) == 2
+    assert sorted(os.listdir(tmp_path)) == ["2.arrow", "3.arrow"]
+
+
+def test_attrs_survive_cache_round_trip(frame, tmp_path):
+    def compute(source):
+        return etl_cache.spark_etl.run_etl_streaming(source, compact=True)
+
+    first = etl_cache.cached_run_etl(frame, cache_dir=str(tmp_path), compute=compute)
+    second = etl_cache.cached_run_etl(frame, cache_dir=str(tmp_path), compute=lambda source: pytest.fail("cache miss"))
+    assert first.attrs["memory_report"]
+    assert second.attrs == first.attrs
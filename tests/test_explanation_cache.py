@@ -0,0 +1,103 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from modules.explanation_cache import ExplanationCache, feature_grid  # noqa: E402
+
+
+class _Explainer:
+    """Deterministic stand-in for shap.TreeExplainer that counts explained rows."""
+
+    def __init__(self):
+        self.calls = []
+
+    def shap_values(self, vectors):
+        vectors = np.asarray(vectors, dtype=float)
+        self.calls.append(len(vectors))
+        return vectors * np.array([1.0, -2.0, 0.5])
+
+
+class _ModelVersion:
+    def __init__(self, version="v1"):
+        self.version = version
+        self.explainer = _Explainer()
+
+
+VECTORS = np.array([[3, 2, 3.5], [1, 0, 0.0], [3, 2, 3.5], [8, 10, 5.25]], dtype=float)
+
+
+def test_exact_mode_matches_fresh_values_and_counts_hits():
+    cache, model = ExplanationCache(3), _ModelVersion()
+    first = cache.contributions(model, VECTORS)
+    np.testing.assert_array_equal(first, model.explainer.shap_values(VECTORS))
+    assert model.explainer.calls[0] == 3  # the duplicate row is explained once
+    assert (cache.hits, cache.misses) == (0, 3)  # misses count distinct vectors explained
+
+    second = cache.contributions(model, VECTORS)
+    np.testing.assert_array_equal(second, first)
+    assert len(model.explainer.calls) == 2  # no new explainer call (the 2nd was our own check)
+    assert cache.hits == 4 and cache.hit_rate == pytest.approx(4 / 7)
+
+
+def test_entries_are_keyed_by_model_version():
+    cache = ExplanationCache(3)
+    cache.contributions(_ModelVersion("v1"), VECTORS[:1])
+    other = _ModelVersion("v2")
+    cache.contributions(other, VECTORS[:1])
+    assert other.explainer.calls == [1]
+    assert len(cache) == 2
+
+
+def test_lru_is_bounded():
+    cache, model = ExplanationCache(3, max_entries=2), _ModelVersion()
+    cache.contributions(model, VECTORS[:2])   # rows 0, 1
+    cache.contributions(model, VECTORS[:1])   # touch row 0
+    cache.contributions(model, VECTORS[3:])   # evicts row 1
+    assert len(cache) == 2
+    calls = len(model.explainer.calls)
+    cache.contributions(model, VECTORS[:1])
+    assert len(model.explainer.calls) == calls
+    cache.contributions(model, VECTORS[1:2])
+    assert len(model.explainer.calls) == calls + 1
+
+
+def test_quantized_mode_explains_grid_points():
+    cache, model = ExplanationCache(3, mode="quantized", steps=[0, 5, 0.5]), _ModelVersion()
+    result = cache.contributions(model, np.array([[3, 2, 3.4], [3, -2, 3.6]]))
+    snapped = np.array([[3, 0, 3.5], [3, 0, 3.5]])
+    np.testing.assert_array_equal(result, snapped * np.array([1.0, -2.0, 0.5]))
+    assert model.explainer.calls == [1]  # both rows (incl. -0.0) share one key
+
+
+def test_off_mode_always_calls_the_explainer():
+    cache, model = ExplanationCache(3, mode="off"), _ModelVersion()
+    cache.contributions(model, VECTORS)
+    cache.contributions(model, VECTORS)
+    assert model.explainer.calls == [4, 4]
+    assert len(cache) == 0
+
+    exact = ExplanationCache(3)
+    exact.contributions(model, VECTORS, mode="off")
+    assert len(exact) == 0
+
+
+def test_precompute_fills_observed_grid():
+    cache, model = ExplanationCache(3), _ModelVersion()
+    cache.contributions(model, VECTORS)
+    assert cache.precompute(model) == 3 * 3 * 3
+    calls = len(model.explainer.calls)
+    cache.contributions(model, np.array([[1, 10, 3.5]]))
+    assert len(model.explainer.calls) == calls
+    with pytest.raises(ValueError):
+        feature_grid([[0, 1]] * 3, max_points=4)
+
+
+def test_exact_cache_matches_shap(local_model):
+    pytest.importorskip("shap")
+    version = local_model.get()
+    cache = ExplanationCache(3)
+    cached = cache.contributions(version, VECTORS)
+    again = cache.contributions(version, VECTORS)
+    fresh = np.asarray(version.explainer.shap_values(VECTORS)).reshape(len(VECTORS), -1)
+    np.testing.assert_array_equal(cached, fresh)
+    np.testing.assert_array_equal(again, fresh)
@@ -0,0 +1,85 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+import modules.fallback_rules as fallback_rules  # noqa: E402
+from modules.fallback import fallback_predict  # noqa: E402
+from modules.fallback_rules import DEFAULT_FALLBACK_RULES, FallbackRules  # noqa: E402
+
+ROWS = [
+    {"query_length": 3, "keyword_hits": 1, "avg_steps": 2.5},
+    {"query_length": 4, "keyword_hits": 3, "avg_steps": 1.0},
+    {"query_length": 2, "keyword_hits": 1, "avg_steps": 1},      # score exactly 5
+    {"query_length": 6, "keyword_hits": 1, "avg_steps": 2},      # score exactly 10
+    {"query_length": 0.1, "keyword_hits": 0, "avg_steps": 0.2},  # float rounding shows in the text
+    {"keyword_hits": 2},
+    {},
+]
+
+
+def _scalar_rule(features):
+    """The original hard-coded fallback rule, kept as the reference."""
+    query_length = features.get("query_length", 0)
+    keyword_hits = features.get("keyword_hits", 0)
+    avg_steps = features.get("avg_steps", 0)
+
+    score = query_length + (2 * keyword_hits) + avg_steps
+
+    if score > 10:
+        prediction = " High Growth Potential"
+    elif score > 5:
+        prediction = " Moderate Strategic Fit"
+    else:
+        prediction = "Low Strategic Alignment"
+
+    explanation = (
+        f"(Fallback Mode)\n"
+        f"Prediction based on:\n"
+        f" • Query length: {query_length}\n"
+        f" • Keyword matches: {keyword_hits}\n"
+        f" • Average step count: {avg_steps}\n\n"
+        f"Weighted score = {score} → **{prediction}**"
+    )
+    return prediction, explanation
+
+
+def test_default_rules_match_scalar_rule():
+    result = FallbackRules.from_config(DEFAULT_FALLBACK_RULES).predict(ROWS)
+    for i, row in enumerate(ROWS):
+        assert result.row(i) == _scalar_rule(row)
+        assert fallback_predict(row) == _scalar_rule(row)
+
+
+def test_dataframe_and_array_inputs_match_dicts():
+    rules = FallbackRules.from_config(DEFAULT_FALLBACK_RULES)
+    from_dicts = rules.predict(ROWS)
+    from_frame = rules.predict(pd.DataFrame(ROWS))
+    matrix = np.array([[row.get(key, 0) for key in rules.keys] for row in ROWS], dtype=float)
+    from_array = rules.predict(matrix)
+
+    np.testing.assert_array_equal(from_frame.scores, from_dicts.scores)
+    np.testing.assert_array_equal(from_array.scores, from_dicts.scores)
+    assert list(from_frame.labels) == list(from_dicts.labels) == list(from_array.labels)
+    # Explanations show the frame's values (mixed or gappy columns are upcast to float)
+    complete = rules.predict(pd.DataFrame(ROWS[:2]))
+    assert [complete.row(i) for i in range(2)] == [_scalar_rule(row) for row in ROWS[:2]]
+
+
+def test_custom_rules():
+    rules = FallbackRules(
+        [{"key": "keyword_hits", "weight": 0.5}],
+        [{"above": 1, "label": "Some"}, {"above": 3, "label": "Many"}],
+        "None",
+    )
+    result = rules.predict([{"keyword_hits": 0}, {"keyword_hits": 4}, {"keyword_hits": 8}])
+    assert list(result.labels) == ["None", "Some", "Many"]
+    assert result.explanation(1).endswith("Weighted score = 2.0 → **Some**")
+
+
+def test_invalid_config_falls_back_to_defaults(monkeypatch):
+    monkeypatch.setattr(fallback_rules, "_rules", None)
+    monkeypatch.setattr(fallback_rules, "load_fallback_config", lambda: {"features": [{"weight": 2}]})
+    rules = fallback_rules.get_rules()
+    assert rules.keys == ["query_length", "keyword_hits", "avg_steps"]
+    assert rules.predict(ROWS).row(0) == _scalar_rule(ROWS[0])
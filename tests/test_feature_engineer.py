@@ -0,0 +1,67 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+import modules.feature_engineer as feature_engineer  # noqa: E402
+from modules.corpus import StrategyCorpus  # noqa: E402
+
+DOCS = [
+    {"title": "Credit Scoring", "description": "Score credit risk.", "steps": ["a", "b", "c"]},
+    {"title": "Fraud Detection", "description": "Flag CREDIT card fraud.", "steps": ["a"]},
+    {"title": "Payments", "description": None, "steps": "not a list"},
+    {"description": "No title here", "steps": []},
+]
+
+
+def test_vectorized_matches_row_path():
+    frame = pd.DataFrame(DOCS)
+    for query in ("credit", "Fraud", "", "missing"):
+        rows = feature_engineer.transform(query, "FinTech", frame, vectorized=False)
+        columns = feature_engineer.transform(query, "FinTech", frame, vectorized=True)
+        assert rows == columns
+
+
+def test_list_and_dataframe_agree():
+    from_list = feature_engineer.transform("credit", "SaaS", DOCS)
+    from_frame = feature_engineer.transform("credit", "SaaS", pd.DataFrame(DOCS))
+    assert from_list == from_frame
+    assert from_list["keyword_hits"] == 2
+    assert from_list["avg_steps"] == pytest.approx(1.0)
+    assert from_list["domain_SaaS"] == 1 and from_list["domain_FinTech"] == 0
+
+
+def test_corpus_records_match_dicts():
+    corpus = StrategyCorpus.from_corpora({"fintech": [d for d in DOCS if isinstance(d.get("steps"), list)]})
+    plain = [record.to_dict() for record in corpus.records]
+    assert feature_engineer.transform("credit", "FinTech", corpus) == feature_engineer.transform("credit", "FinTech", plain)
+
+
+def test_transform_many_matches_transform():
+    queries = ["credit", "  fraud ", None, "credit"]
+    many = feature_engineer.transform_many(queries, "EdTech", pd.DataFrame(DOCS))
+    assert many == [feature_engineer.transform(q, "EdTech", pd.DataFrame(DOCS)) for q in queries]
+
+
+def test_empty_docs():
+    for docs in ([], pd.DataFrame(), None):
+        features = feature_engineer.transform("credit", "EdTech", docs)
+        assert features["keyword_hits"] == 0
+        assert features["avg_steps"] == 0
+
+
+def test_user_occurrences_column_is_ignored():
+    frame = pd.DataFrame(DOCS)
+    with_user_column = frame.assign(occurrences=[1, None, "many", 2.5])
+    assert feature_engineer.transform("credit", "FinTech", with_user_column) == \
+        feature_engineer.transform("credit", "FinTech", frame)
+
+
+def test_dedup_occurrences_weight_steps():
+    from modules.dedup import OCCURRENCES_COLUMN
+
+    deduped = pd.DataFrame(DOCS[:2]).assign(**{OCCURRENCES_COLUMN: [1, 3]})
+    expanded = pd.DataFrame([DOCS[0]] + [DOCS[1]] * 3)
+    assert feature_engineer.transform("", "SaaS", deduped)["avg_steps"] == pytest.approx(
+        feature_engineer.transform("", "SaaS", expanded)["avg_steps"]
+    )
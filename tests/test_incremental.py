@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import modules.incremental as incremental  # noqa: E402
+import modules.spark_etl as spark_etl  # noqa: E402
+
+LINES = [f"Strategy line {i}. Grow revenue with partner channel {i}" for i in range(40)]
+
+
+def _content(lines):
+    return pd.DataFrame({"content": lines})
+
+
+def test_incremental_matches_full_etl(tmp_path):
+    first, stats = incremental.run_etl_incremental(_content(LINES), "deck.pdf", str(tmp_path), "session-a")
+    assert stats == {"rows": 40, "new_rows": 40, "reused_rows": 0}
+
+    revised = LINES[:30] + ["A brand new closing line"]
+    result, stats = incremental.run_etl_incremental(_content(revised), "deck.pdf", str(tmp_path), "session-a")
+    assert stats == {"rows": 31, "new_rows": 1, "reused_rows": 30}
+    pd.testing.assert_frame_equal(result, spark_etl.run_etl(_content(revised)))
+
+
+def test_stores_are_scoped_by_session(tmp_path):
+    incremental.run_etl_incremental(_content(LINES), "deck.pdf", str(tmp_path), "session-a")
+    _, stats = incremental.run_etl_incremental(_content(LINES), "deck.pdf", str(tmp_path), "session-b")
+    assert stats["reused_rows"] == 0
+    a = incremental.RowFeatureStore("deck.pdf", str(tmp_path), "session-a")
+    b = incremental.RowFeatureStore("deck.pdf", str(tmp_path), "session-b")
+    assert a.path != b.path and os.path.exists(a.path) and os.path.exists(b.path)
+
+
+def test_unchanged_upload_does_not_rewrite_store(tmp_path, monkeypatch):
+    incremental.run_etl_incremental(_content(LINES), "deck.pdf", str(tmp_path))
+
+    def fail(self, features):
+        raise AssertionError("store rewritten without new rows")
+    monkeypatch.setattr(incremental.RowFeatureStore, "save", fail)
+
+    result, stats = incremental.run_etl_incremental(_content(LINES[:20]), "deck.pdf", str(tmp_path))
+    assert stats == {"rows": 20, "new_rows": 0, "reused_rows": 20}
+    pd.testing.assert_frame_equal(result, spark_etl.run_etl(_content(LINES[:20])))
+
+
+def test_least_recently_used_stores_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental, "MAX_STORES", 2)
+    for i in range(3):
+        incremental.run_etl_incremental(_content(LINES[:5]), "deck.pdf", str(tmp_path), f"session-{i}")
+        path = incremental.RowFeatureStore("deck.pdf", str(tmp_path), f"session-{i}").path
+        os.utime(path, (i, i))
+    incremental._prune_stores(str(tmp_path), incremental.MAX_STORES)
+    remaining = {entry.name for entry in os.scandir(tmp_path)}
+    assert os.path.basename(incremental.RowFeatureStore("deck.pdf", str(tmp_path), "session-0").path) not in remaining
+    assert len(remaining) == 2
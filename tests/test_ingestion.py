@@ -0,0 +1,93 @@
+import io
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pdfplumber")
+
+import modules.ingestion as ingestion  # noqa: E402
+
+
+def make_pdf(pages):
+    """Minimal text PDF: one page per list of lines (Helvetica, no compression)."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        text = " 0 -14 Td ".join(f"({line}) Tj" for line in lines)
+        stream = f"BT /F1 12 Tf 72 720 Td {text} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    out.write("".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+PAGES = [[f"Page {i} heading", f"Body text for page {i}"] for i in range(12)]
+EXPECTED = [line for page in PAGES for line in page]
+
+
+class Upload(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_parallel_pdf_matches_serial():
+    data = make_pdf(PAGES)
+    assert list(ingestion.iter_pdf_lines(data, workers=1)) == EXPECTED
+    try:
+        assert list(ingestion.iter_pdf_lines(data, workers=3)) == EXPECTED
+        pool = ingestion._pools[3]
+        assert list(ingestion.iter_pdf_lines(make_pdf(PAGES[::-1]), workers=3))[:2] == PAGES[-1]
+        assert ingestion._pools[3] is pool  # reused across documents
+    finally:
+        ingestion.shutdown_pools()
+
+
+def test_line_cache_round_trip(cache_dir, monkeypatch):
+    upload = Upload(make_pdf(PAGES[:2]), "board.pdf")
+    assert list(ingestion.iter_document_lines(upload, workers=1)) == EXPECTED[:4]
+    assert len(os.listdir(cache_dir)) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached document was parsed again")
+
+    monkeypatch.setattr(ingestion, "iter_pdf_lines", fail)
+    assert list(ingestion.iter_document_lines(upload, workers=1)) == EXPECTED[:4]
+
+
+def test_line_cache_is_bounded(cache_dir, monkeypatch):
+    monkeypatch.setattr(ingestion, "load_ingestion_config", lambda: {"cache_max_bytes": 200})
+    for i in range(5):
+        list(ingestion.iter_document_lines(Upload(make_pdf([[f"Document {i} line {j}" for j in range(3)]]), "a.pdf")))
+    files = os.listdir(cache_dir)
+    assert 1 <= len(files) < 5
+    assert sum(os.path.getsize(cache_dir / name) for name in files) <= 200
+
+
+def test_parse_uploaded_file(cache_dir):
+    df = ingestion.parse_uploaded_file(Upload(make_pdf(PAGES[:1]), "notes.pdf"), dedup=False)
+    assert df["content"].tolist() == EXPECTED[:2]
+
+    csv = ingestion.parse_uploaded_file(Upload(b"a,b\n1,2\n", "table.csv"))
+    assert csv.to_dict(orient="records") == [{"a": 1, "b": 2}]
+    assert ingestion.parse_uploaded_file(Upload(b"", "image.png")) is None
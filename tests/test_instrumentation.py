@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+from modules.instrumentation import CallbackExporter, Exporter, FileExporter, MetricsRegistry
+
+
+def test_exporter_is_abstract():
+    with pytest.raises(TypeError):
+        Exporter()
+
+
+def test_observe_does_not_export_inline():
+    registry = MetricsRegistry()
+    exported = threading.Event()
+    callers = []
+
+    def callback(snapshot):
+        callers.append(threading.current_thread().name)
+        exported.set()
+
+    registry.add_exporter(CallbackExporter(callback, interval=0.05))
+    try:
+        registry.observe("Prediction", 0.002)
+        assert exported.wait(2)
+        assert set(callers) == {"metrics-export"}
+    finally:
+        registry.stop_exporting(flush=False)
+
+
+def test_stop_exporting_flushes(tmp_path):
+    registry = MetricsRegistry()
+    path = tmp_path / "metrics.prom"
+    registry.add_exporter(FileExporter(str(path), "prometheus", interval=3600))
+    registry.observe("Prediction", 0.002, fallback=True)
+    registry.stop_exporting()
+    text = path.read_text()
+    assert 'stratomind_stage_fallbacks_total{label="Prediction"} 1' in text
+    assert registry.snapshot()["Prediction"]["calls"] == 1
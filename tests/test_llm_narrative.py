@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+import modules.llm_narrative as llm_narrative
+from modules.llm_narrative import NarrativeCache, StubBackend
+
+DOCS = [
+    {"title": "Freemium Funnel", "description": "Convert free users.", "steps": ["Gate features", "Nudge upgrades"]},
+    {"title": "Partner Channel", "description": "Resell through partners.", "steps": []},
+]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = NarrativeCache(str(tmp_path / "narratives"), max_entries=3)
+    monkeypatch.setattr(llm_narrative, "_cache", cache)
+    return cache
+
+
+def test_stub_streams_tokens_in_order(cache):
+    tokens = list(llm_narrative.stream_narrative(DOCS, "grow revenue", backend=StubBackend(), use_cache=False))
+    text = "".join(tokens)
+    assert len(tokens) > 5
+    assert text.startswith("To advance 'grow revenue', prioritise Freemium Funnel, then Partner Channel.")
+    assert text == llm_narrative.generate_narrative(DOCS, "grow revenue", backend=StubBackend(), use_cache=False)
+
+    limited = list(llm_narrative.stream_narrative(DOCS, "grow revenue", backend=StubBackend(), use_cache=False, max_tokens=3))
+    assert limited == tokens[:3]
+
+
+def test_cache_miss_then_hit_replays_the_same_text(cache):
+    first = "".join(llm_narrative.stream_narrative(DOCS, "grow revenue", backend=StubBackend(), max_tokens=50))
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # Same prompt up to case and whitespace
+    second = "".join(llm_narrative.stream_narrative(DOCS, "Grow   revenue", backend=StubBackend(), max_tokens=50))
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second == first
+    assert cache.hit_rate == 0.5
+
+
+def test_generation_settings_are_part_of_the_key(cache):
+    prompt = llm_narrative.build_prompt(DOCS, "grow revenue")
+    cache.put(prompt, "model", 400, 0.3, "long answer")
+    assert cache.get(prompt, "model", 400, 0.3) == "long answer"
+    assert cache.get(prompt, "model", 50, 0.3) is None
+    assert cache.get(prompt, "model", 400, 0.7) is None
+    assert cache.get(prompt, "other-model", 400, 0.3) is None
+
+    truncated = "".join(llm_narrative.stream_narrative(DOCS, "grow revenue", backend=StubBackend(), max_tokens=3))
+    full = "".join(llm_narrative.stream_narrative(DOCS, "grow revenue", backend=StubBackend(), max_tokens=400))
+    assert full.startswith(truncated) and len(full) > len(truncated)
+
+
+def test_evict_drops_least_recently_used(cache):
+    for i in range(3):
+        cache.put(f"prompt {i}", "model", 10, 0.0, f"answer {i}")
+        os.utime(cache._path(f"prompt {i}", "model", 10, 0.0), (i, i))
+
+    # Reading prompt 0 makes it the most recently used
+    assert cache.get("prompt 0", "model", 10, 0.0) == "answer 0"
+    cache.put("prompt 3", "model", 10, 0.0, "answer 3")
+
+    assert len([name for name in os.listdir(cache.cache_dir) if name.endswith(".txt")]) == 3
+    assert cache.get("prompt 1", "model", 10, 0.0) is None
+    assert cache.get("prompt 0", "model", 10, 0.0) == "answer 0"
+    assert cache.get("prompt 3", "model", 10, 0.0) == "answer 3"
@@ -0,0 +1,83 @@
+import os
+import shutil
+
+import pytest
+
+np = pytest.importorskip("numpy")
+xgb = pytest.importorskip("xgboost")
+
+from benchmarks.synthetic import train_booster  # noqa: E402
+from modules.model_registry import ModelRegistry  # noqa: E402
+
+ROW = np.array([[3.0, 2.0, 3.5]], dtype=np.float32)
+
+
+@pytest.fixture(scope="module")
+def other_model_path(tmp_path_factory):
+    """A second booster with different weights."""
+    return train_booster(str(tmp_path_factory.mktemp("other") / "model.json"), seed=1)
+
+
+@pytest.fixture
+def registry(model_path, tmp_path):
+    path = tmp_path / "model.json"
+    shutil.copy(model_path, path)
+    return ModelRegistry(str(path))
+
+
+def _swap(source, target):
+    """Replaces `target` atomically, as a deploy would."""
+    staged = target + ".tmp"
+    shutil.copy(source, staged)
+    os.replace(staged, target)
+
+
+def test_loads_lazily(registry):
+    assert registry.loaded is None
+    current = registry.get()
+    assert registry.loaded is current
+    assert registry.get() is current
+
+
+def test_reloads_when_content_changes(registry, other_model_path):
+    old = registry.get()
+    old_score = old.booster.inplace_predict(ROW)
+
+    _swap(other_model_path, registry.path)
+    new = registry.get()
+
+    assert new.version != old.version
+    assert new.booster is not old.booster
+    # The snapshot taken before the swap is untouched
+    assert registry.loaded is new
+    assert old.booster.inplace_predict(ROW).tolist() == old_score.tolist()
+    assert new.booster.inplace_predict(ROW).tolist() != old_score.tolist()
+
+
+def test_touch_keeps_version_and_warm_explainer(registry):
+    pytest.importorskip("shap")
+    current = registry.get()
+    explainer = current.explainer
+    assert current.explainer is explainer
+
+    stat = os.stat(registry.path)
+    os.utime(registry.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert registry.get() is current
+    assert registry.get().explainer is explainer
+
+
+def test_missing_file_keeps_serving_loaded_version(registry, tmp_path):
+    current = registry.get()
+    os.remove(registry.path)
+    assert registry.get() is current
+
+    with pytest.raises(FileNotFoundError):
+        ModelRegistry(str(tmp_path / "missing.json")).get()
+
+
+def test_reload(registry, other_model_path):
+    current = registry.get()
+    assert registry.reload() is current
+
+    _swap(other_model_path, registry.path)
+    assert registry.reload().version != current.version
@@ -0,0 +1,124 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("xgboost")
+pytest.importorskip("shap")
+
+import modules.predictor as predictor  # noqa: E402
+from modules.model_registry import ModelRegistry  # noqa: E402
+
+ROWS = [
+    {"query_length": 3, "keyword_hits": 2, "avg_steps": 3.5},
+    {"query_length": 1, "keyword_hits": 0, "avg_steps": 0.0},
+    {"query_length": 8, "keyword_hits": 10, "avg_steps": 5.25},
+    {"query_length": 2, "avg_steps": 1.0},  # missing keyword_hits → 0
+]
+
+
+def test_predict_batch_matches_row_by_row(local_model, monkeypatch):
+    monkeypatch.setattr(predictor, "SINGLE_ROW_FAST_PATH", False)
+    batch = predictor.predict_batch(ROWS, explain=False)
+    singles = [predictor.predict_batch([row], explain=False) for row in ROWS]
+
+    np.testing.assert_array_equal(batch["scores"], np.concatenate([s["scores"] for s in singles]))
+    assert list(batch["labels"]) == [s["labels"][0] for s in singles]
+    assert batch["contributions"] is None
+    assert batch["model_version"] == local_model.get().version
+
+
+PARITY_ROWS = ROWS + [
+    {"query_length": float("nan"), "keyword_hits": 4, "avg_steps": 2.0},  # NaN → missing
+    {"query_length": 5, "keyword_hits": float("nan"), "avg_steps": float("nan")},
+    {},  # every feature missing → 0
+    {"query_length": 0, "keyword_hits": 0, "avg_steps": 0.0},
+    {"query_length": 40, "keyword_hits": 123, "avg_steps": 17.123456789},  # not exact in float32
+    {"query_length": 7, "keyword_hits": 3, "avg_steps": 2.3333333333333335, "raw_query": "ignored"},
+]
+
+
+def test_single_row_fast_path_matches_dmatrix(local_model, monkeypatch):
+    monkeypatch.setattr(predictor, "SINGLE_ROW_FAST_PATH", False)
+    dmatrix = [predictor.predict_batch([row], explain=False)["scores"] for row in PARITY_ROWS]
+    full = predictor.predict_batch(PARITY_ROWS, explain=False)["scores"]
+    dmatrix_predictions = [predictor.predict(row) for row in PARITY_ROWS]
+
+    monkeypatch.setattr(predictor, "SINGLE_ROW_FAST_PATH", True)
+    fast = [predictor.predict_batch([row], explain=False)["scores"] for row in PARITY_ROWS]
+    fast_predictions = [predictor.predict(row) for row in PARITY_ROWS]
+
+    # Bit-for-bit, including rows with NaN and missing features
+    for row, expected, actual in zip(PARITY_ROWS, dmatrix, fast):
+        assert actual.dtype == np.float32
+        assert actual.view(np.uint32).tolist() == expected.astype(np.float32).view(np.uint32).tolist(), row
+    np.testing.assert_array_equal(np.concatenate(fast), full)
+    assert fast_predictions == dmatrix_predictions
+
+
+def test_single_row_fast_path_falls_back_to_dmatrix(local_model, monkeypatch):
+    from modules.instrumentation import metrics
+    from modules.model_registry import SingleRowScorer
+
+    expected = predictor.predict_batch([ROWS[0]], explain=False)["scores"]
+
+    def broken(self, vector):
+        raise RuntimeError("inplace_predict unsupported")
+    monkeypatch.setattr(SingleRowScorer, "score", broken)
+    before = metrics.snapshot().get("Single-row Prediction", {"fallbacks": 0})["fallbacks"]
+
+    np.testing.assert_array_equal(predictor.predict_batch([ROWS[0]], explain=False)["scores"], expected)
+    assert metrics.snapshot()["Single-row Prediction"]["fallbacks"] == before + 1
+
+
+def test_predict_batch_accepts_dataframe(local_model):
+    from_dicts = predictor.predict_batch(ROWS, explain=False)
+    from_frame = predictor.predict_batch(pd.DataFrame(ROWS), explain=False)
+
+    np.testing.assert_array_equal(from_dicts["vectors"], from_frame["vectors"])
+    np.testing.assert_array_equal(from_dicts["scores"], from_frame["scores"])
+    assert from_frame["vectors"][3].tolist() == [2.0, 0.0, 1.0]
+
+
+def test_predict_batch_labels_follow_thresholds(local_model):
+    batch = predictor.predict_batch(ROWS, explain=False)
+    assert list(batch["labels"]) == [predictor._label_for(score) for score in batch["scores"]]
+
+
+def test_predict_batch_explanations(local_model):
+    batch = predictor.predict_batch(ROWS, shap_mode="off")
+    assert batch["contributions"].shape == (len(ROWS), len(predictor.FEATURE_KEYS))
+    assert batch["shap_error"] is None
+
+    text = predictor.explain_row(batch, 0)
+    assert text.startswith(f"Prediction: **{batch['labels'][0]}**")
+    assert all(f" • {key}:" in text for key in predictor.FEATURE_KEYS)
+
+
+def test_predict_returns_label_and_explanation(local_model):
+    label, explanation = predictor.predict(ROWS[0])
+    batch = predictor.predict_batch([ROWS[0]])
+    assert label == batch["labels"][0]
+    assert explanation == predictor.explain_row(batch, 0)
+
+
+def test_predict_reports_missing_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(predictor, "registry", ModelRegistry(str(tmp_path / "missing.json")))
+    label, explanation = predictor.predict(ROWS[0])
+    assert label == "⚠️ Prediction Failed"
+    assert explanation.startswith("Model error:")
+
+
+def test_missing_model_fails_before_importing_xgboost(tmp_path, monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def guarded(name, *args, **kwargs):
+        if name == "xgboost":
+            raise AssertionError("xgboost imported in fallback mode")
+        return real_import(name, *args, **kwargs)
+    monkeypatch.setattr(predictor, "registry", ModelRegistry(str(tmp_path / "missing.json")))
+    monkeypatch.setattr(builtins, "__import__", guarded)
+
+    with pytest.raises(FileNotFoundError):
+        predictor.predict_batch(ROWS)
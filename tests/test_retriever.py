@@ -0,0 +1,58 @@
+import pytest
+
+import modules.retriever as retriever
+from modules.corpus import load_corpus
+
+CORPORA = {
+    "fintech": [
+        {"title": "Credit Scoring", "description": "Score credit risk with alternative data.", "steps": ["a", "b"]},
+        {"title": "Fraud Detection", "description": "Flag suspicious transactions in real time.", "steps": ["a"]},
+        {"title": "Payments Platform", "description": "Embedded payments for partners.", "steps": []},
+    ],
+    "saas": [
+        {"title": "Churn Reduction", "description": "Predict churn and intervene; credit offers.", "steps": ["a"]},
+    ],
+}
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = retriever.StrategyIndex(CORPORA)
+    monkeypatch.setattr(retriever, "_INDEX", index)
+    return index
+
+
+def test_search_ranks_by_bm25(index):
+    results = index.search("credit scoring")
+    titles = [doc["title"] for doc, _ in results]
+    assert titles[0] == "Credit Scoring"
+    assert "Churn Reduction" in titles  # matches "credit" only
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_domain_filter_and_top_k(index):
+    assert [doc["title"] for doc, _ in index.search("credit", domain="SaaS")] == ["Churn Reduction"]
+    assert len(index.search("credit", top_k=1)) == 1
+    assert index.search("nonexistent-term") == []
+
+
+def test_get_relevant_docs(index):
+    ranked = retriever.get_relevant_docs("FinTech", "fraud")
+    assert [doc["title"] for doc in ranked] == ["Fraud Detection"]
+
+    # No match: the full domain list, in library order
+    assert [doc["title"] for doc in retriever.get_relevant_docs("FinTech", "zzz")] == [
+        "Credit Scoring", "Fraud Detection", "Payments Platform"
+    ]
+
+
+def test_get_relevant_docs_unknown_domain(index):
+    docs = retriever.get_relevant_docs("Biotech")
+    assert docs == [{"title": "N/A", "description": "No strategies found for Biotech", "steps": []}]
+
+
+def test_shipped_corpus_loads(tmp_path):
+    index = retriever.StrategyIndex(load_corpus(compact_path=str(tmp_path / "corpus.pkl")))
+    assert {"edtech", "fintech", "saas"} <= set(index.domain_docs)
+    assert index.search("credit", domain="FinTech")
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+import modules.service as service  # noqa: E402
+
+FEATURES = {
+    "query_length": 3, "keyword_hits": 1, "avg_steps": 2.0,
+    "domain_EdTech": 0, "domain_FinTech": 1, "domain_SaaS": 0,
+    "raw_query": "credit risk growth", "raw_domain": "FinTech",
+}
+
+
+def _fake_predict_batch(calls):
+    def predict_batch(features_list):
+        calls.append(len(features_list))
+        return {"labels": [f"label-{i}" for i in range(len(features_list))]}
+    return predict_batch
+
+
+def test_micro_batcher_coalesces_concurrent_requests(monkeypatch):
+    calls = []
+    monkeypatch.setattr(service.predictor, "predict_batch", _fake_predict_batch(calls))
+    monkeypatch.setattr(service.predictor, "explain_row", lambda result, i: f"row {i}")
+
+    async def scenario():
+        batcher = service.MicroBatcher(max_batch_size=4, max_wait_ms=50)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(FEATURES) for _ in range(10))), batcher
+        finally:
+            await batcher.stop()
+
+    outcomes, batcher = asyncio.run(scenario())
+    assert calls == [4, 4, 2]
+    assert [label for label, _, _ in outcomes] == [f"label-{i}" for i in (0, 1, 2, 3, 0, 1, 2, 3, 0, 1)]
+    assert not any(used_fallback for _, _, used_fallback in outcomes)
+    assert batcher.rows == 10
+    assert batcher.histogram() == {"2": 1, "3-4": 2}
+
+
+def test_micro_batcher_falls_back_when_model_fails(monkeypatch):
+    def broken(features_list):
+        raise RuntimeError("model missing")
+    monkeypatch.setattr(service.predictor, "predict_batch", broken)
+
+    async def scenario():
+        batcher = service.MicroBatcher(max_batch_size=8, max_wait_ms=1)
+        batcher.start()
+        try:
+            return await asyncio.gather(batcher.submit(FEATURES), batcher.submit(FEATURES)), batcher
+        finally:
+            await batcher.stop()
+
+    outcomes, batcher = asyncio.run(scenario())
+    assert all(used_fallback for _, _, used_fallback in outcomes)
+    assert batcher.fallback_rows == 2
+
+
+def test_analyze_runs_pipeline_off_the_event_loop(monkeypatch):
+    calls = []
+    loop_threads = []
+    monkeypatch.setattr(service.predictor, "predict_batch", _fake_predict_batch(calls))
+    monkeypatch.setattr(service.predictor, "explain_row", lambda result, i: "explained")
+
+    def slow_pipeline(domain, query, docs, label):
+        loop_threads.append(threading.current_thread().name)
+        time.sleep(0.3)
+        return f"{domain}:{label}"
+    monkeypatch.setattr(service.strategy_graph, "run_strategy_pipeline", slow_pipeline)
+
+    async def scenario():
+        batcher = service.MicroBatcher(max_batch_size=8, max_wait_ms=1)
+        batcher.start()
+        app = service.StrategyService(batcher, pipeline_workers=2)
+        try:
+            body = json.dumps({"domain": "FinTech", "query": "credit"}).encode()
+            analyze = asyncio.ensure_future(app.dispatch("POST", "/analyze", body))
+            await asyncio.sleep(0.05)
+            # The loop stays responsive while the narrative is being built
+            start = time.perf_counter()
+            health = await app.dispatch("GET", "/health", b"")
+            health_latency = time.perf_counter() - start
+            return await analyze, health, health_latency
+        finally:
+            await batcher.stop()
+            app.close()
+
+    (status, payload), health, health_latency = asyncio.run(scenario())
+    assert status == 200
+    assert payload["strategy"] == "FinTech:label-0"
+    assert payload["fallback"] is False
+    assert health[1] == {"status": "ok"}
+    assert health_latency < 0.1
+    assert loop_threads and loop_threads[0].startswith("service-pipeline")
+
+
+def test_dispatch_rejects_bad_requests():
+    async def scenario():
+        batcher = service.MicroBatcher()
+        batcher.start()
+        app = service.StrategyService(batcher, pipeline_workers=1)
+        try:
+            return [
+                await app.dispatch("POST", "/predict", b"not json"),
+                await app.dispatch("POST", "/predict", b"[1, 2]"),
+                await app.dispatch("GET", "/nowhere", b""),
+            ], app.metrics()
+        finally:
+            await batcher.stop()
+            app.close()
+
+    responses, snapshot = asyncio.run(scenario())
+    assert [status for status, _ in responses] == [400, 400, 404]
+    assert snapshot["requests"] == {"/predict": 2, "/nowhere": 1}
+
+
+def test_bad_feature_row_is_rejected_and_service_keeps_serving(monkeypatch):
+    calls = []
+    monkeypatch.setattr(service.predictor, "predict_batch", _fake_predict_batch(calls))
+    monkeypatch.setattr(service.predictor, "explain_row", lambda result, i: "explained")
+
+    async def scenario():
+        batcher = service.MicroBatcher(max_batch_size=8, max_wait_ms=1)
+        batcher.start()
+        app = service.StrategyService(batcher, pipeline_workers=1)
+        try:
+            bad = await app.dispatch("POST", "/predict", json.dumps({"features": {"query_length": "abc"}}).encode())
+            coerced = await app.dispatch("POST", "/predict", json.dumps({"features": {"query_length": "3"}}).encode())
+            good = await asyncio.wait_for(
+                app.dispatch("POST", "/predict", json.dumps({"features": FEATURES}).encode()), 2
+            )
+            return bad, coerced, good
+        finally:
+            await batcher.stop()
+            app.close()
+
+    bad, coerced, good = asyncio.run(scenario())
+    assert bad[0] == 400 and "query_length" in bad[1]["error"]
+    assert coerced[0] == 200 and good[0] == 200
+    assert good[1]["prediction"] == "label-0"
+    assert calls == [1, 1]
+
+
+def test_failed_batch_does_not_stop_the_batcher(monkeypatch):
+    def broken(features_list):
+        raise RuntimeError("model missing")
+    monkeypatch.setattr(service.predictor, "predict_batch", broken)
+
+    async def scenario():
+        batcher = service.MicroBatcher(max_batch_size=8, max_wait_ms=1)
+        batcher.start()
+        try:
+            # Unvalidated row: the fallback rules raise too
+            with pytest.raises(ValueError):
+                await asyncio.wait_for(batcher.submit({"query_length": "abc"}), 2)
+            return await asyncio.wait_for(batcher.submit(FEATURES), 2)
+        finally:
+            await batcher.stop()
+
+    label, explanation, used_fallback = asyncio.run(scenario())
+    assert used_fallback and explanation.startswith("(Fallback Mode)")
@@ -0,0 +1,85 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+import modules.spark_etl as spark_etl  # noqa: E402
+
+
+def _config(**overrides):
+    return {**spark_etl.DEFAULT_ETL_CONFIG, **overrides}
+
+
+@pytest.fixture
+def frame():
+    rows = 300
+    return pd.DataFrame({
+        "Strategy Name": [f"Strategy {i % 7}" for i in range(rows)],
+        "Domain": [["EdTech", "FinTech", "SaaS"][i % 3] for i in range(rows)],
+        "Notes": [None if i % 5 == 0 else f"note {i}" for i in range(rows)],
+        "Budget": np.arange(rows, dtype=np.int64) * 1_000,
+    })
+
+
+def test_run_etl_applies_clean_nulls_but_not_config_max_lines(frame, monkeypatch):
+    frame.loc[3] = None  # fully empty row
+    monkeypatch.setattr(spark_etl, "load_etl_config", lambda: _config(max_lines=10, clean_nulls=True))
+    result = spark_etl.run_etl(frame)
+    assert len(result) == len(frame) - 1
+    assert list(result.columns) == ["strategy_name", "domain", "notes", "budget"]
+    assert len(spark_etl.run_etl(frame, max_lines=10)) == 9
+    assert len(spark_etl.run_etl_streaming(frame)) == 9
+
+    monkeypatch.setattr(spark_etl, "load_etl_config", lambda: _config(max_lines=10, clean_nulls=False))
+    assert len(spark_etl.run_etl(frame)) == len(frame)
+
+
+def test_run_etl_matches_streaming(frame, tmp_path, monkeypatch):
+    path = tmp_path / "upload.csv"
+    frame.to_csv(path, index=False)
+    monkeypatch.setattr(spark_etl, "load_etl_config", lambda: _config(max_lines=250, chunk_size=64))
+
+    full = spark_etl.run_etl(str(path), max_lines=250)
+    streamed = spark_etl.run_etl_streaming(str(path))
+    pd.testing.assert_frame_equal(full.reset_index(drop=True), streamed)
+
+
+def test_streaming_compacts_once(frame, monkeypatch):
+    # Chunk 1 has few distinct notes (category), later chunks many (string)
+    frame["Notes"] = ["same"] * 64 + [f"note {i}" for i in range(len(frame) - 64)]
+    monkeypatch.setattr(spark_etl, "load_etl_config", lambda: _config(compact_dtypes=True, chunk_size=64))
+
+    streamed = spark_etl.run_etl_streaming(frame)
+    full = spark_etl.run_etl(frame)
+    pd.testing.assert_frame_equal(full, streamed)
+    assert streamed["notes"].dtype != object
+    assert {row["column"] for row in streamed.attrs["memory_report"]} == set(streamed.columns)
+
+
+def test_streaming_reducer(frame, monkeypatch):
+    monkeypatch.setattr(spark_etl, "load_etl_config", lambda: _config(chunk_size=50))
+    total = spark_etl.run_etl_streaming(frame, reducer=lambda acc, chunk: acc + int(chunk["budget"].sum()), initial=0)
+    assert total == int(frame["Budget"].sum())
+
+
+def test_compact_dtypes_keeps_values(frame):
+    compacted, report = spark_etl.compact_dtypes(frame)
+    assert isinstance(compacted["Domain"].dtype, pd.CategoricalDtype)
+    assert compacted["Budget"].dtype == np.int32
+    assert compacted["Notes"].isna().sum() == frame["Notes"].isna().sum()
+    assert compacted.astype(object).where(compacted.notna(), None).equals(
+        frame.astype(object).where(frame.notna(), None)
+    )
+    assert sum(r["bytes_after"] for r in report) < sum(r["bytes_before"] for r in report)
+
+
+def test_null_content_is_treated_as_empty(monkeypatch):
+    monkeypatch.setattr(spark_etl, "load_etl_config", lambda: _config(clean_nulls=False))
+    content = pd.DataFrame({"content": ["Revenue grew. Strong quarter", None]})
+    result = spark_etl.run_etl(content)
+    assert result["content"].tolist() == ["Revenue grew. Strong quarter", ""]
+    assert result.loc[1, "word_count"] == 0
+
+    # mapInPandas body, fed the Arrow batches Spark would pass
+    batches = list(spark_etl._text_features_partition([content.copy()]))
+    pd.testing.assert_frame_equal(batches[0][result.columns], result)
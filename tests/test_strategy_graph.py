@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from modules.instrumentation import metrics  # noqa: E402
+from modules.strategy_graph import Node, StrategyGraph, _prediction_node, fingerprint  # noqa: E402
+
+
+def _sleepy(seconds, value):
+    def func(**_):
+        time.sleep(seconds)
+        return value
+    return func
+
+
+def test_independent_nodes_run_concurrently():
+    graph = StrategyGraph([
+        Node("a", _sleepy(0.2, 1), deps=("x",)),
+        Node("b", _sleepy(0.2, 2), deps=("x",)),
+        Node("total", lambda a, b: a + b, deps=("a", "b")),
+    ], max_workers=2)
+    run = graph.run({"x": 0})
+    assert run["total"] == 3
+    assert run.wall_seconds < 0.35
+    assert run.critical_path_seconds == pytest.approx(0.2, abs=0.1)
+
+
+def test_outputs_are_memoized_by_input_keys():
+    calls = []
+    graph = StrategyGraph([
+        Node("double", lambda x: calls.append(x) or x * 2, deps=("x",)),
+        Node("inc", lambda double, y: double + y, deps=("double", "y")),
+    ])
+    assert graph.run({"x": 2, "y": 1})["inc"] == 5
+    second = graph.run({"x": 2, "y": 10})
+    assert second["inc"] == 14
+    assert second.memo_hits == ["double"]
+    assert calls == [2]
+
+    # Caller-supplied keys replace fingerprints
+    third = graph.run({"x": 3, "y": 10}, input_keys={"x": fingerprint(2)})
+    assert third["double"] == 4 and "double" in third.memo_hits
+
+
+def test_timeouts_and_errors_route_to_fallbacks():
+    release = threading.Event()
+
+    def boom(x):
+        raise RuntimeError("broken")
+
+    graph = StrategyGraph([
+        Node("slow", lambda x: release.wait(5) and "late", deps=("x",), timeout=0.1, fallback="fallback"),
+        Node("broken", boom, deps=("x",), fallback=lambda x: f"recovered {x}"),
+    ], max_workers=2)
+    try:
+        run = graph.run({"x": 1})
+    finally:
+        release.set()
+    assert run["slow"] == "fallback"
+    assert run["broken"] == "recovered 1"
+    assert run.fallbacks["slow"].startswith("timeout")
+    assert run.fallbacks["broken"] == "error: broken"
+
+    # Fallback outputs are not memoized
+    assert graph.run({"x": 1}).memo_hits == []
+
+
+def test_errors_without_fallback_propagate():
+    graph = StrategyGraph([Node("broken", lambda x: 1 / 0, deps=("x",))])
+    with pytest.raises(ZeroDivisionError):
+        graph.run({"x": 1})
+
+
+def test_cycles_and_missing_inputs_are_rejected():
+    cyclic = StrategyGraph([Node("a", lambda b: b, deps=("b",)), Node("b", lambda a: a, deps=("a",))])
+    with pytest.raises(ValueError, match="Cycle"):
+        cyclic.run({})
+    with pytest.raises(KeyError, match="missing inputs"):
+        StrategyGraph([Node("a", lambda x: x, deps=("x",))]).run({})
+    with pytest.raises(ValueError, match="Duplicate"):
+        StrategyGraph([Node("a", lambda: 1), Node("a", lambda: 2)])
+
+
+def test_node_execution_is_timed_and_profiled():
+    label = "graph.profiled_node_test"
+    metrics.enable_profiling([label], "cprofile", sample_rate=1.0)
+    try:
+        StrategyGraph([Node("profiled_node_test", lambda x: sum(range(1000)), deps=("x",))]).run({"x": 1})
+    finally:
+        metrics.disable_profiling([label])
+    stats = metrics.snapshot()[label]
+    assert stats["calls"] == 1
+    assert stats["profiled_calls"] == 1
+
+
+def test_forced_fallback_uses_the_node_label():
+    before = metrics.snapshot().get("graph.prediction", {"calls": 0, "fallbacks": 0})
+    label, _ = _prediction_node({"query_length": 3, "keyword_hits": 0, "avg_steps": 0}, use_fallback=True)
+    after = metrics.snapshot()["graph.prediction"]
+    assert isinstance(label, str)
+    assert after["fallbacks"] == before["fallbacks"] + 1
+    assert after["calls"] == before["calls"]  # the graph counts the call itself
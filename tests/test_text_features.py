@@ -0,0 +1,38 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("textblob")
+
+import modules.text_features as text_features  # noqa: E402
+
+TEXTS = [f"Line {i}: revenue grew {i % 13} percent in the quarter" for i in range(40)] + ["", "Great results!"]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    text_features.clear_cache()
+    yield
+    text_features.clear_cache()
+
+
+def test_features_match_row_features():
+    frame = text_features.extract_text_features(pd.Series(TEXTS, index=range(100, 100 + len(TEXTS))))
+    assert list(frame.columns) == text_features.TEXT_FEATURE_COLUMNS
+    assert list(frame.index) == list(range(100, 100 + len(TEXTS)))
+    assert [tuple(row) for row in frame.itertuples(index=False)] == [text_features.row_features(t) for t in TEXTS]
+
+
+def test_pool_matches_serial_and_is_reused(monkeypatch):
+    serial = text_features.extract_text_features(TEXTS, workers=1)
+    text_features.clear_cache()
+
+    monkeypatch.setattr(text_features, "PARALLEL_MIN_ROWS", 1)
+    try:
+        parallel = text_features.extract_text_features(TEXTS, workers=2)
+        pool = text_features._pools[2]
+        text_features.clear_cache()
+        text_features.extract_text_features(TEXTS, workers=2)
+        assert text_features._pools[2] is pool
+    finally:
+        text_features.shutdown_pools()
+    pd.testing.assert_frame_equal(serial, parallel)